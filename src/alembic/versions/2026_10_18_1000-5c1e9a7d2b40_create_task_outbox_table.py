@@ -0,0 +1,53 @@
+"""create task outbox table
+
+Revision ID: 5c1e9a7d2b40
+Revises: 3577deedfc92
+Create Date: 2026-10-18 10:00:12.418520
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5c1e9a7d2b40"
+down_revision: Union[str, None] = "3577deedfc92"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "task_outbox",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("created_at", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column("task_id", sa.UUID(), nullable=False),
+        sa.Column("priority", sa.Integer(), nullable=False),
+        sa.Column("routing_key", sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["task_id"], ["tasks.id"], name=op.f("fk_task_outbox_task_id_tasks"), ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_task_outbox")),
+    )
+    op.create_index(op.f("ix_task_outbox_created_at"), "task_outbox", ["created_at"])
+    # задачи, созданные до появления outbox и так и не отправленные
+    op.execute(
+        """
+        INSERT INTO task_outbox (id, created_at, task_id, priority, routing_key)
+        SELECT gen_random_uuid(), created_at, id,
+               CASE priority WHEN 'LOW' THEN 1 WHEN 'MEDIUM' THEN 5 ELSE 10 END,
+               'tasks_queue'
+        FROM tasks
+        WHERE status = 'NEW'
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_task_outbox_created_at"), table_name="task_outbox")
+    op.drop_table("task_outbox")
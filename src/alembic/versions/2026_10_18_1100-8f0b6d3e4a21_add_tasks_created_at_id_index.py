@@ -0,0 +1,27 @@
+"""add tasks created_at id index
+
+Revision ID: 8f0b6d3e4a21
+Revises: 5c1e9a7d2b40
+Create Date: 2026-10-18 11:00:41.902114
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8f0b6d3e4a21"
+down_revision: Union[str, None] = "5c1e9a7d2b40"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_tasks_created_at_id", "tasks", ["created_at", "id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_tasks_created_at_id", table_name="tasks")
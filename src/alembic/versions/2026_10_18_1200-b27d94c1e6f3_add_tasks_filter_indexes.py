@@ -0,0 +1,58 @@
+"""add tasks filter indexes
+
+Revision ID: b27d94c1e6f3
+Revises: 8f0b6d3e4a21
+Create Date: 2026-10-18 12:00:07.335861
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b27d94c1e6f3"
+down_revision: Union[str, None] = "8f0b6d3e4a21"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # CONCURRENTLY не блокирует запись в tasks, но не может выполняться внутри транзакции
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_tasks_status_priority_created_at",
+            "tasks",
+            ["status", "priority", "created_at"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_tasks_active_status_created_at",
+            "tasks",
+            ["status", "created_at"],
+            postgresql_where=sa.text("status IN ('NEW', 'PENDING', 'IN_PROGRESS')"),
+            postgresql_concurrently=True,
+        )
+        op.create_index("ix_tasks_started_at", "tasks", ["started_at"], postgresql_concurrently=True)
+        op.create_index("ix_tasks_completed_at", "tasks", ["completed_at"], postgresql_concurrently=True)
+        op.create_index(
+            "ix_tasks_title_trgm",
+            "tasks",
+            ["title"],
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_tasks_title_trgm", table_name="tasks")
+    op.drop_index("ix_tasks_completed_at", table_name="tasks")
+    op.drop_index("ix_tasks_started_at", table_name="tasks")
+    op.drop_index("ix_tasks_active_status_created_at", table_name="tasks")
+    op.drop_index("ix_tasks_status_priority_created_at", table_name="tasks")
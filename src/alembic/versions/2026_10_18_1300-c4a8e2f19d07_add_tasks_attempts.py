@@ -0,0 +1,31 @@
+"""add tasks attempts
+
+Revision ID: c4a8e2f19d07
+Revises: b27d94c1e6f3
+Create Date: 2026-10-18 13:00:12.548301
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c4a8e2f19d07"
+down_revision: Union[str, None] = "b27d94c1e6f3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("tasks", sa.Column("attempts", sa.Integer(), server_default="0", nullable=False))
+    op.add_column("tasks", sa.Column("max_attempts", sa.Integer(), server_default="3", nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("tasks", "max_attempts")
+    op.drop_column("tasks", "attempts")
@@ -0,0 +1,42 @@
+"""add tasks lease
+
+Revision ID: d71f3b5a9e28
+Revises: c4a8e2f19d07
+Create Date: 2026-10-18 14:00:31.207644
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d71f3b5a9e28"
+down_revision: Union[str, None] = "c4a8e2f19d07"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("tasks", sa.Column("lease_expires_at", sa.TIMESTAMP(timezone=True), nullable=True))
+    op.add_column("tasks", sa.Column("heartbeat_at", sa.TIMESTAMP(timezone=True), nullable=True))
+    # задачи, отправленные до появления аренды, тоже должны попасть под sweeper
+    op.execute(
+        "UPDATE tasks SET lease_expires_at = now() + interval '10 minutes' WHERE status IN ('PENDING', 'IN_PROGRESS')"
+    )
+    op.create_index(
+        "ix_tasks_lease_expires_at",
+        "tasks",
+        ["lease_expires_at"],
+        postgresql_where=sa.text("status IN ('PENDING', 'IN_PROGRESS')"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_tasks_lease_expires_at", table_name="tasks")
+    op.drop_column("tasks", "heartbeat_at")
+    op.drop_column("tasks", "lease_expires_at")
@@ -0,0 +1,29 @@
+"""add tasks task_type
+
+Revision ID: e3b9c6d0a152
+Revises: d71f3b5a9e28
+Create Date: 2026-10-18 15:00:48.631927
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e3b9c6d0a152"
+down_revision: Union[str, None] = "d71f3b5a9e28"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("tasks", sa.Column("task_type", sa.String(), server_default="default", nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("tasks", "task_type")
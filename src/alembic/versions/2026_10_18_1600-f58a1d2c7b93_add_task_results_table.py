@@ -0,0 +1,42 @@
+"""add task results table
+
+Revision ID: f58a1d2c7b93
+Revises: e3b9c6d0a152
+Create Date: 2026-10-18 16:00:19.774512
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f58a1d2c7b93"
+down_revision: Union[str, None] = "e3b9c6d0a152"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "task_results",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("payload", sa.LargeBinary(), nullable=False),
+        sa.Column("created_at", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["id"], ["tasks.id"], name=op.f("fk_task_results_id_tasks"), ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_task_results")),
+    )
+    op.add_column("tasks", sa.Column("result_size", sa.Integer(), server_default="0", nullable=False))
+    op.add_column("tasks", sa.Column("result_ref", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("tasks", "result_ref")
+    op.drop_column("tasks", "result_size")
+    op.drop_table("task_results")
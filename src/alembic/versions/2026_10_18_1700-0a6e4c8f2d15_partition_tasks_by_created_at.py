@@ -0,0 +1,109 @@
+"""partition tasks by created_at
+
+Revision ID: 0a6e4c8f2d15
+Revises: f58a1d2c7b93
+Create Date: 2026-10-18 17:00:52.418306
+
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0a6e4c8f2d15"
+down_revision: Union[str, None] = "f58a1d2c7b93"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TASKS_INDEXES = (
+    ("ix_tasks_created_at_id", ["created_at", "id"], {}),
+    ("ix_tasks_status_priority_created_at", ["status", "priority", "created_at"], {}),
+    (
+        "ix_tasks_active_status_created_at",
+        ["status", "created_at"],
+        {"postgresql_where": sa.text("status IN ('NEW', 'PENDING', 'IN_PROGRESS')")},
+    ),
+    ("ix_tasks_started_at", ["started_at"], {}),
+    ("ix_tasks_completed_at", ["completed_at"], {}),
+    (
+        "ix_tasks_lease_expires_at",
+        ["lease_expires_at"],
+        {"postgresql_where": sa.text("status IN ('PENDING', 'IN_PROGRESS')")},
+    ),
+    ("ix_tasks_title_trgm", ["title"], {"postgresql_using": "gin", "postgresql_ops": {"title": "gin_trgm_ops"}}),
+)
+# миграция не зависит от настроек и кода приложения: секции помесячные, три будущих месяца создаются заранее,
+# дальше секции создаёт partitions.py с интервалом из настроек
+PREMAKE_MONTHS = 3
+
+
+def month_start(moment: datetime) -> datetime:
+    return moment.astimezone(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_month(start: datetime) -> datetime:
+    return (start + timedelta(days=32)).replace(day=1)
+
+
+def replace_tasks_table(create_sql: str) -> None:
+    # индексы старой таблицы удаляются до копирования: имена освобождаются, а вставка идёт быстрее
+    for name, _, _ in TASKS_INDEXES:
+        op.drop_index(name, table_name="tasks")
+    op.execute("ALTER TABLE tasks RENAME TO tasks_old")
+    op.execute("ALTER TABLE tasks_old RENAME CONSTRAINT pk_tasks TO pk_tasks_old")
+    op.execute(create_sql)
+
+
+def copy_tasks_and_create_indexes() -> None:
+    op.execute("INSERT INTO tasks SELECT * FROM tasks_old")
+    op.drop_table("tasks_old")
+    for name, columns, kwargs in TASKS_INDEXES:
+        op.create_index(name, "tasks", columns, **kwargs)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # внешний ключ на секционированную таблицу должен включать ключ секционирования, поэтому он удаляется
+    op.drop_constraint("fk_task_outbox_task_id_tasks", "task_outbox", type_="foreignkey")
+    op.drop_constraint("fk_task_results_id_tasks", "task_results", type_="foreignkey")
+
+    replace_tasks_table(
+        "CREATE TABLE tasks (LIKE tasks_old INCLUDING DEFAULTS, CONSTRAINT pk_tasks PRIMARY KEY (id, created_at)) "
+        "PARTITION BY RANGE (created_at)"
+    )
+
+    # секции покрывают существующие задачи и PREMAKE_MONTHS месяцев вперёд
+    now = datetime.now(timezone.utc)
+    oldest = op.get_bind().execute(sa.text("SELECT min(created_at) FROM tasks_old")).scalar() or now
+    until = month_start(now)
+    for _ in range(PREMAKE_MONTHS):
+        until = next_month(until)
+    start = month_start(oldest)
+    while start <= until:
+        end = next_month(start)
+        op.execute(
+            f"CREATE TABLE tasks_p{start:%Y%m%d} PARTITION OF tasks "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+        start = end
+    # страховка на случай, если секции вовремя не созданы: вставка не упадёт
+    op.execute("CREATE TABLE tasks_default PARTITION OF tasks DEFAULT")
+
+    copy_tasks_and_create_indexes()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    replace_tasks_table("CREATE TABLE tasks (LIKE tasks_old INCLUDING DEFAULTS, CONSTRAINT pk_tasks PRIMARY KEY (id))")
+    copy_tasks_and_create_indexes()
+
+    op.create_foreign_key(
+        "fk_task_results_id_tasks", "task_results", "tasks", ["id"], ["id"], ondelete="CASCADE"
+    )
+    op.create_foreign_key(
+        "fk_task_outbox_task_id_tasks", "task_outbox", "tasks", ["task_id"], ["id"], ondelete="CASCADE"
+    )
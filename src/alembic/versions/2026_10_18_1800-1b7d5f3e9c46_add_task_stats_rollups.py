@@ -0,0 +1,142 @@
+"""add task stats rollups
+
+Revision ID: 1b7d5f3e9c46
+Revises: 0a6e4c8f2d15
+Create Date: 2026-10-18 18:00:14.902731
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "1b7d5f3e9c46"
+down_revision: Union[str, None] = "0a6e4c8f2d15"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# снимок DDL на момент миграции: models.stats может меняться, а миграция должна воспроизводиться как есть
+TASK_STATS_DDL = (
+    """
+    CREATE OR REPLACE FUNCTION task_duration_bucket(duration interval) RETURNS integer
+    LANGUAGE sql IMMUTABLE AS $$
+        SELECT floor(log(2, greatest(extract(epoch FROM duration) * 1000, 1)::numeric) * 4)::integer
+    $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION task_stats_on_insert() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        INSERT INTO task_status_counters (status, priority, shard, count)
+        SELECT status, priority, floor(random() * 8), count(*)
+        FROM new_tasks GROUP BY status, priority
+        ON CONFLICT (status, priority, shard) DO UPDATE SET count = task_status_counters.count + excluded.count;
+        RETURN NULL;
+    END $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION task_stats_on_update() RETURNS trigger LANGUAGE plpgsql AS $$
+    DECLARE
+        stats_shard integer := floor(random() * 8);
+    BEGIN
+        INSERT INTO task_status_counters (status, priority, shard, count)
+        SELECT status, priority, stats_shard, sum(delta)
+        FROM (
+            SELECT status, priority, 1 AS delta FROM new_tasks
+            UNION ALL
+            SELECT status, priority, -1 AS delta FROM old_tasks
+        ) AS changes
+        GROUP BY status, priority
+        HAVING sum(delta) <> 0
+        ON CONFLICT (status, priority, shard) DO UPDATE SET count = task_status_counters.count + excluded.count;
+
+        INSERT INTO task_duration_stats (minute, kind, bucket, shard, count)
+        SELECT date_trunc('minute', n.started_at), 'wait', task_duration_bucket(n.started_at - n.created_at),
+               stats_shard, count(*)
+        FROM new_tasks n JOIN old_tasks o ON o.id = n.id AND o.created_at = n.created_at
+        WHERE n.status = 'IN_PROGRESS' AND o.status <> 'IN_PROGRESS' AND n.started_at IS NOT NULL
+        GROUP BY 1, 3
+        UNION ALL
+        SELECT date_trunc('minute', n.completed_at), 'run', task_duration_bucket(n.completed_at - n.started_at),
+               stats_shard, count(*)
+        FROM new_tasks n JOIN old_tasks o ON o.id = n.id AND o.created_at = n.created_at
+        WHERE n.status IN ('COMPLETED', 'FAILED') AND o.status = 'IN_PROGRESS'
+            AND n.started_at IS NOT NULL AND n.completed_at IS NOT NULL
+        GROUP BY 1, 3
+        ON CONFLICT (minute, kind, bucket, shard) DO UPDATE SET count = task_duration_stats.count + excluded.count;
+        RETURN NULL;
+    END $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION task_stats_on_delete() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        INSERT INTO task_status_counters (status, priority, shard, count)
+        SELECT status, priority, floor(random() * 8), -count(*)
+        FROM old_tasks GROUP BY status, priority
+        ON CONFLICT (status, priority, shard) DO UPDATE SET count = task_status_counters.count + excluded.count;
+        RETURN NULL;
+    END $$
+    """,
+    """
+    CREATE TRIGGER task_stats_insert AFTER INSERT ON tasks
+    REFERENCING NEW TABLE AS new_tasks FOR EACH STATEMENT EXECUTE FUNCTION task_stats_on_insert()
+    """,
+    """
+    CREATE TRIGGER task_stats_update AFTER UPDATE ON tasks
+    REFERENCING OLD TABLE AS old_tasks NEW TABLE AS new_tasks FOR EACH STATEMENT EXECUTE FUNCTION task_stats_on_update()
+    """,
+    """
+    CREATE TRIGGER task_stats_delete AFTER DELETE ON tasks
+    REFERENCING OLD TABLE AS old_tasks FOR EACH STATEMENT EXECUTE FUNCTION task_stats_on_delete()
+    """,
+)
+
+TASK_STATS_DROP_DDL = (
+    "DROP TRIGGER IF EXISTS task_stats_delete ON tasks",
+    "DROP TRIGGER IF EXISTS task_stats_update ON tasks",
+    "DROP TRIGGER IF EXISTS task_stats_insert ON tasks",
+    "DROP FUNCTION IF EXISTS task_stats_on_delete()",
+    "DROP FUNCTION IF EXISTS task_stats_on_update()",
+    "DROP FUNCTION IF EXISTS task_stats_on_insert()",
+    "DROP FUNCTION IF EXISTS task_duration_bucket(interval)",
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "task_status_counters",
+        sa.Column("status", postgresql.ENUM(name="task_status", create_type=False), nullable=False),
+        sa.Column("priority", postgresql.ENUM(name="task_priority", create_type=False), nullable=False),
+        sa.Column("shard", sa.Integer(), nullable=False),
+        sa.Column("count", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("status", "priority", "shard", name=op.f("pk_task_status_counters")),
+    )
+    op.create_table(
+        "task_duration_stats",
+        sa.Column("minute", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("bucket", sa.Integer(), nullable=False),
+        sa.Column("shard", sa.Integer(), nullable=False),
+        sa.Column("count", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("minute", "kind", "bucket", "shard", name=op.f("pk_task_duration_stats")),
+    )
+    # начальные значения счётчиков считаются один раз; блокировка не даёт изменить tasks до создания триггеров
+    op.execute("LOCK TABLE tasks IN SHARE MODE")
+    op.execute(
+        "INSERT INTO task_status_counters (status, priority, shard, count) "
+        "SELECT status, priority, 0, count(*) FROM tasks GROUP BY status, priority"
+    )
+    for statement in TASK_STATS_DDL:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for statement in TASK_STATS_DROP_DDL:
+        op.execute(statement)
+    op.drop_table("task_duration_stats")
+    op.drop_table("task_status_counters")
@@ -0,0 +1,37 @@
+"""add task idempotency keys
+
+Revision ID: 2c8e6a4f0d57
+Revises: 1b7d5f3e9c46
+Create Date: 2026-10-18 19:00:37.215904
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "2c8e6a4f0d57"
+down_revision: Union[str, None] = "1b7d5f3e9c46"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "task_idempotency_keys",
+        sa.Column("key", sa.String(length=255), nullable=False),
+        sa.Column("request_hash", sa.String(length=64), nullable=False),
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("created_at", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_task_idempotency_keys")),
+        sa.UniqueConstraint("key", name=op.f("uq_task_idempotency_keys_key")),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("task_idempotency_keys")
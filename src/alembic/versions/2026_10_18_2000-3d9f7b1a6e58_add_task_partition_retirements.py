@@ -0,0 +1,35 @@
+"""add task partition retirements
+
+Revision ID: 3d9f7b1a6e58
+Revises: 2c8e6a4f0d57
+Create Date: 2026-10-18 20:00:21.530117
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3d9f7b1a6e58"
+down_revision: Union[str, None] = "2c8e6a4f0d57"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "task_partition_retirements",
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("cleaned", sa.Boolean(), server_default=sa.false(), nullable=False),
+        sa.Column("created_at", sa.TIMESTAMP(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint("name", name=op.f("pk_task_partition_retirements")),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("task_partition_retirements")
@@ -1,61 +1,210 @@
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import UUID4
-from starlette.status import HTTP_400_BAD_REQUEST, HTTP_500_INTERNAL_SERVER_ERROR
+import asyncio
+from typing import Annotated, AsyncIterator
+from uuid import UUID
 
-from db.postgres import SessionDep
-from infra.rabbit import RabbitDep
-from messaging.publisher import TaskPublisher
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from starlette.status import HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND, HTTP_500_INTERNAL_SERVER_ERROR
+
+from core.consts import (
+    IDEMPOTENCY_KEY_MAX_LENGTH,
+    IDEMPOTENT_REPLAYED_HEADER,
+    LONG_POLL_MAX_TIMEOUT,
+    SSE_KEEPALIVE_INTERVAL,
+    STATS_DEFAULT_WINDOW,
+    STATS_MAX_WINDOW,
+    STATUS_BATCH_MAX_SIZE,
+    TASKS_BATCH_MAX_SIZE,
+)
+from db.postgres import ReadSessionDep, SessionDep, SessionFactoryDep
 from models import TaskModel
-from schemas.task import TaskIn, TaskListParams, TaskOut, TaskStatusResponse
-from services.task import TaskService
-from utils.enums import ClientErrorMessage, TaskStatusEnum
+from schemas.task import TaskIn, TaskListParams, TaskOut, TaskStatsResponse, TaskStatusResponse
+from services.result_store import result_store
+from services.stats import TaskStatsService
+from services.task import TASK_OUT_KEYS, TaskService
+from services.task_cache import TaskCacheService
+from services.task_events import TaskEventService, task_event_hub
+from utils.compression import accepts_gzip, iter_gunzip
+from utils.enums import ClientErrorMessage, ExportFormatEnum, TaskStatusEnum
+from utils.export import iter_csv, iter_ndjson
+from utils.pagination import encode_cursor
+from utils.serialization import FastJSONResponse, row_to_dict
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
 
 @router.post("", summary="Создать новую задачу", response_model=TaskOut)
-async def create_task(data: TaskIn, session: SessionDep, rabbit: RabbitDep) -> TaskModel:
-    task = await TaskService.create_task(data, session)
-    await TaskPublisher.publish_task_message(task, session, rabbit)
+async def create_task(
+    data: TaskIn,
+    session: SessionDep,
+    response: Response,
+    idempotency_key: str | None = Header(None, min_length=1, max_length=IDEMPOTENCY_KEY_MAX_LENGTH),
+) -> TaskModel:
+    if idempotency_key is None:
+        task = await TaskService.create_task(data, session)
+        return task
+    # повтор запроса клиентом после таймаута возвращает уже созданную задачу, не создавая и не отправляя новую
+    task, created = await TaskService.create_task_idempotent(data, idempotency_key, session)
+    if not created:
+        response.headers[IDEMPOTENT_REPLAYED_HEADER] = "true"
     return task
 
 
-@router.get("", summary="Получить список задач", response_model=list[TaskOut])
-async def list_task(session: SessionDep, query_params: TaskListParams = Depends()) -> list[TaskModel]:
-    task_list = await TaskService.get_task_list(session, query_params)
+@router.post("/batch", summary="Создать задачи пакетом", response_model=list[TaskOut])
+async def create_task_batch(
+    data: Annotated[list[TaskIn], Body(min_length=1, max_length=TASKS_BATCH_MAX_SIZE)],
+    session: SessionDep,
+) -> list[TaskModel]:
+    task_list = await TaskService.create_tasks(data, session)
     return task_list
 
 
-@router.get("/{task_id}", summary="Получить задачу по id", response_model=TaskOut)
-async def get_task_by_id(task_id: UUID4, session: SessionDep) -> TaskModel:
-    task = await TaskService.get_task_by_id(task_id, session)
-    return task
+@router.get("", summary="Получить список задач", response_model=list[TaskOut], response_class=FastJSONResponse)
+async def list_task(session: ReadSessionDep, query_params: TaskListParams = Depends()) -> FastJSONResponse:
+    rows = await TaskService.get_task_list(session, query_params)
+    headers = {}
+    if len(rows) == query_params.pagination.page_size:
+        headers["X-Next-Cursor"] = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return FastJSONResponse([row_to_dict(row, TASK_OUT_KEYS) for row in rows], headers=headers)
 
 
-@router.get("/{task_id}/status", summary="Получить статус задачи", response_model=TaskStatusResponse)
-async def get_task_status(task_id: UUID4, session: SessionDep) -> TaskStatusResponse:
-    task = await TaskService.get_task_by_id(task_id, session)
-    return task
+@router.get("/export", summary="Выгрузить задачи потоком", response_class=StreamingResponse)
+async def export_tasks(
+    session_factory: SessionFactoryDep,
+    query_params: TaskListParams = Depends(),
+    export_format: ExportFormatEnum = Query(ExportFormatEnum.NDJSON, alias="format"),
+) -> StreamingResponse:
+    async def content() -> AsyncIterator[bytes]:
+        async with session_factory() as session:
+            partitions = TaskService.stream_task_rows(session, query_params)
+            if export_format == ExportFormatEnum.CSV:
+                chunks = iter_csv(partitions, TASK_OUT_KEYS)
+            else:
+                chunks = iter_ndjson(partitions)
+            async for chunk in chunks:
+                yield chunk
+
+    media_type = "text/csv" if export_format == ExportFormatEnum.CSV else "application/x-ndjson"
+    return StreamingResponse(
+        content(),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=tasks.{export_format}"},
+    )
+
+
+@router.get(
+    "/status",
+    summary="Получить статусы нескольких задач",
+    response_model=list[TaskStatusResponse],
+    response_class=FastJSONResponse,
+)
+async def get_task_statuses(
+    session: ReadSessionDep,
+    ids: list[UUID] = Query(min_length=1, max_length=STATUS_BATCH_MAX_SIZE),
+) -> FastJSONResponse:
+    # несуществующие задачи в ответ не попадают
+    rows = await TaskService.get_task_statuses(ids, session)
+    return FastJSONResponse([row._asdict() for row in rows])
+
+
+@router.get("/stats", summary="Получить статистику по задачам", response_model=TaskStatsResponse)
+async def get_task_stats(
+    session: SessionDep, window: int = Query(STATS_DEFAULT_WINDOW, ge=1, le=STATS_MAX_WINDOW)
+) -> TaskStatsResponse:
+    stats = await TaskStatsService.get_stats(session, window)
+    return stats
+
+
+@router.get("/events", summary="Поток событий смены статуса задач (SSE)", response_class=StreamingResponse)
+async def task_events(ids: list[UUID] | None = Query(None, max_length=STATUS_BATCH_MAX_SIZE)) -> StreamingResponse:
+    async def content() -> AsyncIterator[bytes]:
+        with task_event_hub.watch(ids) as events:
+            while True:
+                try:
+                    event = await asyncio.wait_for(events.get(), SSE_KEEPALIVE_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+                yield f"event: status\ndata: {event.model_dump_json()}\n\n".encode()
+
+    return StreamingResponse(content(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@router.get("/{task_id}", summary="Получить задачу по id", response_model=TaskOut, response_class=FastJSONResponse)
+async def get_task_by_id(task_id: UUID, session: ReadSessionDep) -> FastJSONResponse:
+    task = await TaskCacheService.get_task(task_id, session)
+    return FastJSONResponse(task)
+
+
+@router.get(
+    "/{task_id}/status",
+    summary="Получить статус задачи",
+    response_model=TaskStatusResponse,
+    response_class=FastJSONResponse,
+)
+async def get_task_status(task_id: UUID, session: ReadSessionDep) -> FastJSONResponse:
+    task_status = await TaskCacheService.get_task_status(task_id, session)
+    return FastJSONResponse(task_status)
+
+
+@router.get("/{task_id}/result", summary="Получить результат задачи", response_class=StreamingResponse)
+async def get_task_result(
+    task_id: UUID,
+    session: SessionDep,
+    accept_encoding: str = Header(""),
+) -> Response:
+    task = await TaskService.get_task_result(task_id, session)
+    if task.result_ref is None:
+        return Response(task.result, media_type="text/plain; charset=utf-8")
+
+    try:
+        chunks = await result_store.open_compressed(task.result_ref, task.id, session)
+    except FileNotFoundError:
+        raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail=ClientErrorMessage.NOT_FOUND_TASK_RESULT_ERROR)
+    # клиенту, принимающему gzip, отдаём сохранённые байты без распаковки
+    if accepts_gzip(accept_encoding):
+        return StreamingResponse(
+            chunks,
+            media_type="text/plain; charset=utf-8",
+            headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"},
+        )
+    return StreamingResponse(
+        iter_gunzip(chunks), media_type="text/plain; charset=utf-8", headers={"Vary": "Accept-Encoding"}
+    )
+
+
+@router.get(
+    "/{task_id}/wait",
+    summary="Дождаться завершения задачи",
+    response_model=TaskStatusResponse,
+)
+async def wait_for_task(
+    task_id: UUID,
+    session: SessionDep,
+    timeout: float = Query(30.0, gt=0, le=LONG_POLL_MAX_TIMEOUT),
+) -> TaskStatusResponse:
+    # возвращает статус после завершения задачи или текущий статус по истечении timeout
+    task_status = await TaskEventService.wait_for_task(task_id, session, timeout)
+    return task_status
 
 
 @router.delete("/{task_id}", summary="Отменить задачу", response_model=TaskStatusResponse)
-async def cancel_task(task_id: UUID4, session: SessionDep) -> TaskStatusResponse:
+async def cancel_task(task_id: UUID, session: SessionDep) -> TaskStatusResponse:
     task = await TaskService.get_task_by_id(task_id, session)
-    # отменяем только NEW и PENDING
+    # отменяем NEW, PENDING и IN_PROGRESS: выполняющую задачу воркер прерывает по сигналу отмены
     if task.status in [
         TaskStatusEnum.COMPLETED,
         TaskStatusEnum.FAILED,
         TaskStatusEnum.CANCELLED,
-        TaskStatusEnum.IN_PROGRESS,
     ]:
         raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail=ClientErrorMessage.CANNOT_CANCEL_TASK_ERROR)
 
     try:
-        task = await TaskService.update_task_status(
-            task_id=task_id,
-            status=TaskStatusEnum.CANCELLED,
-            session=session,
-        )
-        return task
+        cancelled = await TaskService.cancel_task(task_id, session, from_status=task.status)
     except Exception as e:
         raise HTTPException(status_code=HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Ошибка при отмене задачи: {str(e)}")
+    # статус изменился после чтения, например задача успела завершиться
+    if not cancelled:
+        raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail=ClientErrorMessage.CANNOT_CANCEL_TASK_ERROR)
+    TaskCacheService.invalidate(task_id)
+    return TaskStatusResponse(id=cancelled.id, status=cancelled.status)
@@ -0,0 +1,170 @@
+import asyncio
+import heapq
+import itertools
+from typing import Any, Awaitable, Callable
+
+from aio_pika import Message
+
+from core.logger import logger
+
+MessageCallback = Callable[["InMemoryMessage"], Awaitable[Any]]
+
+
+class InMemoryMessage:
+    """Доставленное сообщение с тем же интерфейсом подтверждений, что и aio_pika.IncomingMessage."""
+
+    def __init__(self, channel: "InMemoryChannel", queue: "InMemoryQueue", body: bytes, priority: int) -> None:
+        self.channel = channel
+        self.queue = queue
+        self.body = body
+        self.priority = priority
+        self.processed = False
+
+    async def ack(self, multiple: bool = False) -> None:
+        self.channel.settle(self, multiple)
+
+    async def nack(self, requeue: bool = True) -> None:
+        self.channel.settle(self, multiple=False)
+        if requeue:
+            self.queue.put(self.body, self.priority)
+
+
+class InMemoryQueue:
+    """Очередь с приоритетами; при x-message-ttl сообщение по истечении TTL уходит в dead-letter очередь."""
+
+    def __init__(self, broker: "InMemoryBroker", name: str, arguments: dict[str, Any]) -> None:
+        self.broker = broker
+        self.name = name
+        self.ttl = arguments.get("x-message-ttl")
+        self.dead_letter_routing_key = arguments.get("x-dead-letter-routing-key")
+        self.messages: list[tuple[int, int, bytes]] = []
+        self.consumers: dict[str, tuple["InMemoryChannel", MessageCallback]] = {}
+        self.sequence = itertools.count()
+
+    def put(self, body: bytes, priority: int) -> None:
+        if self.ttl is not None and self.dead_letter_routing_key:
+            loop = asyncio.get_running_loop()
+            loop.call_later(self.ttl / 1000, self.broker.route, self.dead_letter_routing_key, body, priority)
+            return
+        heapq.heappush(self.messages, (-priority, next(self.sequence), body))
+        self.dispatch()
+
+    def dispatch(self) -> None:
+        for channel, callback in self.consumers.values():
+            while self.messages and channel.has_capacity():
+                priority, _, body = heapq.heappop(self.messages)
+                channel.deliver(InMemoryMessage(channel, self, body, -priority), callback)
+
+
+class InMemoryQueueHandle:
+    """Очередь, объявленная в конкретном канале: подписка идёт с prefetch этого канала."""
+
+    def __init__(self, queue: InMemoryQueue, channel: "InMemoryChannel") -> None:
+        self.queue = queue
+        self.channel = channel
+        self.name = queue.name
+
+    async def consume(self, callback: MessageCallback, no_ack: bool = False) -> str:
+        consumer_tag = f"ctag.{self.name}.{len(self.queue.consumers)}"
+        self.queue.consumers[consumer_tag] = (self.channel, callback)
+        self.channel.queues.add(self.queue)
+        self.queue.dispatch()
+        return consumer_tag
+
+    async def cancel(self, consumer_tag: str) -> None:
+        self.queue.consumers.pop(consumer_tag, None)
+
+
+class InMemoryExchange:
+    def __init__(self, broker: "InMemoryBroker") -> None:
+        self.broker = broker
+
+    async def publish(self, message: Message, routing_key: str) -> None:
+        self.broker.route(routing_key, message.body, message.priority or 0)
+
+
+class InMemoryChannel:
+    def __init__(self, broker: "InMemoryBroker") -> None:
+        self.broker = broker
+        self.default_exchange = InMemoryExchange(broker)
+        self.prefetch_count = 0
+        self.unacked: list[InMemoryMessage] = []
+        self.queues: set[InMemoryQueue] = set()
+        self.callbacks: set[asyncio.Task] = set()
+        self.is_closed = False
+
+    async def set_qos(self, prefetch_count: int) -> None:
+        self.prefetch_count = prefetch_count
+
+    async def declare_queue(
+        self, name: str, durable: bool = False, arguments: dict[str, Any] | None = None
+    ) -> InMemoryQueueHandle:
+        return InMemoryQueueHandle(self.broker.declare_queue(name, arguments or {}), self)
+
+    def has_capacity(self) -> bool:
+        return not self.prefetch_count or len(self.unacked) < self.prefetch_count
+
+    def deliver(self, message: InMemoryMessage, callback: MessageCallback) -> None:
+        self.unacked.append(message)
+        # как и aiormq, запускаем обработчик каждого сообщения отдельной задачей
+        task = asyncio.create_task(callback(message))
+        self.callbacks.add(task)
+        task.add_done_callback(self.callbacks.discard)
+
+    def settle(self, message: InMemoryMessage, multiple: bool) -> None:
+        position = self.unacked.index(message)
+        settled = self.unacked[: position + 1] if multiple else [message]
+        for item in settled:
+            item.processed = True
+            self.unacked.remove(item)
+        for queue in self.queues:
+            queue.dispatch()
+
+    async def close(self) -> None:
+        self.is_closed = True
+
+
+class InMemoryConnection:
+    def __init__(self, broker: "InMemoryBroker") -> None:
+        self.broker = broker
+        self.is_closed = False
+
+    async def channel(self, publisher_confirms: bool = True) -> InMemoryChannel:
+        return InMemoryChannel(self.broker)
+
+    async def close(self) -> None:
+        self.is_closed = True
+
+    async def __aenter__(self) -> "InMemoryConnection":
+        return self
+
+    async def __aexit__(self, *args: object) -> None:
+        await self.close()
+
+
+class InMemoryBroker:
+    """
+    Заменитель RabbitMQ для бенчмарков: default exchange, приоритеты, prefetch, ack/nack и отложенные очереди.
+    Сообщения хранятся только в памяти процесса, поэтому API, релей и воркер должны работать в одном процессе.
+    """
+
+    def __init__(self) -> None:
+        self.queues: dict[str, InMemoryQueue] = {}
+        self.dropped = 0
+
+    def declare_queue(self, name: str, arguments: dict[str, Any]) -> InMemoryQueue:
+        if name not in self.queues:
+            self.queues[name] = InMemoryQueue(self, name, arguments)
+        return self.queues[name]
+
+    def route(self, routing_key: str, body: bytes, priority: int) -> None:
+        queue = self.queues.get(routing_key)
+        if queue is None:
+            # как и брокер, молча отбрасываем сообщения в необъявленную очередь
+            self.dropped += 1
+            logger.warning(f"Сообщение в необъявленную очередь {routing_key} отброшено")
+            return
+        queue.put(body, priority)
+
+    def connect(self) -> InMemoryConnection:
+        return InMemoryConnection(self)
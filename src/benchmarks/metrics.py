@@ -0,0 +1,64 @@
+import math
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+BENCHMARK_PERCENTILES: tuple[int, ...] = (50, 95, 99)
+
+
+def percentile(values: list[float], q: int) -> float:
+    """Перцентиль методом ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class LatencyRecorder:
+    """Длительности операций одного типа в миллисекундах."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.samples: list[float] = []
+
+    @contextmanager
+    def measure(self) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples.append((time.perf_counter() - started) * 1000)
+
+    def summary(self) -> dict[str, float]:
+        if not self.samples:
+            return {}
+        summary = {f"p{q}": round(percentile(self.samples, q), 2) for q in BENCHMARK_PERCENTILES}
+        summary["count"] = len(self.samples)
+        return summary
+
+
+class QueryCounter:
+    """
+    Считает сетевые round trip к базе через engine: запросы и BEGIN/COMMIT/ROLLBACK транзакций.
+    Подготовка запроса asyncpg при промахе кэша prepared statements не учитывается: после прогрева её нет.
+    """
+
+    EVENTS: tuple[str, ...] = ("before_cursor_execute", "begin", "commit", "rollback")
+
+    def __init__(self, engine: AsyncEngine) -> None:
+        self.engine = engine
+        self.count = 0
+
+    def on_round_trip(self, *args: object) -> None:
+        self.count += 1
+
+    def __enter__(self) -> "QueryCounter":
+        for name in self.EVENTS:
+            event.listen(self.engine.sync_engine, name, self.on_round_trip)
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        for name in self.EVENTS:
+            event.remove(self.engine.sync_engine, name, self.on_round_trip)
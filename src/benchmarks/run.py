@@ -0,0 +1,185 @@
+"""
+Сквозной бенчмарк: API создаёт задачи, релей отправляет их в брокер, воркер выполняет - всё в одном процессе.
+Нужна локальная база с применёнными миграциями; брокер - локальный RabbitMQ или InMemoryBroker.
+
+    python -m benchmarks.run --tasks 1000 --concurrency 50 --broker memory
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import time
+from typing import Awaitable, Callable, TypeVar
+
+import aio_pika
+import httpx
+from httpx import ASGITransport
+from sqlalchemy import Row, pool, text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+import worker
+from benchmarks.broker import InMemoryBroker
+from benchmarks.metrics import LatencyRecorder, QueryCounter
+from core.config import settings
+from core.logger import logger
+from db.postgres import engine
+from handlers import task_handler, task_registry
+from infra.rabbit import rabbitmq
+from relay import relay_batch
+from web_server import app
+
+BENCHMARK_TASK_TYPE = "benchmark"
+TASKS_PATH = "/api/v1/tasks"
+COMPLETION_POLL_INTERVAL = 0.1
+
+T = TypeVar("T")
+
+COMPLETED_COUNT_SQL = text(
+    "SELECT count(*) FROM tasks WHERE id = ANY(CAST(:ids AS uuid[])) AND status IN ('COMPLETED', 'FAILED')"
+)
+END_TO_END_SQL = text(
+    """
+    SELECT
+        percentile_cont(0.5) WITHIN GROUP (ORDER BY ms) AS p50,
+        percentile_cont(0.95) WITHIN GROUP (ORDER BY ms) AS p95,
+        percentile_cont(0.99) WITHIN GROUP (ORDER BY ms) AS p99
+    FROM (
+        SELECT extract(epoch FROM completed_at - created_at) * 1000 AS ms
+        FROM tasks WHERE id = ANY(CAST(:ids AS uuid[]))
+    ) AS durations
+    """
+)
+
+
+def register_benchmark_handler(work_ms: int) -> None:
+    @task_handler(BENCHMARK_TASK_TYPE)
+    async def run_benchmark_task(task: Row) -> str:
+        # имитация работы обработчика; при work_ms=0 измеряются только накладные расходы сервиса
+        if work_ms:
+            await asyncio.sleep(work_ms / 1000)
+        return ""
+
+
+async def run_relay(stop_event: asyncio.Event) -> None:
+    while not stop_event.is_set():
+        async with rabbitmq.channel_pool.channel() as rabbit_channel:
+            selected = await relay_batch(rabbit_channel)
+        if selected < settings.relay.batch_size:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(stop_event.wait(), COMPLETION_POLL_INTERVAL)
+
+
+async def run_concurrently(count: int, concurrency: int, operation: Callable[[int], Awaitable[T]]) -> list[T]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(index: int) -> T:
+        async with semaphore:
+            return await operation(index)
+
+    return await asyncio.gather(*(limited(index) for index in range(count)))
+
+
+async def wait_for_completion(monitor: AsyncEngine, task_ids: list[str], timeout: float) -> None:
+    # отдельный engine, чтобы опрос не попадал в счётчик запросов сервиса
+    deadline = time.monotonic() + timeout
+    async with monitor.connect() as connection:
+        while time.monotonic() < deadline:
+            finished = (await connection.execute(COMPLETED_COUNT_SQL, {"ids": task_ids})).scalar_one()
+            if finished == len(task_ids):
+                return
+            await asyncio.sleep(COMPLETION_POLL_INTERVAL)
+    raise TimeoutError(f"Задачи не завершились за {timeout} с")
+
+
+async def run_benchmark(args: argparse.Namespace) -> dict:
+    register_benchmark_handler(args.work_ms)
+    if args.broker == "memory":
+        connection = InMemoryBroker().connect()
+        # API и релей берут каналы из rabbitmq.channel_pool, который переиспользует уже открытое соединение
+        rabbitmq.connection = connection
+    else:
+        connection = await aio_pika.connect_robust(
+            host=settings.rabbit.host, login=settings.rabbit.login, password=settings.rabbit.password
+        )
+    await rabbitmq.declare_queues(task_registry.task_types)
+    monitor = create_async_engine(settings.db.url, poolclass=pool.NullPool)
+
+    create_latency = LatencyRecorder("create")
+    status_latency = LatencyRecorder("status")
+    list_latency = LatencyRecorder("list")
+    stop_event = asyncio.Event()
+
+    async with (
+        app.router.lifespan_context(app),
+        httpx.AsyncClient(transport=ASGITransport(app=app), base_url="http://benchmark") as client,
+    ):
+        subscriptions = await worker.subscribe(connection, [task_registry.get(BENCHMARK_TASK_TYPE)])
+        relay_task = asyncio.create_task(run_relay(stop_event))
+
+        async def create(index: int) -> str:
+            data = {"title": f"benchmark {index}", "priority": "MEDIUM", "task_type": BENCHMARK_TASK_TYPE}
+            with create_latency.measure():
+                response = await client.post(TASKS_PATH, json=data)
+            response.raise_for_status()
+            return response.json()["id"]
+
+        with QueryCounter(engine) as queries:
+            started = time.perf_counter()
+            task_ids = await run_concurrently(args.tasks, args.concurrency, create)
+            await wait_for_completion(monitor, task_ids, args.timeout)
+            elapsed = time.perf_counter() - started
+
+        async def get_status(index: int) -> None:
+            with status_latency.measure():
+                response = await client.get(f"{TASKS_PATH}/{task_ids[index % len(task_ids)]}/status")
+            response.raise_for_status()
+
+        async def list_tasks(index: int) -> None:
+            with list_latency.measure():
+                response = await client.get(TASKS_PATH, params={"task_type": BENCHMARK_TASK_TYPE, "page_size": 50})
+            response.raise_for_status()
+
+        await run_concurrently(args.requests, args.concurrency, get_status)
+        await run_concurrently(args.requests, args.concurrency, list_tasks)
+
+        stop_event.set()
+        await relay_task
+        await worker.unsubscribe(subscriptions)
+        await worker.lease_keeper.close()
+        await worker.result_writer.close()
+
+    async with monitor.connect() as monitor_connection:
+        end_to_end = (await monitor_connection.execute(END_TO_END_SQL, {"ids": task_ids})).one()
+    await monitor.dispose()
+    await connection.close()
+
+    return {
+        "broker": args.broker,
+        "tasks": args.tasks,
+        "concurrency": args.concurrency,
+        "worker_batch_size": settings.worker.batch_size,
+        "tasks_per_second": round(args.tasks / elapsed, 1),
+        "db_round_trips_per_task": round(queries.count / args.tasks, 2),
+        "latency_ms": {
+            "create": create_latency.summary(),
+            "status": status_latency.summary(),
+            "list": list_latency.summary(),
+            "end_to_end": {name: round(value, 2) for name, value in end_to_end._mapping.items()},
+        },
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Сквозной бенчмарк сервиса задач")
+    parser.add_argument("--tasks", type=int, default=1000, help="Количество создаваемых задач")
+    parser.add_argument("--concurrency", type=int, default=50, help="Одновременных запросов к API")
+    parser.add_argument("--requests", type=int, default=1000, help="Запросов статуса и списка после выполнения")
+    parser.add_argument("--broker", choices=["memory", "rabbit"], default="memory", help="Брокер сообщений")
+    parser.add_argument("--work-ms", type=int, default=0, help="Длительность работы обработчика, мс")
+    parser.add_argument("--timeout", type=float, default=300, help="Сколько ждать выполнения всех задач, с")
+    args = parser.parse_args()
+
+    logger.info(f"Бенчмарк: {args.tasks} задач, брокер {args.broker}")
+    report = asyncio.run(run_benchmark(args))
+    print(json.dumps(report, ensure_ascii=False, indent=2))
@@ -5,5 +5,47 @@ PRIORITY_MAP = {
     "HIGH": 10
 }
 
+# retries
+DEFAULT_MAX_ATTEMPTS: int = 3
+MAX_ATTEMPTS_LIMIT: int = 10
+
+# task results
+ERROR_MAX_LENGTH: int = 4000
+RESULT_CHUNK_SIZE: int = 64 * 1024
+
+# task stats
+TASK_STATS_SHARDS: int = 8
+DURATION_BUCKETS_PER_OCTAVE: int = 4
+STATS_DEFAULT_WINDOW: int = 60
+STATS_MAX_WINDOW: int = 1440
+
+# task types
+DEFAULT_TASK_TYPE: str = "default"
+TASK_TYPE_PATTERN: str = r"^[a-z0-9_]+$"
+TASK_TYPE_MAX_LENGTH: int = 64
+
+# idempotency
+IDEMPOTENCY_KEY_MAX_LENGTH: int = 255
+IDEMPOTENT_REPLAYED_HEADER: str = "Idempotent-Replayed"
+
+# batch limits
+TASKS_BATCH_MAX_SIZE: int = 10000
+EXPORT_PARTITION_SIZE: int = 1000
+STATUS_BATCH_MAX_SIZE: int = 1000
+
+# task events
+TASK_EVENTS_QUEUE_SIZE: int = 1000
+LONG_POLL_MAX_TIMEOUT: float = 60.0
+SSE_KEEPALIVE_INTERVAL: float = 15.0
+
+# postgres notification channels
+TASK_EVENTS_CHANNEL: str = "task_events"
+# separate channel so that workers do not parse every status change event
+TASK_CANCEL_CHANNEL: str = "task_cancel"
+
 # queue names
 TASKS_QUEUE: str = "tasks_queue"
+TASKS_QUEUE_MAX_PRIORITY: int = 10
+TASKS_TYPE_QUEUE_TEMPLATE: str = "tasks_queue.type.{task_type}"
+TASKS_RETRY_QUEUE_TEMPLATE: str = "{queue}.retry.{delay}"
+TASKS_DEAD_LETTER_QUEUE: str = "tasks_queue.dead"
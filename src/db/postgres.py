@@ -1,25 +1,81 @@
-from typing import Annotated
+import itertools
+from typing import Annotated, AsyncIterator
 
-from fastapi import Depends
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from fastapi import Depends, Header
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 
 from core.config import settings
+from infra.metrics import instrument_engine
+from utils.enums import ReadConsistencyEnum
 
-engine = create_async_engine(
-    url=settings.db.url,
-    pool_size=5,
-)
+
+def build_engine(url: str) -> AsyncEngine:
+    config = settings.db
+    engine = create_async_engine(
+        url=url,
+        echo=config.echo,
+        echo_pool=config.echo_pool,
+        pool_size=config.pool_size,
+        max_overflow=config.max_overflow,
+        pool_timeout=config.pool_timeout,
+        pool_recycle=config.pool_recycle,
+        pool_pre_ping=config.pool_pre_ping,
+        connect_args={"statement_cache_size": config.statement_cache_size},
+    )
+    instrument_engine(engine)
+    return engine
+
+
+engine = build_engine(settings.db.url)
 
 new_session = async_sessionmaker(engine, expire_on_commit=False)
 
+# сессии реплик помечены в info: прочитанное с реплики может отставать и не должно попадать в кэш
+replica_sessions = [
+    async_sessionmaker(build_engine(url), expire_on_commit=False, info={"replica": True})
+    for url in settings.db.replica_urls
+]
+next_replica_session = itertools.cycle(replica_sessions).__next__ if replica_sessions else None
+
 
 async def get_session() -> AsyncSession:
     async with new_session() as session:
         yield session
 
 
+async def get_read_session(
+    x_read_consistency: ReadConsistencyEnum = Header(ReadConsistencyEnum.EVENTUAL),
+) -> AsyncIterator[AsyncSession]:
+    """
+    Сессия только для чтения: реплики по кругу, если они настроены.
+    Заголовок X-Read-Consistency: strong читает из основной базы в обход кэша - клиент сразу видит свои изменения.
+    """
+    session_factory = new_session
+    if next_replica_session is not None and x_read_consistency == ReadConsistencyEnum.EVENTUAL:
+        session_factory = next_replica_session()
+    async with session_factory() as session:
+        session.info["strong"] = x_read_consistency == ReadConsistencyEnum.STRONG
+        yield session
+
+
 async def get_session_context() -> AsyncSession:
     return new_session()
 
 
+def get_session_factory() -> async_sessionmaker[AsyncSession]:
+    # для потоковых ответов: сессия из get_session закрывается до начала отправки тела
+    return new_session
+
+
+def is_replica_session(session: AsyncSession) -> bool:
+    return session.info.get("replica", False)
+
+
+def is_strong_read_session(session: AsyncSession) -> bool:
+    # кэш обновляется по NOTIFY асинхронно и может отставать от только что записанного
+    return session.info.get("strong", False)
+
+
 SessionDep = Annotated[AsyncSession, Depends(get_session)]
+ReadSessionDep = Annotated[AsyncSession, Depends(get_read_session)]
+SessionFactoryDep = Annotated[async_sessionmaker[AsyncSession], Depends(get_session_factory)]
@@ -0,0 +1,5 @@
+from .default import run_default_task as run_default_task
+from .registry import TaskHandler as TaskHandler
+from .registry import TaskHandlerRegistry as TaskHandlerRegistry
+from .registry import task_handler as task_handler
+from .registry import task_registry as task_registry
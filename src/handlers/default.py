@@ -0,0 +1,14 @@
+import asyncio
+
+from sqlalchemy import Row
+
+from core.consts import DEFAULT_TASK_TYPE
+
+from .registry import task_handler
+
+
+@task_handler(DEFAULT_TASK_TYPE)
+async def run_default_task(task: Row) -> str:
+    # эмуляция выполнения задачи
+    await asyncio.sleep(2)
+    return "Задача успешно выполнена"
@@ -0,0 +1,60 @@
+from typing import Awaitable, Callable
+
+from sqlalchemy import Row
+
+from core.config import settings
+
+TaskHandlerFunc = Callable[[Row], Awaitable[str]]
+
+
+class TaskHandler:
+    def __init__(self, task_type: str, func: TaskHandlerFunc, concurrency: int, prefetch_count: int) -> None:
+        self.task_type = task_type
+        self.func = func
+        self.concurrency = concurrency
+        self.prefetch_count = prefetch_count
+
+
+class TaskHandlerRegistry:
+    """Обработчики задач по типам. У каждого типа своя очередь, лимит одновременных задач и prefetch."""
+
+    def __init__(self) -> None:
+        self.handlers: dict[str, TaskHandler] = {}
+
+    def __contains__(self, task_type: str) -> bool:
+        return task_type in self.handlers
+
+    @property
+    def task_types(self) -> list[str]:
+        return list(self.handlers)
+
+    def register(
+        self,
+        task_type: str,
+        concurrency: int | None = None,
+        prefetch_count: int | None = None,
+    ) -> Callable[[TaskHandlerFunc], TaskHandlerFunc]:
+        """Декоратор обработчика; без лимитов используются общие настройки воркера."""
+
+        def decorator(func: TaskHandlerFunc) -> TaskHandlerFunc:
+            if task_type in self.handlers:
+                raise ValueError(f"Обработчик задач типа {task_type} уже зарегистрирован")
+            self.handlers[task_type] = TaskHandler(
+                task_type,
+                func,
+                concurrency or settings.worker.concurrency,
+                prefetch_count or settings.worker.prefetch_count,
+            )
+            return func
+
+        return decorator
+
+    def get(self, task_type: str) -> TaskHandler:
+        handler = self.handlers.get(task_type)
+        if handler is None:
+            raise ValueError(f"Неизвестный тип задачи: {task_type}")
+        return handler
+
+
+task_registry = TaskHandlerRegistry()
+task_handler = task_registry.register
@@ -0,0 +1,37 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Callable, ParamSpec, TypeVar
+
+from core.logger import logger
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+
+class CpuExecutor:
+    """Выносит CPU-ёмкие обработчики задач из event loop, чтобы не блокировать heartbeat RabbitMQ."""
+
+    def __init__(self) -> None:
+        self.executor: ProcessPoolExecutor | None = None
+
+    def start(self, max_workers: int) -> None:
+        if self.executor is None and max_workers > 0:
+            # spawn, а не fork: воркер форкался бы из работающего event loop вместе с соединениями asyncpg и aio_pika
+            context = multiprocessing.get_context("spawn")
+            self.executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=context)
+            logger.info(f"Запущен пул процессов для CPU-задач: {max_workers}")
+
+    async def run(self, func: Callable[P, T], *args: P.args, **kwargs: P.kwargs) -> T:
+        # без пула процессов выполняем в пуле потоков по умолчанию, event loop всё равно остаётся свободным
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+
+    def shutdown(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+
+
+cpu_executor = CpuExecutor()
@@ -0,0 +1,144 @@
+import os
+import time
+
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, multiprocess, start_http_server
+from sqlalchemy import event
+from sqlalchemy.engine import Connection
+from sqlalchemy.engine.interfaces import DBAPIConnection
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import ConnectionPoolEntry, PoolProxiedConnection
+from starlette.status import HTTP_500_INTERNAL_SERVER_ERROR
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.logger import logger
+
+# gunicorn и supervise запускают несколько процессов: метрики собираются через PROMETHEUS_MULTIPROC_DIR
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+# границы в секундах: от единиц миллисекунд до минут
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TASK_DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Время обработки HTTP-запроса",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+TASK_PUBLISH_DURATION = Histogram(
+    "task_publish_duration_seconds",
+    "Время публикации сообщений задач в RabbitMQ с подтверждением брокера",
+    ["kind"],
+    buckets=LATENCY_BUCKETS,
+)
+DB_CONNECTION_HOLD_DURATION = Histogram(
+    "db_connection_hold_duration_seconds",
+    "Время, на которое сессия занимает соединение из пула",
+    buckets=LATENCY_BUCKETS,
+)
+DB_QUERY_DURATION = Histogram("db_query_duration_seconds", "Время выполнения запроса к базе", buckets=LATENCY_BUCKETS)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections", "Соединения, выданные из пула", multiprocess_mode="livesum"
+)
+TASK_QUEUE_WAIT = Histogram(
+    "task_queue_wait_seconds",
+    "Время от создания задачи до начала выполнения (started_at - created_at)",
+    ["task_type"],
+    buckets=TASK_DURATION_BUCKETS,
+)
+TASK_RUN_DURATION = Histogram(
+    "task_run_duration_seconds",
+    "Время выполнения обработчика задачи",
+    ["task_type", "status"],
+    buckets=TASK_DURATION_BUCKETS,
+)
+TASKS_IN_FLIGHT = Gauge(
+    "tasks_in_flight", "Задачи, выполняемые воркером", ["task_type"], multiprocess_mode="livesum"
+)
+TASK_FAILURES = Counter("task_failures_total", "Ошибки обработчиков задач", ["task_type"])
+TASK_MESSAGES_ACKED = Counter("task_messages_acked_total", "Подтверждённые сообщения задач")
+TASK_MESSAGES_NACKED = Counter("task_messages_nacked_total", "Отклонённые сообщения задач")
+
+
+class RequestDurationMiddleware:
+    """
+    Чистый ASGI-middleware длительности HTTP-запросов: без BaseHTTPMiddleware и его промежуточного потока ответа.
+    Статус берётся из http.response.start; запрос, упавший до начала ответа, учитывается как 500.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = HTTP_500_INTERNAL_SERVER_ERROR
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # шаблон пути вместо самого пути, чтобы id задач не раздували число временных рядов;
+            # route появляется в scope после маршрутизации
+            route = scope.get("route")
+            route_path = route.path if route else "unmatched"
+            HTTP_REQUEST_DURATION.labels(scope["method"], route_path, status).observe(time.perf_counter() - started)
+
+
+def get_metrics_registry() -> CollectorRegistry:
+    if MULTIPROC_DIR_ENV not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def start_metrics_server(port: int) -> None:
+    if port <= 0:
+        return
+    start_http_server(port, registry=get_metrics_registry())
+    logger.info(f"Метрики Prometheus доступны на порту {port}")
+
+
+def mark_process_dead(pid: int) -> None:
+    """Убирает gauge завершившегося процесса из суммы (только в многопроцессном режиме)."""
+    if MULTIPROC_DIR_ENV in os.environ:
+        multiprocess.mark_process_dead(pid)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Время запросов и удержания соединений, число выданных соединений - через события пула и движка."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine.pool, "checkout")
+    def on_checkout(
+        dbapi_connection: DBAPIConnection,
+        connection_record: ConnectionPoolEntry,
+        connection_proxy: PoolProxiedConnection,
+    ) -> None:
+        connection_record.info["checkout_at"] = time.perf_counter()
+        DB_POOL_CHECKED_OUT.inc()
+
+    @event.listens_for(sync_engine.pool, "checkin")
+    def on_checkin(dbapi_connection: DBAPIConnection | None, connection_record: ConnectionPoolEntry) -> None:
+        checkout_at = connection_record.info.pop("checkout_at", None)
+        if checkout_at is None:
+            return
+        DB_POOL_CHECKED_OUT.dec()
+        DB_CONNECTION_HOLD_DURATION.observe(time.perf_counter() - checkout_at)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def on_before_execute(connection: Connection, *args: object) -> None:
+        connection.info["query_started_at"] = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def on_after_execute(connection: Connection, *args: object) -> None:
+        DB_QUERY_DURATION.observe(time.perf_counter() - connection.info["query_started_at"])
@@ -0,0 +1,87 @@
+import asyncio
+from typing import Callable
+
+import asyncpg
+from pydantic import ValidationError
+from sqlalchemy import make_url
+
+from core.config import settings
+from core.consts import TASK_EVENTS_CHANNEL
+from core.logger import logger
+from schemas.task import TaskStatusResponse
+
+TaskEventCallback = Callable[[TaskStatusResponse], None]
+
+
+class TaskEventListener:
+    """Одно LISTEN-соединение на процесс, раздающее события смены статуса задач подписчикам."""
+
+    def __init__(self, channel: str = TASK_EVENTS_CHANNEL) -> None:
+        self.channel = channel
+        self.connection: asyncpg.Connection | None = None
+        self.listen_task: asyncio.Task | None = None
+        self.callbacks: list[TaskEventCallback] = []
+        self.reset_callbacks: list[Callable[[], None]] = []
+
+    @property
+    def is_connected(self) -> bool:
+        return self.connection is not None and not self.connection.is_closed()
+
+    def subscribe(self, callback: TaskEventCallback) -> None:
+        self.callbacks.append(callback)
+
+    def subscribe_reset(self, callback: Callable[[], None]) -> None:
+        # вызывается при потере соединения: события за это время могли быть пропущены
+        self.reset_callbacks.append(callback)
+
+    def start(self) -> None:
+        if self.listen_task is None:
+            self.listen_task = asyncio.create_task(self.listen())
+
+    async def stop(self) -> None:
+        if self.listen_task is not None:
+            self.listen_task.cancel()
+            await asyncio.gather(self.listen_task, return_exceptions=True)
+            self.listen_task = None
+        if self.is_connected:
+            await self.connection.close()
+        self.connection = None
+
+    async def listen(self) -> None:
+        dsn = make_url(settings.db.url).set(drivername="postgresql").render_as_string(hide_password=False)
+        while True:
+            try:
+                self.connection = await asyncpg.connect(dsn)
+                closed = asyncio.Event()
+                self.connection.add_termination_listener(lambda connection: closed.set())
+                await self.connection.add_listener(self.channel, self.on_notify)
+                logger.info("Подписка на события задач установлена")
+                await closed.wait()
+                logger.warning("Соединение для событий задач потеряно")
+            except (OSError, asyncpg.PostgresError) as e:
+                logger.warning(f"Не удалось подписаться на события задач: {e}")
+            except Exception:
+                # любая другая ошибка драйвера не должна навсегда остановить подписку: кэш отдавал бы устаревшие
+                # записи, а ожидающие события запросы не просыпались бы. CancelledError при остановке не перехватывается
+                logger.exception("Ошибка подписки на события задач")
+            if self.connection is not None and not self.connection.is_closed():
+                self.connection.terminate()
+            self.connection = None
+            self.reset()
+            await asyncio.sleep(settings.cache.reconnect_delay)
+
+    def on_notify(self, connection: asyncpg.Connection, pid: int, channel: str, payload: str) -> None:
+        try:
+            event = TaskStatusResponse.model_validate_json(payload)
+        except ValidationError:
+            logger.warning(f"Некорректное событие задачи: {payload}")
+            return
+        for callback in self.callbacks:
+            callback(event)
+
+    def reset(self) -> None:
+        for callback in self.reset_callbacks:
+            callback()
+
+
+task_event_listener = TaskEventListener()
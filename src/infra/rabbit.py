@@ -1,18 +1,92 @@
-from typing import Annotated
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Iterable
 
 import aio_pika
-from aio_pika.abc import AbstractChannel, AbstractConnection
+from aio_pika.abc import AbstractChannel, AbstractConnection, AbstractQueue
 from aio_pika.exceptions import AMQPException
-from fastapi import Depends
 
 from core.config import settings
-from core.consts import TASKS_QUEUE
+from core.consts import DEFAULT_TASK_TYPE, TASKS_DEAD_LETTER_QUEUE, TASKS_QUEUE_MAX_PRIORITY
 from core.logger import logger
+from utils.queues import get_retry_queue, get_task_queue
+
+
+async def declare_task_queues(channel: AbstractChannel, task_type: str = DEFAULT_TASK_TYPE) -> AbstractQueue:
+    queue_name = get_task_queue(task_type)
+    tasks_queue = await channel.declare_queue(
+        queue_name,
+        durable=True,
+        arguments={"x-max-priority": TASKS_QUEUE_MAX_PRIORITY},
+    )
+    # очереди отложенных повторов: по истечении TTL сообщение возвращается в очередь своего типа
+    for delay in settings.retry.delays:
+        await channel.declare_queue(
+            get_retry_queue(task_type, delay),
+            durable=True,
+            arguments={
+                "x-message-ttl": delay,
+                "x-dead-letter-exchange": "",
+                "x-dead-letter-routing-key": queue_name,
+            },
+        )
+    await channel.declare_queue(TASKS_DEAD_LETTER_QUEUE, durable=True)
+    return tasks_queue
+
+
+class ChannelPool:
+    """Ограниченный пул долгоживущих каналов с подтверждениями публикации."""
+
+    def __init__(self, rabbit_connection: "RabbitMQConnection", max_size: int) -> None:
+        self.rabbit_connection = rabbit_connection
+        self.max_size = max_size
+        self.created = 0
+        self.channels: asyncio.Queue[AbstractChannel] = asyncio.Queue()
+
+    async def acquire(self) -> AbstractChannel:
+        while True:
+            if self.channels.empty() and self.created < self.max_size:
+                self.created += 1
+                try:
+                    return await self.rabbit_connection.open_channel()
+                except BaseException:
+                    self.created -= 1
+                    raise
+
+            channel = await self.channels.get()
+            if not channel.is_closed:
+                return channel
+            # канал закрыт брокером или после переподключения - выбрасываем его и создаём новый
+            self.created -= 1
+
+    def release(self, channel: AbstractChannel) -> None:
+        if channel.is_closed:
+            self.created -= 1
+            return
+        self.channels.put_nowait(channel)
+
+    @asynccontextmanager
+    async def channel(self) -> AsyncIterator[AbstractChannel]:
+        channel = await self.acquire()
+        try:
+            yield channel
+        finally:
+            self.release(channel)
+
+    async def close(self) -> None:
+        # закрываются только свободные каналы; выданные учтены в created и будут выброшены при возврате,
+        # так как после закрытия соединения они тоже закрыты
+        while not self.channels.empty():
+            channel = self.channels.get_nowait()
+            self.created -= 1
+            if not channel.is_closed:
+                await channel.close()
 
 
 class RabbitMQConnection:
     def __init__(self) -> None:
         self.connection = None
+        self.channel_pool = ChannelPool(self, settings.rabbit.channel_pool_size)
 
     async def connect(self) -> AbstractConnection | None:
         if not self.connection or self.connection.is_closed:
@@ -23,10 +97,13 @@ class RabbitMQConnection:
             )
         return self.connection
 
+    async def open_channel(self) -> AbstractChannel:
+        connection = await self.connect()
+        return await connection.channel(publisher_confirms=True)
+
     async def get_channel(self) -> AbstractChannel | None:
         try:
-            connection = await self.connect()
-            return await connection.channel()
+            return await self.open_channel()
         except AMQPException as e:
             logger.warning(f"Ошибка подключения к RabbitMQ: {e}")
             return None
@@ -35,29 +112,17 @@ class RabbitMQConnection:
             return None
 
     async def close(self) -> None:
+        await self.channel_pool.close()
         if self.connection:
-            self.connection.close()
+            await self.connection.close()
 
-    async def declare_queues(self) -> None:
+    async def declare_queues(self, task_types: Iterable[str] = (DEFAULT_TASK_TYPE,)) -> None:
+        # сообщения в необъявленную очередь молча отбрасываются брокером, поэтому объявляем очереди всех типов
         channel = await self.get_channel()
         if channel:
-            await channel.declare_queue(
-                TASKS_QUEUE,
-                durable=True,
-                arguments={"x-max-priority": 10},
-            )
+            for task_type in task_types:
+                await declare_task_queues(channel, task_type)
+            await channel.close()
 
 
 rabbitmq = RabbitMQConnection()
-
-
-async def get_rabbitmq_channel() -> AbstractChannel | None:
-    channel = await rabbitmq.get_channel()
-    if channel:
-        async with await rabbitmq.get_channel() as channel:
-            yield channel
-    else:
-        yield None
-
-
-RabbitDep = Annotated[AbstractChannel, Depends(get_rabbitmq_channel)]
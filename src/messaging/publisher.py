@@ -1,26 +1,59 @@
+import asyncio
 import json
 
 from aio_pika import Message
 from aio_pika.abc import AbstractChannel
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Row
 
-from core.consts import PRIORITY_MAP, TASKS_QUEUE
+from core.config import settings
+from core.consts import PRIORITY_MAP, TASKS_DEAD_LETTER_QUEUE
 from core.logger import logger
-from schemas.task import TaskOut
-from services.task import TaskService
-from utils.enums import TaskStatusEnum
+from infra.metrics import TASK_PUBLISH_DURATION
+from models import TaskOutboxModel
+from utils.queues import get_retry_queue
 
 
 class TaskPublisher:
     @staticmethod
-    async def publish_task_message(data: TaskOut, session: AsyncSession, rabbit_channel: AbstractChannel) -> None:
-        if not rabbit_channel:
-            logger.warning("Не удалось получить канал RabbitMQ для отправки задачи.")
-            return
-        body = {"task_id": str(data.id)}
-        json_body = json.dumps(body)
-        await rabbit_channel.default_exchange.publish(
-            Message(body=json_body.encode(), priority=PRIORITY_MAP[data.priority]),
-            routing_key=TASKS_QUEUE,
-        )
-        await TaskService.update_task_status(data.id, session, TaskStatusEnum.PENDING)
+    async def publish_outbox_entries(
+        entries: list[TaskOutboxModel], rabbit_channel: AbstractChannel
+    ) -> list[TaskOutboxModel]:
+        # публикуем все сообщения в одном канале и ждём подтверждения брокера разом
+        with TASK_PUBLISH_DURATION.labels("outbox").time():
+            results = await asyncio.gather(
+                *(
+                    rabbit_channel.default_exchange.publish(
+                        Message(body=json.dumps({"task_id": str(entry.task_id)}).encode(), priority=entry.priority),
+                        routing_key=entry.routing_key,
+                    )
+                    for entry in entries
+                ),
+                return_exceptions=True,
+            )
+        published = [entry for entry, result in zip(entries, results) if not isinstance(result, BaseException)]
+        if len(published) < len(entries):
+            logger.warning(f"Не удалось отправить {len(entries) - len(published)} из {len(entries)} задач в RabbitMQ")
+        return published
+
+    @staticmethod
+    def get_retry_delay(attempts: int) -> int:
+        delays = settings.retry.delays
+        return delays[min(attempts, len(delays)) - 1]
+
+    @staticmethod
+    async def publish_retry(task: Row, rabbit_channel: AbstractChannel) -> None:
+        delay = TaskPublisher.get_retry_delay(task.attempts)
+        with TASK_PUBLISH_DURATION.labels("retry").time():
+            await rabbit_channel.default_exchange.publish(
+                Message(body=json.dumps({"task_id": str(task.id)}).encode(), priority=PRIORITY_MAP[task.priority]),
+                routing_key=get_retry_queue(task.task_type, delay),
+            )
+        logger.info(f"Задача {task.id} будет повторена через {delay} мс, попытка {task.attempts}/{task.max_attempts}")
+
+    @staticmethod
+    async def publish_dead_letter(task: Row, error: str, rabbit_channel: AbstractChannel) -> None:
+        body = {"task_id": str(task.id), "task_type": task.task_type, "attempts": task.attempts, "error": error}
+        with TASK_PUBLISH_DURATION.labels("dead_letter").time():
+            await rabbit_channel.default_exchange.publish(
+                Message(body=json.dumps(body).encode()), routing_key=TASKS_DEAD_LETTER_QUEUE
+            )
@@ -1 +1,7 @@
+from .idempotency import TaskIdempotencyKeyModel as TaskIdempotencyKeyModel
+from .outbox import TaskOutboxModel as TaskOutboxModel
+from .partition import task_partition_retirements as task_partition_retirements
+from .result import TaskResultModel as TaskResultModel
+from .stats import task_duration_stats as task_duration_stats
+from .stats import task_status_counters as task_status_counters
 from .task import TaskModel as TaskModel
@@ -0,0 +1,18 @@
+from sqlalchemy import String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from core.consts import IDEMPOTENCY_KEY_MAX_LENGTH
+
+from .base import Base
+
+
+class TaskIdempotencyKeyModel(Base):
+    """
+    Ключи идемпотентности создания задач: id и created_at совпадают с задачей.
+    Отдельная таблица, потому что уникальный индекс секционированной tasks обязан включать created_at.
+    """
+
+    __tablename__ = "task_idempotency_keys"
+    key: Mapped[str] = mapped_column(String(IDEMPOTENCY_KEY_MAX_LENGTH), unique=True)
+    # sha256 параметров задачи: повтор с тем же ключом, но другими параметрами - ошибка клиента
+    request_hash: Mapped[str] = mapped_column(String(64))
@@ -0,0 +1,17 @@
+from pydantic import UUID4
+from sqlalchemy import Index
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from core.consts import TASKS_QUEUE
+
+from .base import Base
+
+
+class TaskOutboxModel(Base):
+    __tablename__ = "task_outbox"
+    __table_args__ = (Index("ix_task_outbox_created_at", "created_at"),)
+    # без внешнего ключа: секционированная tasks не имеет уникального ключа только по id
+    task_id: Mapped[UUID4] = mapped_column(UUID(as_uuid=True))
+    priority: Mapped[int] = mapped_column()
+    routing_key: Mapped[str] = mapped_column(default=TASKS_QUEUE)
@@ -0,0 +1,14 @@
+from sqlalchemy import TIMESTAMP, Boolean, Column, String, Table, false, func
+
+from .base import Base
+
+# секции tasks, удаление которых начато: запись создаётся до DETACH и удаляется, когда очистка завершена.
+# Отсоединённая секция пропадает из pg_inherits, и только по этой записи следующий запуск partitions.py её найдёт
+task_partition_retirements = Table(
+    "task_partition_retirements",
+    Base.metadata,
+    Column("name", String, primary_key=True),
+    # статистика и ключи идемпотентности секции уже очищены, осталось удалить результаты и саму секцию
+    Column("cleaned", Boolean, nullable=False, server_default=false()),
+    Column("created_at", TIMESTAMP(timezone=True), nullable=False, server_default=func.now()),
+)
@@ -0,0 +1,14 @@
+from sqlalchemy import LargeBinary
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class TaskResultModel(Base):
+    """
+    Сжатые gzip результаты задач, вынесенные из таблицы tasks. id совпадает с id задачи.
+    Внешнего ключа на секционированную tasks нет, результаты удаляются вместе с секцией в partitions.py.
+    """
+
+    __tablename__ = "task_results"
+    payload: Mapped[bytes] = mapped_column(LargeBinary)
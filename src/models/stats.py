@@ -0,0 +1,123 @@
+from sqlalchemy import DDL, TIMESTAMP, BigInteger, Column, Enum, Integer, String, Table, event
+
+from core.consts import DURATION_BUCKETS_PER_OCTAVE, TASK_STATS_SHARDS
+from utils.enums import TaskPriorityEnum, TaskStatusEnum
+
+from .base import Base
+
+# счётчики задач по статусу и приоритету; shard разносит параллельные обновления по разным строкам
+task_status_counters = Table(
+    "task_status_counters",
+    Base.metadata,
+    Column("status", Enum(TaskStatusEnum, name="task_status"), primary_key=True),
+    Column("priority", Enum(TaskPriorityEnum, name="task_priority"), primary_key=True),
+    Column("shard", Integer, primary_key=True),
+    Column("count", BigInteger, nullable=False),
+)
+
+# поминутные гистограммы ожидания в очереди (wait) и выполнения (run) в логарифмических корзинах
+task_duration_stats = Table(
+    "task_duration_stats",
+    Base.metadata,
+    Column("minute", TIMESTAMP(timezone=True), primary_key=True),
+    Column("kind", String, primary_key=True),
+    Column("bucket", Integer, primary_key=True),
+    Column("shard", Integer, primary_key=True),
+    Column("count", BigInteger, nullable=False),
+)
+
+COUNTERS_UPSERT = """
+    ON CONFLICT (status, priority, shard) DO UPDATE SET count = task_status_counters.count + excluded.count
+"""
+
+# счётчики обновляются statement-триггерами: одна вставка на запрос, а не на строку,
+# и все пишущие в tasks компоненты (API, релей, воркер, sweeper) учитываются без изменений в их коде
+TASK_STATS_DDL = (
+    f"""
+    CREATE OR REPLACE FUNCTION task_duration_bucket(duration interval) RETURNS integer
+    LANGUAGE sql IMMUTABLE AS $$
+        SELECT floor(
+            log(2, greatest(extract(epoch FROM duration) * 1000, 1)::numeric) * {DURATION_BUCKETS_PER_OCTAVE}
+        )::integer
+    $$
+    """,
+    f"""
+    CREATE OR REPLACE FUNCTION task_stats_on_insert() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        INSERT INTO task_status_counters (status, priority, shard, count)
+        SELECT status, priority, floor(random() * {TASK_STATS_SHARDS}), count(*)
+        FROM new_tasks GROUP BY status, priority
+        {COUNTERS_UPSERT};
+        RETURN NULL;
+    END $$
+    """,
+    f"""
+    CREATE OR REPLACE FUNCTION task_stats_on_update() RETURNS trigger LANGUAGE plpgsql AS $$
+    DECLARE
+        stats_shard integer := floor(random() * {TASK_STATS_SHARDS});
+    BEGIN
+        INSERT INTO task_status_counters (status, priority, shard, count)
+        SELECT status, priority, stats_shard, sum(delta)
+        FROM (
+            SELECT status, priority, 1 AS delta FROM new_tasks
+            UNION ALL
+            SELECT status, priority, -1 AS delta FROM old_tasks
+        ) AS changes
+        GROUP BY status, priority
+        HAVING sum(delta) <> 0
+        {COUNTERS_UPSERT};
+
+        INSERT INTO task_duration_stats (minute, kind, bucket, shard, count)
+        SELECT date_trunc('minute', n.started_at), 'wait', task_duration_bucket(n.started_at - n.created_at),
+               stats_shard, count(*)
+        FROM new_tasks n JOIN old_tasks o ON o.id = n.id AND o.created_at = n.created_at
+        WHERE n.status = 'IN_PROGRESS' AND o.status <> 'IN_PROGRESS' AND n.started_at IS NOT NULL
+        GROUP BY 1, 3
+        UNION ALL
+        SELECT date_trunc('minute', n.completed_at), 'run', task_duration_bucket(n.completed_at - n.started_at),
+               stats_shard, count(*)
+        FROM new_tasks n JOIN old_tasks o ON o.id = n.id AND o.created_at = n.created_at
+        WHERE n.status IN ('COMPLETED', 'FAILED') AND o.status = 'IN_PROGRESS'
+            AND n.started_at IS NOT NULL AND n.completed_at IS NOT NULL
+        GROUP BY 1, 3
+        ON CONFLICT (minute, kind, bucket, shard) DO UPDATE SET count = task_duration_stats.count + excluded.count;
+        RETURN NULL;
+    END $$
+    """,
+    f"""
+    CREATE OR REPLACE FUNCTION task_stats_on_delete() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        INSERT INTO task_status_counters (status, priority, shard, count)
+        SELECT status, priority, floor(random() * {TASK_STATS_SHARDS}), -count(*)
+        FROM old_tasks GROUP BY status, priority
+        {COUNTERS_UPSERT};
+        RETURN NULL;
+    END $$
+    """,
+    """
+    CREATE TRIGGER task_stats_insert AFTER INSERT ON tasks
+    REFERENCING NEW TABLE AS new_tasks FOR EACH STATEMENT EXECUTE FUNCTION task_stats_on_insert()
+    """,
+    """
+    CREATE TRIGGER task_stats_update AFTER UPDATE ON tasks
+    REFERENCING OLD TABLE AS old_tasks NEW TABLE AS new_tasks FOR EACH STATEMENT EXECUTE FUNCTION task_stats_on_update()
+    """,
+    """
+    CREATE TRIGGER task_stats_delete AFTER DELETE ON tasks
+    REFERENCING OLD TABLE AS old_tasks FOR EACH STATEMENT EXECUTE FUNCTION task_stats_on_delete()
+    """,
+)
+
+TASK_STATS_DROP_DDL = (
+    "DROP TRIGGER IF EXISTS task_stats_delete ON tasks",
+    "DROP TRIGGER IF EXISTS task_stats_update ON tasks",
+    "DROP TRIGGER IF EXISTS task_stats_insert ON tasks",
+    "DROP FUNCTION IF EXISTS task_stats_on_delete()",
+    "DROP FUNCTION IF EXISTS task_stats_on_update()",
+    "DROP FUNCTION IF EXISTS task_stats_on_insert()",
+    "DROP FUNCTION IF EXISTS task_duration_bucket(interval)",
+)
+
+# триггеры создаются и при metadata.create_all, как в интеграционных тестах
+for statement in TASK_STATS_DDL:
+    event.listen(Base.metadata, "after_create", DDL(statement))
@@ -1,8 +1,10 @@
-from datetime import datetime
+from datetime import datetime, timezone
+from functools import partial
 
-from sqlalchemy import TIMESTAMP, Enum
+from sqlalchemy import TIMESTAMP, Enum, Index, PrimaryKeyConstraint, text
 from sqlalchemy.orm import Mapped, mapped_column
 
+from core.consts import DEFAULT_MAX_ATTEMPTS, DEFAULT_TASK_TYPE
 from utils.enums import TaskPriorityEnum, TaskStatusEnum
 
 from .base import Base
@@ -10,8 +12,36 @@ from .base import Base
 
 class TaskModel(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # ключ секционирования обязан входить в первичный ключ; id первым - для поиска задачи по id
+        PrimaryKeyConstraint("id", "created_at"),
+        Index("ix_tasks_created_at_id", "created_at", "id"),
+        Index("ix_tasks_status_priority_created_at", "status", "priority", "created_at"),
+        Index(
+            "ix_tasks_active_status_created_at",
+            "status",
+            "created_at",
+            postgresql_where=text("status IN ('NEW', 'PENDING', 'IN_PROGRESS')"),
+        ),
+        Index("ix_tasks_started_at", "started_at"),
+        Index("ix_tasks_completed_at", "completed_at"),
+        Index(
+            "ix_tasks_lease_expires_at",
+            "lease_expires_at",
+            postgresql_where=text("status IN ('PENDING', 'IN_PROGRESS')"),
+        ),
+        Index("ix_tasks_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+        # секции по created_at создаёт и удаляет partitions.py
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True),
+        primary_key=True,
+        default=partial(datetime.now, timezone.utc),
+    )
     title: Mapped[str] = mapped_column()
     description: Mapped[str] = mapped_column()
+    task_type: Mapped[str] = mapped_column(default=DEFAULT_TASK_TYPE, server_default=DEFAULT_TASK_TYPE)
     priority: Mapped[TaskPriorityEnum] = mapped_column(
         Enum(TaskPriorityEnum, name="task_priority"), default=TaskPriorityEnum.MEDIUM
     )
@@ -19,4 +49,12 @@ class TaskModel(Base):
     started_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
     completed_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
     result: Mapped[str] = mapped_column(default="")
+    # размер результата в байтах; если задан result_ref, результат хранится сжатым вне таблицы, а result пуст
+    result_size: Mapped[int] = mapped_column(default=0, server_default="0")
+    result_ref: Mapped[str] = mapped_column(nullable=True)
     error: Mapped[str] = mapped_column(default="")
+    attempts: Mapped[int] = mapped_column(default=0, server_default="0")
+    max_attempts: Mapped[int] = mapped_column(default=DEFAULT_MAX_ATTEMPTS, server_default=str(DEFAULT_MAX_ATTEMPTS))
+    # срок, до которого задача должна быть взята (PENDING) или завершена (IN_PROGRESS), иначе её подберёт sweeper
+    lease_expires_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
+    heartbeat_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
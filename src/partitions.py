@@ -0,0 +1,93 @@
+import argparse
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.exc import DBAPIError
+
+from core.config import settings
+from core.logger import logger
+from db.postgres import get_session_context
+from services.partitions import TaskPartitionService
+from services.stats import TaskStatsService
+from utils.partitions import partition_start, plan_partitions, retention_cutoff, shift_partition
+
+
+async def maintain_partitions(dry_run: bool = False) -> None:
+    """
+    Создаёт секции tasks на premake интервалов вперёд и отсоединяет или удаляет устаревшие.
+    Создание, отсоединение каждой секции и очистка статистики фиксируются отдельными транзакциями.
+    """
+    config = settings.partition
+    now = datetime.now(timezone.utc)
+    async with await get_session_context() as session:
+        partitions = await TaskPartitionService.get_partitions(session)
+        existing = {partition.name for partition in partitions}
+
+        until = shift_partition(partition_start(now, config.interval), config.interval, config.premake)
+        bounded = [partition for partition in partitions if partition.start is not None]
+        for name, start, end in plan_partitions(now, until, config.interval):
+            # после смены интервала диапазон может быть уже покрыт секцией другого размера
+            if name in existing or any(p.start < end and start < p.end for p in bounded):
+                continue
+            logger.info(f"Создание секции {name}: {start.isoformat()} - {end.isoformat()}")
+            if dry_run:
+                continue
+            try:
+                await TaskPartitionService.create_partition(name, start, end, session)
+                await session.commit()
+            except DBAPIError:
+                # до создания секции задачи её диапазона продолжают попадать в секцию по умолчанию
+                await session.rollback()
+                logger.exception(f"Не удалось создать секцию {name}, повтор при следующем запуске")
+
+        # секции, отсоединённые прошлым запуском, но не очищенные до конца: в pg_inherits их уже нет
+        for name in await TaskPartitionService.get_pending_retirements(session):
+            if name in existing:
+                continue
+            logger.info(f"Завершение очистки отсоединённой секции {name}")
+            if dry_run:
+                continue
+            try:
+                await TaskPartitionService.finish_retirement(name, config.retention_mode, session)
+            except DBAPIError:
+                await session.rollback()
+                logger.exception(f"Не удалось очистить секцию {name}, повтор при следующем запуске")
+
+        if config.retention > 0:
+            cutoff = retention_cutoff(now, config.interval, config.retention)
+            # Postgres разрешает DETACH ... CONCURRENTLY, только если у tasks нет секции по умолчанию
+            concurrently = all(partition.start is not None for partition in partitions)
+            for partition in partitions:
+                if partition.end is None or partition.end > cutoff:
+                    continue
+                logger.info(f"Секция {partition.name} устарела ({config.retention_mode.value})")
+                if dry_run:
+                    continue
+                try:
+                    await TaskPartitionService.retire_partition(
+                        partition, config.retention_mode, concurrently, session
+                    )
+                except DBAPIError:
+                    await session.rollback()
+                    logger.exception(f"Не удалось отсоединить секцию {partition.name}, повтор при следующем запуске")
+
+        stats_cutoff = now - timedelta(days=settings.stats.retention_days)
+        logger.info(f"Удаление гистограмм длительностей старше {stats_cutoff.isoformat()}")
+        if not dry_run:
+            await TaskStatsService.prune_durations(stats_cutoff, session)
+
+        for partition in partitions:
+            # строки в секции по умолчанию означают, что секции не были созданы заранее
+            if partition.start is None and await TaskPartitionService.has_rows(partition.name, session):
+                logger.warning(f"В секции {partition.name} есть задачи вне созданных секций")
+
+        await session.commit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Обслуживание секций таблицы задач")
+    parser.add_argument("--dry-run", action="store_true", help="Только показать изменения")
+    args = parser.parse_args()
+
+    logger.info("Обслуживание секций таблицы задач...")
+    asyncio.run(maintain_partitions(args.dry_run))
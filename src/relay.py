@@ -0,0 +1,69 @@
+import asyncio
+import contextlib
+import signal
+from datetime import timedelta
+
+from aio_pika.abc import AbstractChannel
+from aio_pika.exceptions import AMQPException
+
+from core.config import settings
+from core.logger import logger
+from db.postgres import get_session_context
+from handlers import task_registry
+from infra.rabbit import rabbitmq
+from messaging.publisher import TaskPublisher
+from services.outbox import OutboxService
+from services.task import TaskService
+from utils.enums import TaskStatusEnum
+
+
+async def relay_batch(rabbit_channel: AbstractChannel) -> int:
+    """Отправляет пачку сообщений из outbox и возвращает количество выбранных записей."""
+    async with await get_session_context() as session:
+        entries = await OutboxService.lock_batch(session, settings.relay.batch_size)
+        if not entries:
+            return 0
+
+        published = await TaskPublisher.publish_outbox_entries(entries, rabbit_channel)
+        # неотправленные записи остаются в outbox и будут отправлены на следующей итерации
+        await OutboxService.delete_entries([entry.id for entry in published], session)
+        await TaskService.update_tasks_status(
+            [entry.task_id for entry in published],
+            session,
+            TaskStatusEnum.PENDING,
+            from_status=TaskStatusEnum.NEW,
+            lease=timedelta(seconds=settings.sweeper.pending_timeout),
+        )
+        await session.commit()
+        logger.info(f"Отправлено задач из outbox: {len(published)}")
+        return len(entries)
+
+
+async def relay() -> None:
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    await rabbitmq.declare_queues(task_registry.task_types)
+    while not stop_event.is_set():
+        selected = 0
+        try:
+            async with rabbitmq.channel_pool.channel() as rabbit_channel:
+                selected = await relay_batch(rabbit_channel)
+        except (AMQPException, OSError) as e:
+            logger.warning(f"RabbitMQ недоступен: {e}")
+        except Exception:
+            logger.exception("Ошибка отправки задач из outbox")
+
+        # полная пачка означает, что в outbox есть ещё записи - продолжаем без паузы
+        if selected < settings.relay.batch_size:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(stop_event.wait(), settings.relay.poll_interval)
+
+    await rabbitmq.close()
+
+
+if __name__ == "__main__":
+    logger.info("Запуск релея outbox сервиса задач...")
+    asyncio.run(relay())
@@ -1,8 +1,18 @@
-from datetime import datetime
+from datetime import datetime, timezone
+from functools import partial
+from uuid import UUID
 
 from fastapi import Depends
-from pydantic import UUID4, BaseModel
+from pydantic import BaseModel, Field, field_validator
 
+from core.consts import (
+    DEFAULT_MAX_ATTEMPTS,
+    DEFAULT_TASK_TYPE,
+    MAX_ATTEMPTS_LIMIT,
+    TASK_TYPE_MAX_LENGTH,
+    TASK_TYPE_PATTERN,
+)
+from handlers import task_registry
 from models import TaskModel
 from schemas.base import PaginationParams
 from utils.enums import TaskPriorityEnum, TaskStatusEnum
@@ -12,24 +22,40 @@ class TaskIn(BaseModel):
     title: str
     description: str = ""
     priority: TaskPriorityEnum = TaskPriorityEnum.MEDIUM
+    task_type: str = Field(DEFAULT_TASK_TYPE, max_length=TASK_TYPE_MAX_LENGTH, pattern=TASK_TYPE_PATTERN)
+    max_attempts: int = Field(DEFAULT_MAX_ATTEMPTS, ge=1, le=MAX_ATTEMPTS_LIMIT)
+
+    @field_validator("task_type")
+    @classmethod
+    def check_task_type(cls, value: str) -> str:
+        if value not in task_registry:
+            raise ValueError(f"Неизвестный тип задачи: {value}")
+        return value
 
 
 class TaskOut(BaseModel):
-    id: UUID4
+    id: UUID
     title: str
     description: str = ""
     priority: TaskPriorityEnum
+    task_type: str = DEFAULT_TASK_TYPE
     status: TaskStatusEnum
     started_at: datetime | None = None
     completed_at: datetime | None = None
     result: str = ""
+    result_size: int = 0
     error: str = ""
+    attempts: int = 0
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS
 
 
 class TaskListParams(BaseModel):
     title: str | None = None
     priority: TaskPriorityEnum | None = None
+    task_type: str | None = None
     status: TaskStatusEnum | None = None
+    created_after: datetime | None = None
+    created_before: datetime | None = None
     started_after: datetime | None = None
     started_before: datetime | None = None
     completed_after: datetime | None = None
@@ -43,8 +69,15 @@ class TaskListParams(BaseModel):
             filters.append(TaskModel.title.ilike(f"%{self.title}%"))
         if self.priority:
             filters.append(TaskModel.priority == self.priority)
+        if self.task_type:
+            filters.append(TaskModel.task_type == self.task_type)
         if self.status:
             filters.append(TaskModel.status == self.status)
+        # фильтр по created_at позволяет планировщику читать только нужные секции
+        if self.created_after:
+            filters.append(TaskModel.created_at >= self.created_after)
+        if self.created_before:
+            filters.append(TaskModel.created_at <= self.created_before)
         if self.started_after:
             filters.append(TaskModel.started_at >= self.started_after)
         if self.started_before:
@@ -57,11 +90,48 @@ class TaskListParams(BaseModel):
         return filters
 
 
+class TaskResult(BaseModel):
+    id: UUID
+    status: TaskStatusEnum
+    result: str = ""
+    result_size: int = 0
+    result_ref: str | None = None
+    error: str = ""
+    completed_at: datetime | None = Field(default_factory=partial(datetime.now, timezone.utc))
+
+
 class TaskStatusResponse(BaseModel):
-    id: UUID4
+    id: UUID
     status: TaskStatusEnum
 
 
 class TaskCancelResponse(BaseModel):
-    id: UUID4
+    id: UUID
     new_status: TaskStatusEnum
+
+
+class TaskStatusCount(BaseModel):
+    status: TaskStatusEnum
+    priority: TaskPriorityEnum
+    count: int
+
+
+class ThroughputPoint(BaseModel):
+    minute: datetime
+    finished: int
+
+
+class DurationPercentiles(BaseModel):
+    count: int = 0
+    p50: float | None = None
+    p95: float | None = None
+    p99: float | None = None
+
+
+class TaskStatsResponse(BaseModel):
+    window: int
+    counts: list[TaskStatusCount]
+    throughput_per_minute: float
+    throughput: list[ThroughputPoint]
+    wait: DurationPercentiles
+    run: DurationPercentiles
@@ -0,0 +1,26 @@
+from pydantic import UUID4
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import TaskOutboxModel
+
+
+class OutboxService:
+    @staticmethod
+    async def lock_batch(session: AsyncSession, batch_size: int) -> list[TaskOutboxModel]:
+        # SKIP LOCKED позволяет запускать несколько релеев без двойной отправки
+        stmt = (
+            select(TaskOutboxModel)
+            .order_by(TaskOutboxModel.created_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        result = await session.execute(stmt)
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def delete_entries(entry_ids: list[UUID4], session: AsyncSession) -> None:
+        if not entry_ids:
+            return
+        stmt = delete(TaskOutboxModel).where(TaskOutboxModel.id.in_(entry_ids))
+        await session.execute(stmt, execution_options={"synchronize_session": False})
@@ -0,0 +1,173 @@
+import re
+from datetime import datetime
+
+from sqlalchemy import delete, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.logger import logger
+from models import task_partition_retirements
+from services.result_store import result_store
+from services.stats import TaskStatsService
+from utils.enums import RetentionModeEnum
+
+# FOR VALUES FROM ('2026-10-01 00:00:00+00') TO ('2026-11-01 00:00:00+00')
+PARTITION_BOUND_RE = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+PARTITIONS_SQL = text(
+    """
+    SELECT child.relname AS name, pg_get_expr(child.relpartbound, child.oid) AS bound,
+        pg_inherits.inhdetachpending AS detach_pending
+    FROM pg_inherits
+    JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+    WHERE parent.relname = 'tasks'
+    """
+)
+
+
+# секция по умолчанию получает задачи вне созданных секций; NULL - её нет
+DEFAULT_PARTITION_SQL = text(
+    "SELECT NULLIF(partdefid, 0)::regclass::text FROM pg_partitioned_table WHERE partrelid = 'tasks'::regclass"
+)
+
+
+class TaskPartition:
+    def __init__(
+        self, name: str, start: datetime | None, end: datetime | None, detach_pending: bool = False
+    ) -> None:
+        self.name = name
+        # у секции по умолчанию границ нет
+        self.start = start
+        self.end = end
+        # DETACH ... CONCURRENTLY был прерван, секцию нужно отсоединить через FINALIZE
+        self.detach_pending = detach_pending
+
+
+class TaskPartitionService:
+    @staticmethod
+    async def get_partitions(session: AsyncSession) -> list[TaskPartition]:
+        result = await session.execute(PARTITIONS_SQL)
+        partitions = []
+        for row in result.all():
+            match = PARTITION_BOUND_RE.search(row.bound)
+            if match:
+                start, end = (datetime.fromisoformat(value) for value in match.groups())
+                partitions.append(TaskPartition(row.name, start, end, row.detach_pending))
+            else:
+                partitions.append(TaskPartition(row.name, None, None, row.detach_pending))
+        return partitions
+
+    @staticmethod
+    async def create_partition(name: str, start: datetime, end: datetime, session: AsyncSession) -> None:
+        """
+        Создаёт секцию [start, end). Postgres не создаёт секцию, если задачи её диапазона уже лежат в секции по
+        умолчанию: тогда секция по умолчанию отсоединяется, задачи переносятся в новую секцию, и она присоединяется
+        обратно. Перенос держит ACCESS EXCLUSIVE на tasks до коммита.
+        """
+        bound = f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        in_range = f"created_at >= '{start.isoformat()}' AND created_at < '{end.isoformat()}'"
+        default = (await session.execute(DEFAULT_PARTITION_SQL)).scalar_one_or_none()
+        if default is None or not await TaskPartitionService.has_rows(default, session, in_range):
+            await session.execute(text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF tasks {bound}"))
+            return
+
+        logger.warning(f"Перенос задач из {default} в новую секцию {name}")
+        await session.execute(text(f"SET LOCAL lock_timeout = {settings.partition.lock_timeout}"))
+        await session.execute(text(f"ALTER TABLE tasks DETACH PARTITION {default}"))
+        await session.execute(text(f"CREATE TABLE {name} PARTITION OF tasks {bound}"))
+        # запись в секции напрямую не вызывает statement-триггеры tasks, счётчики статистики не меняются
+        await session.execute(
+            text(
+                f"WITH moved AS (DELETE FROM {default} WHERE {in_range} RETURNING *) "
+                f"INSERT INTO {name} SELECT * FROM moved"
+            )
+        )
+        await session.execute(text(f"ALTER TABLE tasks ATTACH PARTITION {default} DEFAULT"))
+
+    @staticmethod
+    async def detach_partition(partition: TaskPartition, concurrently: bool, session: AsyncSession) -> None:
+        """
+        Отсоединяет секцию от tasks отдельной транзакцией. CONCURRENTLY не блокирует чтение и запись tasks, но
+        выполняется вне транзакции и недоступен, пока у tasks есть секция по умолчанию. Обычный DETACH берёт
+        ACCESS EXCLUSIVE на tasks, ждёт его не дольше lock_timeout и сразу фиксируется.
+        """
+        if partition.detach_pending:
+            statement = f"ALTER TABLE tasks DETACH PARTITION {partition.name} FINALIZE"
+        elif concurrently:
+            statement = f"ALTER TABLE tasks DETACH PARTITION {partition.name} CONCURRENTLY"
+        else:
+            statement = f"ALTER TABLE tasks DETACH PARTITION {partition.name}"
+
+        if partition.detach_pending or concurrently:
+            # CONCURRENTLY запрещён внутри транзакции, а изоляцию уже начатой транзакции сессии не поменять:
+            # транзакция сессии закрывается, DETACH выполняется в отдельном соединении в режиме autocommit
+            await session.commit()
+            async with session.bind.connect() as connection:
+                autocommit = await connection.execution_options(isolation_level="AUTOCOMMIT")
+                await autocommit.execute(text(statement))
+            return
+        await session.execute(text(f"SET LOCAL lock_timeout = {settings.partition.lock_timeout}"))
+        await session.execute(text(statement))
+        await session.commit()
+
+    @staticmethod
+    async def retire_partition(
+        partition: TaskPartition, mode: RetentionModeEnum, concurrently: bool, session: AsyncSession
+    ) -> None:
+        """
+        Отсоединяет секцию от tasks и удаляет ключи идемпотентности её задач;
+        в режиме drop удаляет секцию вместе с вынесенными результатами задач.
+        Каждый шаг фиксируется отдельно: блокировка tasks держится только на время DETACH.
+        """
+        # запись фиксируется до DETACH: прерванную очистку отсоединённой секции продолжит следующий запуск
+        await session.execute(
+            pg_insert(task_partition_retirements).values(name=partition.name).on_conflict_do_nothing()
+        )
+        await session.commit()
+        await TaskPartitionService.detach_partition(partition, concurrently, session)
+        await TaskPartitionService.finish_retirement(partition.name, mode, session)
+
+    @staticmethod
+    async def get_pending_retirements(session: AsyncSession) -> list[str]:
+        result = await session.execute(
+            select(task_partition_retirements.c.name).order_by(task_partition_retirements.c.name)
+        )
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def finish_retirement(name: str, mode: RetentionModeEnum, session: AsyncSession) -> None:
+        """Очищает отсоединённую секцию. После сбоя на любом шаге повторный вызов продолжает с того же места."""
+        retirement = task_partition_retirements.c.name == name
+        if (await session.execute(text("SELECT to_regclass(:name)"), {"name": name})).scalar_one() is None:
+            logger.warning(f"Секция {name} уже удалена, очистка пропущена")
+            await session.execute(delete(task_partition_retirements).where(retirement))
+            await session.commit()
+            return
+
+        stmt = select(task_partition_retirements.c.cleaned).where(retirement).with_for_update()
+        if not (await session.execute(stmt)).scalar_one():
+            # строки отсоединённой секции уже не меняются через tasks, поэтому вычитаются ровно те задачи, что учтены;
+            # вычитание и отметка о нём фиксируются вместе и не повторяются
+            await TaskStatsService.forget_partition(name, session)
+            # ключи идемпотентности ссылаются на задачи секции, после её отсоединения они бесполезны
+            await session.execute(text(f"DELETE FROM task_idempotency_keys k USING {name} t WHERE k.id = t.id"))
+            await session.execute(update(task_partition_retirements).where(retirement).values(cleaned=True))
+            await session.commit()
+
+        if mode == RetentionModeEnum.DROP:
+            result = await session.execute(text(f"SELECT id, result_ref FROM {name} WHERE result_ref IS NOT NULL"))
+            refs = {row.id: row.result_ref for row in result.all()}
+            if refs:
+                await result_store.delete(refs, session)
+                await session.commit()
+            # отсоединённая таблица ни с чем не связана, DROP блокирует только её
+            await session.execute(text(f"DROP TABLE {name}"))
+        await session.execute(delete(task_partition_retirements).where(retirement))
+        await session.commit()
+
+    @staticmethod
+    async def has_rows(name: str, session: AsyncSession, condition: str = "true") -> bool:
+        result = await session.execute(text(f"SELECT EXISTS (SELECT 1 FROM {name} WHERE {condition})"))
+        return result.scalar_one()
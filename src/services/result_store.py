@@ -0,0 +1,133 @@
+import asyncio
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO
+
+from pydantic import UUID4
+from sqlalchemy import any_, delete, literal, select
+from sqlalchemy.dialects.postgresql import ARRAY, UUID, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import ResultStoreConfig, settings
+from core.consts import RESULT_CHUNK_SIZE
+from models import TaskResultModel
+from schemas.task import TaskResult
+from utils.compression import gzip_compress, iter_chunks
+from utils.enums import ResultStorageEnum
+
+
+class DatabaseResultStorage:
+    """Хранит сжатые результаты в отдельной таблице task_results в той же транзакции, что и статус задачи."""
+
+    async def save(self, payloads: dict[UUID4, bytes], session: AsyncSession) -> dict[UUID4, str]:
+        stmt = insert(TaskResultModel)
+        # повторная попытка перезаписывает результат предыдущей
+        stmt = stmt.on_conflict_do_update(index_elements=[TaskResultModel.id], set_={"payload": stmt.excluded.payload})
+        await session.execute(stmt, [{"id": task_id, "payload": payload} for task_id, payload in payloads.items()])
+        return {task_id: ResultStorageEnum.DATABASE.value for task_id in payloads}
+
+    async def open(self, ref: str, task_id: UUID4, session: AsyncSession) -> AsyncIterator[bytes]:
+        payload = await session.scalar(select(TaskResultModel.payload).where(TaskResultModel.id == task_id))
+        if payload is None:
+            raise FileNotFoundError(f"Результат задачи {task_id} не найден")
+        return iter_chunks(payload, RESULT_CHUNK_SIZE)
+
+    async def delete(self, refs: dict[UUID4, str], session: AsyncSession) -> None:
+        task_ids = literal(list(refs), ARRAY(UUID(as_uuid=True)))
+        await session.execute(delete(TaskResultModel).where(TaskResultModel.id == any_(task_ids)))
+
+
+class FileResultStorage:
+    """Хранит сжатые результаты файлами в локальном каталоге."""
+
+    def __init__(self, path: str) -> None:
+        self.path = Path(path)
+
+    async def save(self, payloads: dict[UUID4, bytes], session: AsyncSession) -> dict[UUID4, str]:
+        return await asyncio.to_thread(self.write_files, payloads)
+
+    def write_files(self, payloads: dict[UUID4, bytes]) -> dict[UUID4, str]:
+        refs = {}
+        for task_id, payload in payloads.items():
+            relative_path = f"{str(task_id)[:2]}/{task_id}.gz"
+            target = self.path / relative_path
+            target.parent.mkdir(parents=True, exist_ok=True)
+            # запись через временный файл: читатель не увидит недописанный результат
+            temporary = target.with_suffix(".tmp")
+            temporary.write_bytes(payload)
+            temporary.replace(target)
+            refs[task_id] = f"{ResultStorageEnum.FILESYSTEM.value}:{relative_path}"
+        return refs
+
+    async def open(self, ref: str, task_id: UUID4, session: AsyncSession) -> AsyncIterator[bytes]:
+        _, relative_path = ref.split(":", 1)
+        file = await asyncio.to_thread(open, self.path / relative_path, "rb")
+        return self.iter_file(file)
+
+    async def delete(self, refs: dict[UUID4, str], session: AsyncSession) -> None:
+        await asyncio.to_thread(self.delete_files, list(refs.values()))
+
+    def delete_files(self, refs: list[str]) -> None:
+        for ref in refs:
+            _, relative_path = ref.split(":", 1)
+            (self.path / relative_path).unlink(missing_ok=True)
+
+    async def iter_file(self, file: BinaryIO) -> AsyncIterator[bytes]:
+        try:
+            while chunk := await asyncio.to_thread(file.read, RESULT_CHUNK_SIZE):
+                yield chunk
+        finally:
+            file.close()
+
+
+class TaskResultStore:
+    """Оставляет небольшие результаты в таблице tasks, большие сжимает gzip и выносит в хранилище."""
+
+    def __init__(self, config: ResultStoreConfig) -> None:
+        self.inline_limit = config.inline_limit
+        self.compress_level = config.compress_level
+        self.storages = {
+            ResultStorageEnum.DATABASE: DatabaseResultStorage(),
+            ResultStorageEnum.FILESYSTEM: FileResultStorage(config.path),
+        }
+        self.storage = self.storages[config.storage]
+
+    async def offload(self, results: list[TaskResult], session: AsyncSession) -> list[TaskResult]:
+        encoded = {item.id: item.result.encode() for item in results if item.result}
+        large = {task_id: data for task_id, data in encoded.items() if len(data) > self.inline_limit}
+        refs = {}
+        if large:
+            # zlib отпускает GIL, сжатие в потоке не блокирует цикл событий
+            compressed = await asyncio.to_thread(self.compress, large)
+            refs = await self.storage.save(compressed, session)
+
+        offloaded = []
+        for item in results:
+            update = {"result_size": len(encoded.get(item.id, b""))}
+            if item.id in refs:
+                update.update(result="", result_ref=refs[item.id])
+            offloaded.append(item.model_copy(update=update))
+        return offloaded
+
+    def compress(self, payloads: dict[UUID4, bytes]) -> dict[UUID4, bytes]:
+        return {task_id: gzip_compress(data, self.compress_level) for task_id, data in payloads.items()}
+
+    async def open_compressed(self, ref: str, task_id: UUID4, session: AsyncSession) -> AsyncIterator[bytes]:
+        """Возвращает поток сжатых gzip байтов результата; все запросы к БД выполняются до возврата."""
+        return await self.get_storage(ref).open(ref, task_id, session)
+
+    async def delete(self, refs: dict[UUID4, str], session: AsyncSession) -> None:
+        """Удаляет вынесенные результаты задач по ссылкам result_ref."""
+        by_storage: dict[ResultStorageEnum, dict[UUID4, str]] = {}
+        for task_id, ref in refs.items():
+            by_storage.setdefault(self.get_storage_type(ref), {})[task_id] = ref
+        for storage_type, storage_refs in by_storage.items():
+            await self.storages[storage_type].delete(storage_refs, session)
+
+    def get_storage_type(self, ref: str) -> ResultStorageEnum:
+        return ResultStorageEnum(ref.split(":", 1)[0])
+
+    def get_storage(self, ref: str) -> DatabaseResultStorage | FileResultStorage:
+        return self.storages[self.get_storage_type(ref)]
+
+
+result_store = TaskResultStore(settings.result_store)
@@ -0,0 +1,40 @@
+import asyncio
+from typing import Any, Coroutine
+
+from pydantic import UUID4
+
+from core.logger import logger
+from schemas.task import TaskResult, TaskStatusResponse
+from utils.enums import TaskStatusEnum
+
+
+class RunningTaskRegistry:
+    """Выполняющиеся в процессе задачи, которые можно прервать по сигналу отмены."""
+
+    def __init__(self) -> None:
+        self.executions: dict[UUID4, asyncio.Task] = {}
+
+    async def run(self, task_id: UUID4, execution: Coroutine[Any, Any, TaskResult]) -> TaskResult | None:
+        """Выполняет задачу и возвращает None, если она была отменена."""
+        task = asyncio.create_task(execution)
+        self.executions[task_id] = task
+        try:
+            return await task
+        except asyncio.CancelledError:
+            # остановка воркера прерывает обработчик целиком, отмена задачи - только её выполнение
+            if asyncio.current_task().cancelling():
+                raise
+            logger.info(f"Задача {task_id} отменена во время выполнения")
+            return None
+        finally:
+            self.executions.pop(task_id, None)
+
+    def cancel(self, task_ids: list[UUID4]) -> None:
+        for task_id in task_ids:
+            task = self.executions.get(task_id)
+            if task is not None:
+                task.cancel()
+
+    def on_task_event(self, event: TaskStatusResponse) -> None:
+        if event.status == TaskStatusEnum.CANCELLED:
+            self.cancel([event.id])
@@ -0,0 +1,77 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.consts import TASK_STATS_SHARDS
+from models import task_duration_stats, task_status_counters
+from models.stats import COUNTERS_UPSERT
+from schemas.task import DurationPercentiles, TaskStatsResponse, TaskStatusCount, ThroughputPoint
+from utils.enums import TaskDurationKindEnum
+from utils.stats import histogram_percentiles
+
+
+def build_percentiles(histogram: dict[int, int]) -> DurationPercentiles:
+    percentiles = histogram_percentiles(histogram)
+    return DurationPercentiles(
+        count=sum(histogram.values()), p50=percentiles[0.5], p95=percentiles[0.95], p99=percentiles[0.99]
+    )
+
+
+class TaskStatsService:
+    @staticmethod
+    async def get_stats(session: AsyncSession, window: int) -> TaskStatsResponse:
+        """
+        Собирает статистику из счётчиков, которые ведут триггеры на tasks, без сканирования самой таблицы.
+        window - число последних минут для пропускной способности и перцентилей.
+        """
+        total = func.sum(task_status_counters.c.count)
+        counts_stmt = (
+            select(task_status_counters.c.status, task_status_counters.c.priority, total.label("count"))
+            .group_by(task_status_counters.c.status, task_status_counters.c.priority)
+            .having(total != 0)
+            .order_by(task_status_counters.c.status, task_status_counters.c.priority)
+        )
+        counts = [
+            TaskStatusCount(status=row.status, priority=row.priority, count=row.count)
+            for row in (await session.execute(counts_stmt)).all()
+        ]
+
+        stats = task_duration_stats.c
+        durations_stmt = (
+            select(stats.minute, stats.kind, stats.bucket, func.sum(stats.count).label("count"))
+            .where(stats.minute >= func.date_trunc("minute", func.now()) - timedelta(minutes=window - 1))
+            .group_by(stats.minute, stats.kind, stats.bucket)
+        )
+        histograms: dict[str, dict[int, int]] = {kind: defaultdict(int) for kind in TaskDurationKindEnum}
+        finished: dict[datetime, int] = defaultdict(int)
+        for row in (await session.execute(durations_stmt)).all():
+            histograms[row.kind][row.bucket] += row.count
+            if row.kind == TaskDurationKindEnum.RUN:
+                finished[row.minute] += row.count
+
+        return TaskStatsResponse(
+            window=window,
+            counts=counts,
+            throughput_per_minute=sum(finished.values()) / window,
+            throughput=[ThroughputPoint(minute=minute, finished=count) for minute, count in sorted(finished.items())],
+            wait=build_percentiles(histograms[TaskDurationKindEnum.WAIT]),
+            run=build_percentiles(histograms[TaskDurationKindEnum.RUN]),
+        )
+
+    @staticmethod
+    async def forget_partition(name: str, session: AsyncSession) -> None:
+        """Вычитает задачи секции из счётчиков: DETACH не вызывает триггеры на удаление."""
+        await session.execute(
+            text(
+                "INSERT INTO task_status_counters (status, priority, shard, count) "
+                f"SELECT status, priority, floor(random() * {TASK_STATS_SHARDS}), -count(*) "
+                f"FROM {name} GROUP BY status, priority {COUNTERS_UPSERT}"
+            )
+        )
+
+    @staticmethod
+    async def prune_durations(before: datetime, session: AsyncSession) -> int:
+        result = await session.execute(delete(task_duration_stats).where(task_duration_stats.c.minute < before))
+        return result.rowcount
@@ -0,0 +1,98 @@
+from datetime import timedelta
+
+from pydantic import UUID4
+from sqlalchemy import Row, and_, exists, func, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.consts import PRIORITY_MAP, TASKS_DEAD_LETTER_QUEUE
+from models import TaskModel, TaskOutboxModel
+from services.task import task_ids_filter, with_status_notify
+from utils.enums import TaskStatusEnum
+from utils.queues import get_task_queue
+
+LEASE_EXPIRED_ERROR = "Истёк срок аренды задачи, попытки исчерпаны"
+
+
+class TaskSweeperService:
+    @staticmethod
+    async def lock_stuck_tasks(session: AsyncSession, batch_size: int, new_timeout: timedelta) -> list[Row]:
+        """
+        Выбирает зависшие задачи: NEW без записи в outbox, PENDING и IN_PROGRESS с истёкшей арендой.
+        SKIP LOCKED позволяет запускать несколько sweeper'ов одновременно.
+        """
+        has_outbox_entry = exists().where(TaskOutboxModel.task_id == TaskModel.id)
+        stmt = (
+            select(
+                TaskModel.id,
+                TaskModel.priority,
+                TaskModel.task_type,
+                TaskModel.status,
+                TaskModel.attempts,
+                TaskModel.max_attempts,
+            )
+            .where(
+                or_(
+                    and_(
+                        TaskModel.status.in_([TaskStatusEnum.PENDING, TaskStatusEnum.IN_PROGRESS]),
+                        TaskModel.lease_expires_at < func.now(),
+                    ),
+                    and_(
+                        TaskModel.status == TaskStatusEnum.NEW,
+                        TaskModel.created_at < func.now() - new_timeout,
+                        ~has_outbox_entry,
+                    ),
+                )
+            )
+            .limit(batch_size)
+            .with_for_update(skip_locked=True, of=TaskModel)
+        )
+        result = await session.execute(stmt)
+        return list(result.all())
+
+    @staticmethod
+    async def redispatch(tasks: list[Row], session: AsyncSession) -> tuple[list[UUID4], list[UUID4]]:
+        """
+        Возвращает задачи в NEW и ставит их в outbox. Задачи, у которых истекла аренда на последней попытке,
+        помечаются FAILED и отправляются в dead-letter очередь. Возвращает id повторно отправленных и проваленных задач.
+        """
+        exhausted = [
+            task for task in tasks if task.status == TaskStatusEnum.IN_PROGRESS and task.attempts >= task.max_attempts
+        ]
+        exhausted_ids = {task.id for task in exhausted}
+        requeued = [task for task in tasks if task.id not in exhausted_ids]
+
+        table = TaskModel.__table__
+        if requeued:
+            stmt = (
+                update(table)
+                .where(*task_ids_filter([task.id for task in requeued]))
+                .values(status=TaskStatusEnum.NEW, lease_expires_at=None)
+                .returning(table.c.id, table.c.status)
+            )
+            await session.execute(with_status_notify(stmt))
+        if exhausted:
+            stmt = (
+                update(table)
+                .where(*task_ids_filter([task.id for task in exhausted]))
+                .values(
+                    status=TaskStatusEnum.FAILED,
+                    error=LEASE_EXPIRED_ERROR,
+                    completed_at=func.now(),
+                    lease_expires_at=None,
+                )
+                .returning(table.c.id, table.c.status)
+            )
+            await session.execute(with_status_notify(stmt))
+
+        # сообщения отправит релей, так повторная отправка переживает недоступность RabbitMQ
+        outbox_entries = [
+            {
+                "task_id": task.id,
+                "priority": PRIORITY_MAP[task.priority],
+                "routing_key": get_task_queue(task.task_type),
+            }
+            for task in requeued
+        ] + [{"task_id": task.id, "priority": 0, "routing_key": TASKS_DEAD_LETTER_QUEUE} for task in exhausted]
+        if outbox_entries:
+            await session.execute(insert(TaskOutboxModel), outbox_entries)
+        return [task.id for task in requeued], [task.id for task in exhausted]
@@ -1,40 +1,273 @@
+import hashlib
+import json
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Sequence
+
 from fastapi import HTTPException
 from pydantic import UUID4
-from sqlalchemy import select
+from sqlalchemy import (
+    TIMESTAMP,
+    ColumnElement,
+    Row,
+    Select,
+    Text,
+    Update,
+    any_,
+    cast,
+    func,
+    insert,
+    literal,
+    select,
+    text,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from starlette.status import HTTP_404_NOT_FOUND
+from starlette.status import HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND, HTTP_422_UNPROCESSABLE_ENTITY
 
-from models import TaskModel
-from schemas.task import TaskIn, TaskListParams
+from core.config import settings
+from core.consts import EXPORT_PARTITION_SIZE, PRIORITY_MAP, TASK_CANCEL_CHANNEL, TASK_EVENTS_CHANNEL
+from models import TaskIdempotencyKeyModel, TaskModel, TaskOutboxModel
+from schemas.task import TaskIn, TaskListParams, TaskResult
+from services.result_store import result_store
 from utils.enums import ClientErrorMessage, TaskStatusEnum
+from utils.ids import new_task_key, uuid7_time
+from utils.pagination import decode_cursor
+from utils.queues import get_task_queue
+
+# колонки, из которых собирается TaskOut
+TASK_OUT_COLUMNS = (
+    TaskModel.id,
+    TaskModel.title,
+    TaskModel.description,
+    TaskModel.priority,
+    TaskModel.task_type,
+    TaskModel.status,
+    TaskModel.started_at,
+    TaskModel.completed_at,
+    TaskModel.result,
+    TaskModel.result_size,
+    TaskModel.error,
+    TaskModel.attempts,
+    TaskModel.max_attempts,
+)
+
+TASK_OUT_KEYS = tuple(column.key for column in TASK_OUT_COLUMNS)
+
+# колонки, которые нужны воркеру для выполнения задачи
+TASK_CLAIM_COLUMNS = (
+    TaskModel.id,
+    TaskModel.title,
+    TaskModel.description,
+    TaskModel.priority,
+    TaskModel.task_type,
+    TaskModel.status,
+    TaskModel.created_at,
+    TaskModel.started_at,
+    TaskModel.attempts,
+    TaskModel.max_attempts,
+)
+
+# завершение пачки задач одним UPDATE; CANCELLED и уже завершённые задачи не перезаписываются.
+# PENDING с пустым completed_at означает, что задача ждёт повторной попытки, до pending_timeout её не трогает sweeper
+FINISH_TASKS_QUERY = """
+    WITH finished AS (
+        UPDATE tasks
+        SET status = v.status, result = v.result, result_size = v.result_size, result_ref = v.result_ref,
+            error = v.error, completed_at = v.completed_at,
+            lease_expires_at = CASE WHEN v.status = 'PENDING' THEN now() + CAST(:pending_timeout AS interval) END
+        FROM unnest(
+            CAST(:ids AS uuid[]),
+            CAST(:statuses AS task_status[]),
+            CAST(:results AS text[]),
+            CAST(:result_sizes AS integer[]),
+            CAST(:result_refs AS text[]),
+            CAST(:errors AS text[]),
+            CAST(:completed_at AS timestamptz[])
+        ) AS v(id, status, result, result_size, result_ref, error, completed_at)
+        WHERE tasks.id = v.id AND tasks.status = 'IN_PROGRESS' {created_at_filter}
+        RETURNING tasks.id, tasks.status
+    )
+    SELECT id, pg_notify(:channel, json_build_object('id', id, 'status', status)::text) FROM finished
+    """
+FINISH_TASKS_SQL = text(
+    FINISH_TASKS_QUERY.format(created_at_filter="AND tasks.created_at = ANY(CAST(:created_at AS timestamptz[]))")
+)
+# в пачке есть задачи со старыми id (UUIDv4): секции по id не вычисляются
+FINISH_LEGACY_TASKS_SQL = text(FINISH_TASKS_QUERY.format(created_at_filter=""))
+
+
+def with_status_notify(stmt: Update) -> Select:
+    """Оборачивает UPDATE ... RETURNING id, status в CTE, отправляя NOTIFY в том же запросе."""
+    updated = stmt.cte("updated")
+    payload = cast(func.json_build_object("id", updated.c.id, "status", updated.c.status), Text)
+    return select(updated).add_columns(func.pg_notify(TASK_EVENTS_CHANNEL, payload))
+
+
+def task_id_filter(task_id: UUID4 | str) -> list[ColumnElement[bool]]:
+    """Условия поиска задачи по id. Для UUIDv7 добавляется created_at из id, и Postgres читает одну секцию."""
+    table = TaskModel.__table__
+    conditions = [table.c.id == task_id]
+    created_at = uuid7_time(task_id)
+    if created_at is not None:
+        conditions.append(table.c.created_at == created_at)
+    return conditions
+
+
+def task_ids_created_at(task_ids: Sequence[UUID4 | str]) -> list[datetime] | None:
+    # задачи со старыми id (UUIDv4) могут лежать в любой секции, тогда created_at не ограничивается
+    created_at = {uuid7_time(task_id) for task_id in task_ids}
+    if None in created_at:
+        return None
+    return sorted(created_at)
+
+
+def task_ids_filter(task_ids: Sequence[UUID4 | str]) -> list[ColumnElement[bool]]:
+    """Условия поиска пачки задач по id: один параметр-массив, для UUIDv7 - ещё и массив created_at."""
+    table = TaskModel.__table__
+    conditions = [table.c.id == any_(literal(list(task_ids), ARRAY(UUID(as_uuid=True))))]
+    created_at = task_ids_created_at(task_ids)
+    if created_at is not None:
+        conditions.append(table.c.created_at == any_(literal(created_at, ARRAY(TIMESTAMP(timezone=True)))))
+    return conditions
 
 
 class TaskService:
     @staticmethod
-    async def create_task(data: TaskIn, session: AsyncSession) -> TaskModel:
+    def add_task(
+        data: TaskIn, session: AsyncSession, task_id: UUID4 | None = None, created_at: datetime | None = None
+    ) -> TaskModel:
+        if task_id is None:
+            task_id, created_at = new_task_key()
         task = TaskModel(
+            id=task_id,
+            created_at=created_at,
             title=data.title,
             description=data.description,
             priority=data.priority,
+            task_type=data.task_type,
+            max_attempts=data.max_attempts,
+        )
+        # сообщение для RabbitMQ пишется в outbox в той же транзакции, отправляет его релей
+        outbox_entry = TaskOutboxModel(
+            task_id=task.id,
+            priority=PRIORITY_MAP[task.priority],
+            routing_key=get_task_queue(task.task_type),
         )
-        session.add(task)
+        session.add_all([task, outbox_entry])
+        return task
+
+    @staticmethod
+    async def create_task(data: TaskIn, session: AsyncSession) -> TaskModel:
+        task = TaskService.add_task(data, session)
         await session.commit()
         return task
 
     @staticmethod
-    async def get_task_list(session: AsyncSession, query_params: TaskListParams) -> list[TaskModel]:
-        stmt = select(TaskModel).where(*query_params.build_filters())
-        stmt = stmt.offset((query_params.pagination.page_number - 1) * query_params.pagination.page_size).limit(
-            query_params.pagination.page_size
+    async def create_task_idempotent(
+        data: TaskIn, idempotency_key: str, session: AsyncSession
+    ) -> tuple[TaskModel, bool]:
+        """
+        Создаёт задачу не более одного раза на ключ. Возвращает задачу и признак, создана ли она этим запросом.
+        Параллельный запрос с тем же ключом ждёт на уникальном индексе, пока первый не завершит транзакцию.
+        """
+        task_id, created_at = new_task_key()
+        request_hash = hashlib.sha256(data.model_dump_json().encode()).hexdigest()
+        stmt = (
+            pg_insert(TaskIdempotencyKeyModel)
+            .values(id=task_id, created_at=created_at, key=idempotency_key, request_hash=request_hash)
+            .on_conflict_do_nothing(index_elements=[TaskIdempotencyKeyModel.key])
+            .returning(TaskIdempotencyKeyModel.id)
         )
+        if (await session.execute(stmt)).scalar_one_or_none() is not None:
+            task = TaskService.add_task(data, session, task_id, created_at)
+            await session.commit()
+            return task, True
 
-        result = await session.execute(stmt)
+        key_stmt = select(TaskIdempotencyKeyModel).where(TaskIdempotencyKeyModel.key == idempotency_key)
+        existing_key = (await session.execute(key_stmt)).scalar_one()
+        if existing_key.request_hash != request_hash:
+            raise HTTPException(
+                status_code=HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=ClientErrorMessage.IDEMPOTENCY_KEY_REUSED_ERROR.value,
+            )
+        # created_at ключа совпадает с задачей, поэтому читается одна секция
+        task_stmt = select(TaskModel).where(
+            TaskModel.id == existing_key.id, TaskModel.created_at == existing_key.created_at
+        )
+        task = (await session.execute(task_stmt)).scalar_one_or_none()
+        if task is None:
+            raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail=ClientErrorMessage.NOT_FOUND_TASK_ERROR.value)
+        return task, False
+
+    @staticmethod
+    async def create_tasks(data: list[TaskIn], session: AsyncSession) -> list[TaskModel]:
+        # один многострочный INSERT ... RETURNING вместо коммита на каждую задачу
+        stmt = insert(TaskModel).returning(TaskModel, sort_by_parameter_order=True)
+        rows = []
+        for item in data:
+            task_id, created_at = new_task_key()
+            rows.append({"id": task_id, "created_at": created_at, **item.model_dump()})
+        result = await session.execute(stmt, rows)
         task_list = list(result.scalars().all())
+        await session.execute(
+            insert(TaskOutboxModel),
+            [
+                {
+                    "task_id": task.id,
+                    "priority": PRIORITY_MAP[task.priority],
+                    "routing_key": get_task_queue(task.task_type),
+                }
+                for task in task_list
+            ],
+        )
+        await session.commit()
         return task_list
 
+    @staticmethod
+    async def get_task_list(session: AsyncSession, query_params: TaskListParams) -> list[Row]:
+        pagination = query_params.pagination
+        # Core-строки вместо ORM-объектов: ответ собирается из них без TaskModel и повторной валидации
+        stmt = (
+            select(*TASK_OUT_COLUMNS, TaskModel.created_at)
+            .where(*query_params.build_filters())
+            .order_by(TaskModel.created_at, TaskModel.id)
+            .limit(pagination.page_size)
+        )
+        if pagination.cursor:
+            # keyset-пагинация по индексу (created_at, id): стоимость не зависит от глубины страницы
+            try:
+                created_at, task_id = decode_cursor(pagination.cursor)
+            except ValueError:
+                raise HTTPException(
+                    status_code=HTTP_400_BAD_REQUEST,
+                    detail=ClientErrorMessage.INVALID_CURSOR_ERROR.value,
+                )
+            stmt = stmt.where(tuple_(TaskModel.created_at, TaskModel.id) > tuple_(created_at, task_id))
+        else:
+            stmt = stmt.offset((pagination.page_number - 1) * pagination.page_size)
+
+        result = await session.execute(stmt)
+        return list(result.all())
+
+    @staticmethod
+    async def stream_task_rows(session: AsyncSession, query_params: TaskListParams) -> AsyncIterator[Sequence[Row]]:
+        # серверный курсор: в памяти держится только одна пачка строк, ORM-объекты не создаются
+        stmt = (
+            select(*TASK_OUT_COLUMNS)
+            .where(*query_params.build_filters())
+            .order_by(TaskModel.created_at, TaskModel.id)
+            .execution_options(yield_per=EXPORT_PARTITION_SIZE)
+        )
+        result = await session.stream(stmt)
+        async for partition in result.partitions():
+            yield partition
+
     @staticmethod
     async def get_task_by_id(task_id: UUID4, session: AsyncSession) -> TaskModel:
-        stmt = select(TaskModel).where(TaskModel.id == task_id)
+        stmt = select(TaskModel).where(*task_id_filter(task_id))
         result = await session.execute(stmt)
         task = result.scalars().first()
         if not task:
@@ -45,8 +278,178 @@ class TaskService:
         return task
 
     @staticmethod
-    async def update_task_status(task_id: UUID4, session: AsyncSession, status: TaskStatusEnum) -> TaskModel:
-        task = await TaskService.get_task_by_id(task_id, session)
-        task.status = status
+    async def get_task_result(task_id: UUID4, session: AsyncSession) -> Row:
+        stmt = select(TaskModel.id, TaskModel.result, TaskModel.result_ref).where(*task_id_filter(task_id))
+        result = await session.execute(stmt)
+        row = result.first()
+        if not row:
+            raise HTTPException(
+                status_code=HTTP_404_NOT_FOUND,
+                detail=ClientErrorMessage.NOT_FOUND_TASK_ERROR.value,
+            )
+        return row
+
+    @staticmethod
+    async def get_task_status(task_id: UUID4, session: AsyncSession) -> Row:
+        # только нужные колонки, без загрузки description/result/error и без ORM-объекта
+        stmt = select(TaskModel.id, TaskModel.status).where(*task_id_filter(task_id))
+        result = await session.execute(stmt)
+        row = result.first()
+        if not row:
+            raise HTTPException(
+                status_code=HTTP_404_NOT_FOUND,
+                detail=ClientErrorMessage.NOT_FOUND_TASK_ERROR.value,
+            )
+        return row
+
+    @staticmethod
+    async def get_task_statuses(task_ids: list[UUID4], session: AsyncSession) -> list[Row]:
+        # один параметр-массив вместо IN со множеством параметров
+        stmt = select(TaskModel.id, TaskModel.status).where(*task_ids_filter(task_ids))
+        result = await session.execute(stmt)
+        return list(result.all())
+
+    @staticmethod
+    async def update_tasks_status(
+        task_ids: list[UUID4],
+        session: AsyncSession,
+        status: TaskStatusEnum,
+        from_status: TaskStatusEnum | None = None,
+        lease: timedelta | None = None,
+    ) -> list[UUID4]:
+        if not task_ids:
+            return []
+        table = TaskModel.__table__
+        stmt = update(table).where(*task_ids_filter(task_ids)).values(status=status)
+        if from_status:
+            stmt = stmt.where(table.c.status == from_status)
+        if lease:
+            stmt = stmt.values(lease_expires_at=func.now() + lease)
+        result = await session.execute(with_status_notify(stmt.returning(table.c.id, table.c.status)))
+        updated_ids = list(result.scalars().all())
         await session.commit()
-        return task
+        return updated_ids
+
+    @staticmethod
+    async def cancel_task(task_id: UUID4, session: AsyncSession, from_status: TaskStatusEnum) -> Row | None:
+        """
+        Отменяет задачу, если её статус не изменился с момента чтения.
+        Воркер, выполняющий задачу, получает сигнал через TASK_CANCEL_CHANNEL и прерывает её.
+        """
+        table = TaskModel.__table__
+        stmt = (
+            update(table)
+            .where(*task_id_filter(task_id), table.c.status == from_status)
+            .values(status=TaskStatusEnum.CANCELLED, lease_expires_at=None)
+            .returning(table.c.id, table.c.status)
+        )
+        result = await session.execute(with_status_notify(stmt))
+        row = result.first()
+        if row and from_status == TaskStatusEnum.IN_PROGRESS:
+            await TaskService.notify_status_change([task_id], session, TaskStatusEnum.CANCELLED, TASK_CANCEL_CHANNEL)
+        await session.commit()
+        return row
+
+    @staticmethod
+    def build_claim_stmt(*conditions: ColumnElement[bool]) -> Select:
+        table = TaskModel.__table__
+        stmt = (
+            update(table)
+            .where(*conditions, table.c.status.in_([TaskStatusEnum.NEW, TaskStatusEnum.PENDING]))
+            .values(
+                status=TaskStatusEnum.IN_PROGRESS,
+                started_at=func.now(),
+                attempts=table.c.attempts + 1,
+                lease_expires_at=func.now() + timedelta(seconds=settings.worker.lease_duration),
+                heartbeat_at=func.now(),
+            )
+            .returning(*(table.c[column.key] for column in TASK_CLAIM_COLUMNS))
+        )
+        return with_status_notify(stmt)
+
+    @staticmethod
+    async def claim_task(task_id: UUID4, session: AsyncSession) -> Row | None:
+        """Атомарно переводит задачу NEW/PENDING в IN_PROGRESS. None - задача не найдена, отменена или уже взята."""
+        result = await session.execute(TaskService.build_claim_stmt(*task_id_filter(task_id)))
+        row = result.first()
+        await session.commit()
+        return row
+
+    @staticmethod
+    async def claim_tasks(task_ids: list[UUID4], session: AsyncSession) -> list[Row]:
+        if not task_ids:
+            return []
+        result = await session.execute(TaskService.build_claim_stmt(*task_ids_filter(task_ids)))
+        rows = list(result.all())
+        await session.commit()
+        return rows
+
+    @staticmethod
+    async def finish_tasks(results: list[TaskResult], session: AsyncSession) -> list[UUID4]:
+        if not results:
+            return []
+        # большие результаты сохраняются в хранилище в той же транзакции, в tasks остаётся ссылка
+        results = await result_store.offload(results, session)
+        created_at = task_ids_created_at([item.id for item in results])
+        result = await session.execute(
+            FINISH_TASKS_SQL if created_at is not None else FINISH_LEGACY_TASKS_SQL,
+            {
+                "ids": [item.id for item in results],
+                "statuses": [item.status.value for item in results],
+                "results": [item.result for item in results],
+                "result_sizes": [item.result_size for item in results],
+                "result_refs": [item.result_ref for item in results],
+                "errors": [item.error for item in results],
+                "completed_at": [item.completed_at for item in results],
+                "pending_timeout": timedelta(seconds=settings.sweeper.pending_timeout),
+                "channel": TASK_EVENTS_CHANNEL,
+                **({"created_at": created_at} if created_at is not None else {}),
+            },
+        )
+        finished_ids = list(result.scalars().all())
+        # отменённые задачи и задачи с потерянной арендой UPDATE пропускает: их вынесенные результаты никто не прочитает
+        finished = set(finished_ids)
+        orphaned = {item.id: item.result_ref for item in results if item.result_ref and item.id not in finished}
+        if orphaned:
+            await result_store.delete(orphaned, session)
+        await session.commit()
+        return finished_ids
+
+    @staticmethod
+    async def renew_leases(task_ids: list[UUID4], session: AsyncSession) -> list[UUID4]:
+        """
+        Продлевает аренду выполняющихся задач, чтобы sweeper не счёл их зависшими.
+        Возвращает id продлённых задач: остальные отменены или переданы другому воркеру.
+        """
+        if not task_ids:
+            return []
+        table = TaskModel.__table__
+        stmt = (
+            update(table)
+            .where(*task_ids_filter(task_ids), table.c.status == TaskStatusEnum.IN_PROGRESS)
+            .values(
+                heartbeat_at=func.now(),
+                lease_expires_at=func.now() + timedelta(seconds=settings.worker.lease_duration),
+            )
+            .returning(table.c.id)
+        )
+        result = await session.execute(stmt)
+        renewed_ids = list(result.scalars().all())
+        await session.commit()
+        return renewed_ids
+
+    @staticmethod
+    async def notify_status_change(
+        task_ids: list[UUID4],
+        session: AsyncSession,
+        status: TaskStatusEnum,
+        channel: str = TASK_EVENTS_CHANNEL,
+    ) -> None:
+        # NOTIFY внутри транзакции доставляется подписчикам только после коммита
+        if not task_ids:
+            return
+        payloads = [json.dumps({"id": str(task_id), "status": status}) for task_id in task_ids]
+        await session.execute(
+            text("SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload"),
+            {"channel": channel, "payloads": payloads},
+        )
@@ -0,0 +1,56 @@
+from pydantic import UUID4
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from db.postgres import is_replica_session, is_strong_read_session
+from infra.notify import task_event_listener
+from schemas.task import TaskOut, TaskStatusResponse
+from services.task import TaskService
+from utils.cache import TTLCache
+
+task_detail_cache: TTLCache[UUID4, TaskOut] = TTLCache(settings.cache.maxsize, settings.cache.ttl)
+task_status_cache: TTLCache[UUID4, TaskStatusResponse] = TTLCache(settings.cache.maxsize, settings.cache.ttl)
+
+
+class TaskCacheService:
+    @staticmethod
+    def is_active() -> bool:
+        # без подписки на события кэш не узнает об изменениях в других процессах
+        return settings.cache.enabled and task_event_listener.is_connected
+
+    @staticmethod
+    async def get_task(task_id: UUID4, session: AsyncSession) -> TaskOut:
+        active = TaskCacheService.is_active()
+        if active and not is_strong_read_session(session) and (cached := task_detail_cache.get(task_id)) is not None:
+            return cached
+        generation = task_detail_cache.generation(task_id)
+        task = TaskOut.model_validate(await TaskService.get_task_by_id(task_id, session), from_attributes=True)
+        if active and not is_replica_session(session):
+            task_detail_cache.set(task_id, task, generation)
+        return task
+
+    @staticmethod
+    async def get_task_status(task_id: UUID4, session: AsyncSession) -> TaskStatusResponse:
+        active = TaskCacheService.is_active()
+        if active and not is_strong_read_session(session) and (cached := task_status_cache.get(task_id)) is not None:
+            return cached
+        generation = task_status_cache.generation(task_id)
+        row = await TaskService.get_task_status(task_id, session)
+        task_status = TaskStatusResponse.model_validate(row, from_attributes=True)
+        if active and not is_replica_session(session):
+            task_status_cache.set(task_id, task_status, generation)
+        return task_status
+
+    @staticmethod
+    def invalidate(task_id: UUID4) -> None:
+        task_detail_cache.invalidate(task_id)
+        task_status_cache.invalidate(task_id)
+
+    @staticmethod
+    def on_task_event(event: TaskStatusResponse) -> None:
+        TaskCacheService.invalidate(event.id)
+
+    @staticmethod
+    def clear() -> None:
+        task_detail_cache.clear()
+        task_status_cache.clear()
@@ -0,0 +1,73 @@
+import asyncio
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Iterator
+
+from pydantic import UUID4
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.consts import TASK_EVENTS_QUEUE_SIZE
+from core.logger import logger
+from schemas.task import TaskStatusResponse
+from services.task import TaskService
+from utils.enums import TaskStatusEnum
+
+TERMINAL_STATUSES = (TaskStatusEnum.COMPLETED, TaskStatusEnum.FAILED, TaskStatusEnum.CANCELLED)
+
+
+class TaskEventHub:
+    """Раздаёт события смены статуса из LISTEN-соединения процесса ожидающим запросам."""
+
+    def __init__(self) -> None:
+        self.watchers: dict[UUID4 | None, set[asyncio.Queue[TaskStatusResponse]]] = defaultdict(set)
+
+    def publish(self, event: TaskStatusResponse) -> None:
+        for queue in (*self.watchers.get(event.id, ()), *self.watchers.get(None, ())):
+            if queue.full():
+                # медленный подписчик не должен задерживать остальных, теряем самое старое событие
+                queue.get_nowait()
+                logger.warning("Очередь событий подписчика переполнена, событие пропущено")
+            queue.put_nowait(event)
+
+    @contextmanager
+    def watch(self, task_ids: list[UUID4] | None = None) -> Iterator[asyncio.Queue[TaskStatusResponse]]:
+        """Подписка на события задач task_ids или всех задач, если task_ids не указан."""
+        queue: asyncio.Queue[TaskStatusResponse] = asyncio.Queue(maxsize=TASK_EVENTS_QUEUE_SIZE)
+        keys = task_ids or [None]
+        for key in keys:
+            self.watchers[key].add(queue)
+        try:
+            yield queue
+        finally:
+            for key in keys:
+                self.watchers[key].discard(queue)
+                if not self.watchers[key]:
+                    del self.watchers[key]
+
+
+task_event_hub = TaskEventHub()
+
+
+class TaskEventService:
+    @staticmethod
+    async def wait_for_task(task_id: UUID4, session: AsyncSession, timeout: float) -> TaskStatusResponse:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        # подписываемся до чтения статуса, чтобы не пропустить переход между чтением и ожиданием
+        with task_event_hub.watch([task_id]) as events:
+            row = await TaskService.get_task_status(task_id, session)
+            task_status = TaskStatusResponse.model_validate(row, from_attributes=True)
+            # не держим соединение из пула на время ожидания
+            await session.close()
+            while task_status.status not in TERMINAL_STATUSES:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    task_status = await asyncio.wait_for(events.get(), remaining)
+                except asyncio.TimeoutError:
+                    # события могли потеряться при переподключении LISTEN, перечитываем статус
+                    row = await TaskService.get_task_status(task_id, session)
+                    task_status = TaskStatusResponse.model_validate(row, from_attributes=True)
+                    break
+        return task_status
@@ -0,0 +1,57 @@
+import asyncio
+import contextlib
+from typing import AsyncIterator, Callable
+
+from pydantic import UUID4
+
+from core.logger import logger
+from db.postgres import get_session_context
+from services.task import TaskService
+
+
+class TaskLeaseKeeper:
+    """Продлевает аренду всех выполняющихся в процессе задач одним UPDATE раз в interval секунд."""
+
+    def __init__(self, interval: float, on_lost: Callable[[list[UUID4]], None] | None = None) -> None:
+        self.interval = interval
+        # вызывается для задач, аренду которых продлить не удалось: они отменены или отданы другому воркеру
+        self.on_lost = on_lost
+        self.task_ids: set[UUID4] = set()
+        self.renew_loop: asyncio.Task | None = None
+
+    @contextlib.asynccontextmanager
+    async def hold(self, task_ids: list[UUID4]) -> AsyncIterator[None]:
+        self.task_ids.update(task_ids)
+        if self.renew_loop is None:
+            self.renew_loop = asyncio.create_task(self.run())
+        try:
+            yield
+        finally:
+            self.task_ids.difference_update(task_ids)
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            # пока в процессе нет выполняющихся задач, запросы к БД не выполняются
+            if self.task_ids:
+                await self.renew(list(self.task_ids))
+
+    async def renew(self, task_ids: list[UUID4]) -> None:
+        try:
+            async with await get_session_context() as session:
+                renewed_ids = set(await TaskService.renew_leases(task_ids, session))
+        except Exception:
+            logger.exception(f"Ошибка продления аренды {len(task_ids)} задач")
+            return
+        lost_ids = [task_id for task_id in task_ids if task_id not in renewed_ids and task_id in self.task_ids]
+        if lost_ids and self.on_lost is not None:
+            logger.warning(f"Потеряна аренда {len(lost_ids)} задач, выполнение прерывается")
+            self.on_lost(lost_ids)
+
+    async def close(self) -> None:
+        if self.renew_loop is None:
+            return
+        self.renew_loop.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self.renew_loop
+        self.renew_loop = None
@@ -0,0 +1,58 @@
+import asyncio
+
+from core.logger import logger
+from db.postgres import get_session_context
+from schemas.task import TaskResult
+from services.task import TaskService
+
+
+class TaskResultWriter:
+    """Собирает результаты одновременно завершившихся задач и записывает их одним UPDATE."""
+
+    def __init__(self, batch_size: int, flush_interval: float) -> None:
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pending: list[tuple[TaskResult, asyncio.Future]] = []
+        self.flush_timer: asyncio.TimerHandle | None = None
+        self.flushes: set[asyncio.Task] = set()
+
+    async def write(self, result: TaskResult) -> None:
+        """Возвращает управление после коммита пачки, в которую попал результат."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((result, future))
+        if len(self.pending) >= self.batch_size:
+            self.start_flush()
+        elif self.flush_timer is None:
+            self.flush_timer = loop.call_later(self.flush_interval, self.start_flush)
+        await future
+
+    def start_flush(self) -> None:
+        if self.flush_timer is not None:
+            self.flush_timer.cancel()
+            self.flush_timer = None
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        flush = asyncio.create_task(self.flush(batch))
+        self.flushes.add(flush)
+        flush.add_done_callback(self.flushes.discard)
+
+    async def flush(self, batch: list[tuple[TaskResult, asyncio.Future]]) -> None:
+        try:
+            async with await get_session_context() as session:
+                await TaskService.finish_tasks([result for result, _ in batch], session)
+        except Exception as e:
+            logger.exception(f"Ошибка записи результатов {len(batch)} задач")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for _, future in batch:
+            if not future.done():
+                future.set_result(None)
+
+    async def close(self) -> None:
+        self.start_flush()
+        if self.flushes:
+            await asyncio.gather(*self.flushes, return_exceptions=True)
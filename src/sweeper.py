@@ -0,0 +1,48 @@
+import asyncio
+import contextlib
+import signal
+from datetime import timedelta
+
+from core.config import settings
+from core.logger import logger
+from db.postgres import get_session_context
+from services.sweeper import TaskSweeperService
+
+
+async def sweep_batch() -> int:
+    """Возвращает в очередь пачку зависших задач и возвращает количество выбранных задач."""
+    async with await get_session_context() as session:
+        tasks = await TaskSweeperService.lock_stuck_tasks(
+            session, settings.sweeper.batch_size, timedelta(seconds=settings.sweeper.new_timeout)
+        )
+        if not tasks:
+            return 0
+
+        requeued_ids, failed_ids = await TaskSweeperService.redispatch(tasks, session)
+        await session.commit()
+        logger.info(f"Зависших задач возвращено в очередь: {len(requeued_ids)}, помечено failed: {len(failed_ids)}")
+        return len(tasks)
+
+
+async def sweep() -> None:
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    while not stop_event.is_set():
+        selected = 0
+        try:
+            selected = await sweep_batch()
+        except Exception:
+            logger.exception("Ошибка поиска зависших задач")
+
+        # полная пачка означает, что зависших задач может быть больше - продолжаем без паузы
+        if selected < settings.sweeper.batch_size:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(stop_event.wait(), settings.sweeper.poll_interval)
+
+
+if __name__ == "__main__":
+    logger.info("Запуск sweeper'а зависших задач...")
+    asyncio.run(sweep())
@@ -2,10 +2,10 @@ import httpx
 import pytest
 import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
-from sqlalchemy import pool
+from sqlalchemy import pool, text
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 
-from db.postgres import get_session
+from db.postgres import get_read_session, get_session, get_session_factory
 from models.base import Base
 from web_server import app
 
@@ -26,7 +26,10 @@ async def test_engine() -> AsyncEngine:
 @pytest_asyncio.fixture(scope="session", autouse=True)
 async def prepare_database(test_engine: AsyncEngine) -> None:
     async with test_engine.begin() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         await conn.run_sync(Base.metadata.create_all)
+        # в тестах все задачи попадают в секцию по умолчанию, месячные секции создаёт partitions.py
+        await conn.execute(text("CREATE TABLE tasks_default PARTITION OF tasks DEFAULT"))
     yield
     async with test_engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
@@ -55,8 +58,17 @@ def override_get_session(session: AsyncSession) -> None:
         yield session
 
     app.dependency_overrides[get_session] = _override
+    app.dependency_overrides[get_read_session] = _override
     yield
     app.dependency_overrides.pop(get_session, None)
+    app.dependency_overrides.pop(get_read_session, None)
+
+
+@pytest_asyncio.fixture(autouse=True)
+def override_get_session_factory(test_engine: AsyncEngine) -> None:
+    app.dependency_overrides[get_session_factory] = lambda: async_sessionmaker(bind=test_engine, expire_on_commit=False)
+    yield
+    app.dependency_overrides.pop(get_session_factory, None)
 
 
 @pytest_asyncio.fixture
@@ -1,9 +1,18 @@
+import csv
+import io
+import json
 import uuid
 
 import pytest
 from httpx import AsyncClient
-from starlette.status import HTTP_200_OK, HTTP_404_NOT_FOUND, HTTP_422_UNPROCESSABLE_ENTITY
-
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.status import HTTP_200_OK, HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND, HTTP_422_UNPROCESSABLE_ENTITY
+
+from core.consts import IDEMPOTENT_REPLAYED_HEADER
+from models import TaskModel, TaskOutboxModel
+from schemas.task import TaskResult
+from services.task import TaskService
 from utils.enums import ClientErrorMessage, TaskStatusEnum
 
 TASKS_PATH = "/api/v1/tasks"
@@ -32,6 +41,13 @@ async def test_create_task_no_description(async_client: AsyncClient) -> None:
     assert response.json()["description"] == ""
 
 
+@pytest.mark.asyncio
+async def test_create_task_unknown_type(async_client: AsyncClient, task_data: dict[str, str]) -> None:
+    response = await async_client.post(TASKS_PATH, json={**task_data, "task_type": "unknown"})
+
+    assert response.status_code == HTTP_422_UNPROCESSABLE_ENTITY
+
+
 @pytest.mark.asyncio
 async def test_create_task_no_title(async_client: AsyncClient) -> None:
     task_data = {
@@ -53,6 +69,55 @@ async def test_create_task_invalid_priority(async_client: AsyncClient) -> None:
     assert response.status_code == HTTP_422_UNPROCESSABLE_ENTITY
 
 
+@pytest.mark.asyncio
+async def test_create_task_with_idempotency_key(
+    async_client: AsyncClient, session: AsyncSession, task_data: dict[str, str]
+) -> None:
+    headers = {"Idempotency-Key": "client-request-1"}
+
+    first = await async_client.post(TASKS_PATH, json=task_data, headers=headers)
+    retry = await async_client.post(TASKS_PATH, json=task_data, headers=headers)
+
+    assert first.status_code == retry.status_code == HTTP_200_OK
+    assert retry.json()["id"] == first.json()["id"]
+    assert IDEMPOTENT_REPLAYED_HEADER not in first.headers
+    assert retry.headers[IDEMPOTENT_REPLAYED_HEADER] == "true"
+    assert (await session.execute(select(func.count()).select_from(TaskModel))).scalar_one() == 1
+    assert (await session.execute(select(func.count()).select_from(TaskOutboxModel))).scalar_one() == 1
+
+
+@pytest.mark.asyncio
+async def test_create_task_idempotency_key_reused_with_other_data(
+    async_client: AsyncClient, task_data: dict[str, str]
+) -> None:
+    headers = {"Idempotency-Key": "client-request-2"}
+    await async_client.post(TASKS_PATH, json=task_data, headers=headers)
+
+    response = await async_client.post(TASKS_PATH, json={**task_data, "title": "other"}, headers=headers)
+
+    assert response.status_code == HTTP_422_UNPROCESSABLE_ENTITY
+    assert response.json()["detail"] == ClientErrorMessage.IDEMPOTENCY_KEY_REUSED_ERROR.value
+
+
+# create_task_batch
+
+@pytest.mark.asyncio
+async def test_create_task_batch(async_client: AsyncClient, task_data: dict[str, str]) -> None:
+    response = await async_client.post(f"{TASKS_PATH}/batch", json=[task_data, task_data, task_data])
+
+    assert response.status_code == HTTP_200_OK
+    assert len(response.json()) == 3
+    assert len({task["id"] for task in response.json()}) == 3
+    assert all(task["title"] == task_data["title"] for task in response.json())
+
+
+@pytest.mark.asyncio
+async def test_create_task_batch_empty(async_client: AsyncClient) -> None:
+    response = await async_client.post(f"{TASKS_PATH}/batch", json=[])
+
+    assert response.status_code == HTTP_422_UNPROCESSABLE_ENTITY
+
+
 # list_task
 
 @pytest.mark.asyncio
@@ -78,6 +143,60 @@ async def test_filtered_by_title_list_task(async_client: AsyncClient, task_data:
     assert response.json()[0]["title"] == special_data["title"]
 
 
+@pytest.mark.asyncio
+async def test_list_task_by_cursor(async_client: AsyncClient, task_data: dict[str, str]) -> None:
+    created_ids = []
+    for _ in range(3):
+        response = await async_client.post(TASKS_PATH, json=task_data)
+        created_ids.append(response.json()["id"])
+
+    first_page = await async_client.get(f"{TASKS_PATH}?page_size=2")
+    assert first_page.status_code == HTTP_200_OK
+    assert len(first_page.json()) == 2
+    cursor = first_page.headers["X-Next-Cursor"]
+
+    second_page = await async_client.get(TASKS_PATH, params={"page_size": 2, "cursor": cursor})
+    assert second_page.status_code == HTTP_200_OK
+    assert len(second_page.json()) == 1
+    assert "X-Next-Cursor" not in second_page.headers
+    assert [task["id"] for task in first_page.json() + second_page.json()] == created_ids
+
+
+@pytest.mark.asyncio
+async def test_list_task_invalid_cursor(async_client: AsyncClient) -> None:
+    response = await async_client.get(TASKS_PATH, params={"cursor": "invalid"})
+
+    assert response.status_code == HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == ClientErrorMessage.INVALID_CURSOR_ERROR.value
+
+
+# export_tasks
+
+@pytest.mark.asyncio
+async def test_export_tasks_ndjson(async_client: AsyncClient, task_data: dict[str, str]) -> None:
+    created = [(await async_client.post(TASKS_PATH, json=task_data)).json() for _ in range(2)]
+
+    response = await async_client.get(f"{TASKS_PATH}/export")
+
+    assert response.status_code == HTTP_200_OK
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line) for line in response.text.splitlines()] == created
+
+
+@pytest.mark.asyncio
+async def test_export_tasks_csv_filtered(async_client: AsyncClient, task_data: dict[str, str]) -> None:
+    await async_client.post(TASKS_PATH, json=task_data)
+    special = (await async_client.post(TASKS_PATH, json={"title": "Special Test Task"})).json()
+
+    response = await async_client.get(f"{TASKS_PATH}/export", params={"format": "csv", "title": "Special"})
+
+    assert response.status_code == HTTP_200_OK
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 1
+    assert rows[0]["id"] == special["id"]
+    assert rows[0]["title"] == special["title"]
+
+
 # get_task_by_id
 
 @pytest.mark.asyncio
@@ -139,6 +258,106 @@ async def test_get_task_status_by_invalid_id(async_client: AsyncClient) -> None:
     assert response.status_code == HTTP_422_UNPROCESSABLE_ENTITY
 
 
+# get_task_statuses
+
+@pytest.mark.asyncio
+async def test_get_task_statuses(async_client: AsyncClient, task_data: dict[str, str]) -> None:
+    task_ids = [(await async_client.post(TASKS_PATH, json=task_data)).json()["id"] for _ in range(2)]
+    random_task_id = str(uuid.uuid4())
+
+    response = await async_client.get(f"{TASKS_PATH}/status", params={"ids": task_ids + [random_task_id]})
+
+    assert response.status_code == HTTP_200_OK
+    assert sorted(task["id"] for task in response.json()) == sorted(task_ids)
+    assert all(task["status"] in TaskStatusEnum.__members__ for task in response.json())
+
+
+@pytest.mark.asyncio
+async def test_get_task_statuses_without_ids(async_client: AsyncClient) -> None:
+    response = await async_client.get(f"{TASKS_PATH}/status")
+
+    assert response.status_code == HTTP_422_UNPROCESSABLE_ENTITY
+
+
+# get_task_stats
+
+@pytest.mark.asyncio
+async def test_get_task_stats(async_client: AsyncClient, session: AsyncSession, task_data: dict[str, str]) -> None:
+    await async_client.post(f"{TASKS_PATH}/batch", json=[task_data, task_data])
+    response = await async_client.post(TASKS_PATH, json=task_data)
+    task_id = uuid.UUID(response.json()["id"])
+    await session.execute(
+        update(TaskModel)
+        .where(TaskModel.id == task_id)
+        .values(status=TaskStatusEnum.IN_PROGRESS, started_at=func.now())
+    )
+    await TaskService.finish_tasks([TaskResult(id=task_id, status=TaskStatusEnum.COMPLETED)], session)
+
+    response = await async_client.get(f"{TASKS_PATH}/stats", params={"window": 5})
+
+    assert response.status_code == HTTP_200_OK
+    counts = {(item["status"], item["priority"]): item["count"] for item in response.json()["counts"]}
+    assert counts == {
+        (TaskStatusEnum.NEW.value, task_data["priority"]): 2,
+        (TaskStatusEnum.COMPLETED.value, task_data["priority"]): 1,
+    }
+    assert response.json()["wait"]["count"] == 1
+    assert response.json()["run"]["count"] == 1
+    assert response.json()["run"]["p99"] is not None
+    assert sum(point["finished"] for point in response.json()["throughput"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_task_stats_invalid_window(async_client: AsyncClient) -> None:
+    response = await async_client.get(f"{TASKS_PATH}/stats", params={"window": 0})
+
+    assert response.status_code == HTTP_422_UNPROCESSABLE_ENTITY
+
+
+# get_task_result
+
+@pytest.mark.asyncio
+async def test_get_offloaded_task_result(
+    async_client: AsyncClient, session: AsyncSession, task_data: dict[str, str]
+) -> None:
+    response = await async_client.post(TASKS_PATH, json=task_data)
+    task_id = uuid.UUID(response.json()["id"])
+    payload = "результат " * 1000
+    await session.execute(update(TaskModel).where(TaskModel.id == task_id).values(status=TaskStatusEnum.IN_PROGRESS))
+    await TaskService.finish_tasks([TaskResult(id=task_id, status=TaskStatusEnum.COMPLETED, result=payload)], session)
+
+    task_response = await async_client.get(f"{TASKS_PATH}/{task_id}")
+    response = await async_client.get(f"{TASKS_PATH}/{task_id}/result")
+
+    assert task_response.json()["result"] == ""
+    assert task_response.json()["result_size"] == len(payload.encode())
+    assert response.status_code == HTTP_200_OK
+    assert response.text == payload
+
+
+# wait_for_task
+
+@pytest.mark.asyncio
+async def test_wait_for_task_timeout(async_client: AsyncClient, task_data: dict[str, str]) -> None:
+    task_id = (await async_client.post(TASKS_PATH, json=task_data)).json()["id"]
+
+    response = await async_client.get(f"{TASKS_PATH}/{task_id}/wait", params={"timeout": 0.1})
+
+    assert response.status_code == HTTP_200_OK
+    assert response.json() == {"id": task_id, "status": TaskStatusEnum.NEW.value}
+
+
+@pytest.mark.asyncio
+async def test_wait_for_cancelled_task(async_client: AsyncClient, task_data: dict[str, str]) -> None:
+    task_id = (await async_client.post(TASKS_PATH, json=task_data)).json()["id"]
+    await async_client.delete(f"{TASKS_PATH}/{task_id}")
+
+    response = await async_client.get(f"{TASKS_PATH}/{task_id}/wait", params={"timeout": 5})
+
+    assert response.status_code == HTTP_200_OK
+    assert response.json()["status"] == TaskStatusEnum.CANCELLED.value
+
+
 # cancel_task
 
 @pytest.mark.asyncio
@@ -154,6 +373,36 @@ async def test_cancel_task(async_client: AsyncClient, task_data: dict[str, str])
     assert response.json()["status"] == TaskStatusEnum.CANCELLED.value
 
 
+@pytest.mark.asyncio
+async def test_cancel_in_progress_task(
+    async_client: AsyncClient, session: AsyncSession, task_data: dict[str, str]
+) -> None:
+    response = await async_client.post(TASKS_PATH, json=task_data)
+    task_id = response.json()["id"]
+    await session.execute(update(TaskModel).where(TaskModel.id == task_id).values(status=TaskStatusEnum.IN_PROGRESS))
+    await session.commit()
+
+    response = await async_client.delete(f"{TASKS_PATH}/{task_id}")
+
+    assert response.status_code == HTTP_200_OK
+    assert response.json()["status"] == TaskStatusEnum.CANCELLED.value
+
+
+@pytest.mark.asyncio
+async def test_cancel_completed_task(
+    async_client: AsyncClient, session: AsyncSession, task_data: dict[str, str]
+) -> None:
+    response = await async_client.post(TASKS_PATH, json=task_data)
+    task_id = response.json()["id"]
+    await session.execute(update(TaskModel).where(TaskModel.id == task_id).values(status=TaskStatusEnum.COMPLETED))
+    await session.commit()
+
+    response = await async_client.delete(f"{TASKS_PATH}/{task_id}")
+
+    assert response.status_code == HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == ClientErrorMessage.CANNOT_CANCEL_TASK_ERROR.value
+
+
 @pytest.mark.asyncio
 async def test_cancel_non_existent_task(async_client: AsyncClient) -> None:
     random_task_id = str(uuid.uuid4())
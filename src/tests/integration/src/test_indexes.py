@@ -0,0 +1,42 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import TaskModel
+from schemas.task import TaskListParams
+from utils.enums import TaskPriorityEnum, TaskStatusEnum
+
+
+async def explain(session: AsyncSession, query_params: TaskListParams) -> str:
+    stmt = select(TaskModel.id).where(*query_params.build_filters())
+    compiled = stmt.compile(dialect=session.get_bind().dialect, compile_kwargs={"literal_binds": True})
+    # на маленькой тестовой таблице планировщик всегда выбирает seq scan, запрещаем его
+    await session.execute(text("SET LOCAL enable_seqscan = off"))
+    result = await session.execute(text(f"EXPLAIN {compiled}"))
+    return "\n".join(row[0] for row in result)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "filters, index_name",
+    [
+        ({"title": "report"}, "ix_tasks_title_trgm"),
+        ({"status": TaskStatusEnum.PENDING}, "ix_tasks_active_status_created_at"),
+        (
+            {"status": TaskStatusEnum.COMPLETED, "priority": TaskPriorityEnum.HIGH},
+            "ix_tasks_status_priority_created_at",
+        ),
+        ({"started_after": datetime(2025, 1, 1, tzinfo=timezone.utc)}, "ix_tasks_started_at"),
+        ({"completed_before": datetime(2025, 1, 1, tzinfo=timezone.utc)}, "ix_tasks_completed_at"),
+    ],
+)
+async def test_filters_use_indexes(session: AsyncSession, filters: dict, index_name: str) -> None:
+    session.add_all([TaskModel(title=f"Monthly report {i}", description="") for i in range(10)])
+    await session.flush()
+
+    plan = await explain(session, TaskListParams(**filters))
+
+    assert index_name in plan
+    await session.rollback()
@@ -0,0 +1,92 @@
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from core.config import PartitionConfig
+from models import TaskModel, task_partition_retirements
+from partitions import maintain_partitions
+from services.partitions import TaskPartitionService
+from utils.enums import RetentionModeEnum
+from utils.partitions import partition_start, plan_partitions, shift_partition
+
+
+@pytest.mark.asyncio
+async def test_create_and_drop_partition(session: AsyncSession) -> None:
+    start, end = datetime(2020, 1, 1, tzinfo=timezone.utc), datetime(2020, 2, 1, tzinfo=timezone.utc)
+    await TaskPartitionService.create_partition("tasks_p20200101", start, end, session)
+    session.add(TaskModel(title="Old task", description="", created_at=datetime(2020, 1, 15, tzinfo=timezone.utc)))
+    await session.commit()
+
+    partitions = {partition.name: partition for partition in await TaskPartitionService.get_partitions(session)}
+    assert partitions["tasks_p20200101"].start == start
+    assert partitions["tasks_p20200101"].end == end
+    assert partitions["tasks_default"].start is None
+
+    await TaskPartitionService.retire_partition(partitions["tasks_p20200101"], RetentionModeEnum.DROP, False, session)
+
+    assert (await session.execute(select(TaskModel.id))).first() is None
+
+
+@pytest.mark.asyncio
+async def test_maintain_partitions_detaches_concurrently_without_creating(test_engine: AsyncEngine) -> None:
+    config = PartitionConfig(retention=2, retention_mode=RetentionModeEnum.DROP)
+    now = datetime.now(timezone.utc)
+    until = shift_partition(partition_start(now, config.interval), config.interval, config.premake)
+    planned = plan_partitions(now, until, config.interval)
+    session_factory = async_sessionmaker(bind=test_engine, expire_on_commit=False)
+
+    async with test_engine.begin() as conn:
+        # без секции по умолчанию доступен DETACH ... CONCURRENTLY; все нужные секции уже созданы
+        await conn.execute(text("ALTER TABLE tasks DETACH PARTITION tasks_default"))
+        await conn.execute(
+            text("CREATE TABLE tasks_p20200101 PARTITION OF tasks FOR VALUES FROM ('2020-01-01') TO ('2020-02-01')")
+        )
+        for name, start, end in planned:
+            await conn.execute(
+                text(
+                    f"CREATE TABLE {name} PARTITION OF tasks "
+                    f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+                )
+            )
+    try:
+        with (
+            patch("partitions.settings.partition", config),
+            patch("partitions.get_session_context", AsyncMock(side_effect=lambda: session_factory())),
+            patch("partitions.TaskPartitionService.create_partition", AsyncMock()) as create_partition,
+        ):
+            await maintain_partitions()
+
+        create_partition.assert_not_called()
+        async with session_factory() as session:
+            names = {partition.name for partition in await TaskPartitionService.get_partitions(session)}
+            dropped = await session.execute(text("SELECT to_regclass('tasks_p20200101')"))
+        assert "tasks_p20200101" not in names
+        assert dropped.scalar_one() is None
+    finally:
+        async with test_engine.begin() as conn:
+            for name, _, _ in planned:
+                await conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+            await conn.execute(text("DROP TABLE IF EXISTS tasks_p20200101"))
+            await conn.execute(text("ALTER TABLE tasks ATTACH PARTITION tasks_default DEFAULT"))
+
+
+@pytest.mark.asyncio
+async def test_finish_retirement_cleans_up_partition_detached_by_interrupted_run(session: AsyncSession) -> None:
+    start, end = datetime(2020, 3, 1, tzinfo=timezone.utc), datetime(2020, 4, 1, tzinfo=timezone.utc)
+    await TaskPartitionService.create_partition("tasks_p20200301", start, end, session)
+    session.add(TaskModel(title="Old task", description="", created_at=datetime(2020, 3, 15, tzinfo=timezone.utc)))
+    await session.commit()
+    # прошлый запуск успел записать удаление и отсоединить секцию, но упал до очистки
+    await session.execute(pg_insert(task_partition_retirements).values(name="tasks_p20200301"))
+    await session.execute(text("ALTER TABLE tasks DETACH PARTITION tasks_p20200301"))
+    await session.commit()
+
+    assert await TaskPartitionService.get_pending_retirements(session) == ["tasks_p20200301"]
+    await TaskPartitionService.finish_retirement("tasks_p20200301", RetentionModeEnum.DROP, session)
+
+    assert await TaskPartitionService.get_pending_retirements(session) == []
+    assert (await session.execute(text("SELECT to_regclass('tasks_p20200301')"))).scalar_one() is None
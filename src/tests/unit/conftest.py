@@ -3,6 +3,7 @@ from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 import pytest_asyncio
+from sqlalchemy import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from models import TaskModel
@@ -13,7 +14,7 @@ from schemas.task import TaskIn, TaskListParams
 
 @pytest_asyncio.fixture
 def mock_session() -> MagicMock:
-    return MagicMock(spec=AsyncSession)
+    return MagicMock(spec=AsyncSession, info={})
 
 
 @pytest_asyncio.fixture
@@ -54,12 +55,14 @@ def make_mock_session(
     *,
     scalars_all: list[Base] = None,
     scalars_first: Optional[Base] = None,
+    rows_all: list[Row] = None,
 ) -> MagicMock:
     """
     Создает мок AsyncSession с гибким заданием результатов.
     Аргументы:
         scalars_all: список, который должен вернуть scalars().all()
         scalars_first: значение, которое должен вернуть scalars().first()
+        rows_all: список строк, который должен вернуть all()
     Возвращает:
         мок AsyncSession с настроенными методами
     """
@@ -73,6 +76,8 @@ def make_mock_session(
 
     mock_result = MagicMock()
     mock_result.scalars.return_value = mock_scalars
+    if rows_all is not None:
+        mock_result.all.return_value = rows_all
 
     mock_session = MagicMock(spec=AsyncSession)
     mock_session.execute = AsyncMock(return_value=mock_result)
@@ -0,0 +1,74 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+from aio_pika import Message
+from sqlalchemy import create_engine, text
+
+from benchmarks.broker import InMemoryBroker, InMemoryMessage
+from benchmarks.metrics import QueryCounter, percentile
+
+
+async def settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_in_memory_broker_respects_priority_and_prefetch() -> None:
+    connection = InMemoryBroker().connect()
+    publisher = await connection.channel()
+    consumer_channel = await connection.channel()
+    await consumer_channel.set_qos(prefetch_count=1)
+    queue = await consumer_channel.declare_queue("tasks_queue")
+    received: list[InMemoryMessage] = []
+
+    async def on_message(message: InMemoryMessage) -> None:
+        received.append(message)
+
+    for body, priority in ((b"low", 1), (b"high", 9)):
+        await publisher.default_exchange.publish(Message(body=body, priority=priority), routing_key="tasks_queue")
+    await queue.consume(on_message)
+    await settle()
+
+    # prefetch=1: второе сообщение доставляется только после подтверждения первого
+    assert [message.body for message in received] == [b"high"]
+    await received[0].ack()
+    await settle()
+    assert [message.body for message in received] == [b"high", b"low"]
+
+
+@pytest.mark.asyncio
+async def test_in_memory_broker_dead_letters_after_ttl() -> None:
+    broker = InMemoryBroker()
+    channel = await broker.connect().channel()
+    await channel.declare_queue("tasks_queue")
+    await channel.declare_queue(
+        "tasks_queue.retry.10", arguments={"x-message-ttl": 10, "x-dead-letter-routing-key": "tasks_queue"}
+    )
+
+    await channel.default_exchange.publish(Message(body=b"retry"), routing_key="tasks_queue.retry.10")
+    await channel.default_exchange.publish(Message(body=b"lost"), routing_key="unknown")
+    await asyncio.sleep(0.05)
+
+    assert [body for _, _, body in broker.queues["tasks_queue"].messages] == [b"retry"]
+    assert broker.dropped == 1
+
+
+def test_percentile_nearest_rank() -> None:
+    values = [float(value) for value in range(1, 101)]
+
+    assert [percentile(values, q) for q in (50, 95, 99)] == [50, 95, 99]
+
+
+def test_query_counter_counts_transaction_round_trips() -> None:
+    # счётчику нужен только sync_engine: события те же, что у AsyncEngine
+    engine = MagicMock(sync_engine=create_engine("sqlite://"))
+
+    with QueryCounter(engine) as queries:
+        with engine.sync_engine.begin() as connection:
+            connection.execute(text("SELECT 1"))
+            connection.execute(text("SELECT 2"))
+
+    # BEGIN, два запроса и COMMIT
+    assert queries.count == 4
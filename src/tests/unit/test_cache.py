@@ -0,0 +1,143 @@
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from core.consts import DEFAULT_TASK_TYPE
+from models import TaskModel
+from schemas.task import TaskStatusResponse
+from services.task_cache import TaskCacheService
+from utils.cache import TTLCache
+from utils.enums import TaskPriorityEnum, TaskStatusEnum
+
+
+def test_ttl_cache_evicts_least_recently_used() -> None:
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_expires_items() -> None:
+    cache = TTLCache(maxsize=2, ttl=0)
+    cache.set("a", 1)
+
+    assert cache.get("a") is None
+
+
+def test_ttl_cache_skips_value_read_before_invalidation() -> None:
+    cache = TTLCache(maxsize=2, ttl=60)
+    generation = cache.generation("a")
+    cache.invalidate("a")
+    cache.set("a", 1, generation)
+
+    assert cache.get("a") is None
+
+
+def test_ttl_cache_invalidation_does_not_discard_other_keys() -> None:
+    cache = TTLCache(maxsize=2, ttl=60)
+    generation = cache.generation("a")
+    cache.invalidate("b")
+    cache.set("a", 1, generation)
+
+    assert cache.get("a") == 1
+
+
+def test_ttl_cache_clear_discards_reads_in_flight() -> None:
+    cache = TTLCache(maxsize=2, ttl=60)
+    generation = cache.generation("a")
+    cache.clear()
+    cache.set("a", 1, generation)
+
+    assert cache.get("a") is None
+
+
+@pytest.mark.asyncio
+async def test_get_task_status_uses_cache(mock_session: MagicMock) -> None:
+    task_id = uuid.uuid4()
+    row = TaskStatusResponse(id=task_id, status=TaskStatusEnum.PENDING)
+    TaskCacheService.clear()
+
+    with (
+        patch("services.task_cache.TaskCacheService.is_active", return_value=True),
+        patch("services.task_cache.TaskService.get_task_status", AsyncMock(return_value=row)) as get_task_status,
+    ):
+        first = await TaskCacheService.get_task_status(task_id, mock_session)
+        second = await TaskCacheService.get_task_status(task_id, mock_session)
+        TaskCacheService.on_task_event(TaskStatusResponse(id=task_id, status=TaskStatusEnum.IN_PROGRESS))
+        await TaskCacheService.get_task_status(task_id, mock_session)
+
+    assert first == second == row
+    assert get_task_status.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_get_task_status_does_not_cache_replica_reads(mock_session: MagicMock) -> None:
+    task_id = uuid.uuid4()
+    row = TaskStatusResponse(id=task_id, status=TaskStatusEnum.PENDING)
+    mock_session.info = {"replica": True}
+    TaskCacheService.clear()
+
+    with (
+        patch("services.task_cache.TaskCacheService.is_active", return_value=True),
+        patch("services.task_cache.TaskService.get_task_status", AsyncMock(return_value=row)) as get_task_status,
+    ):
+        await TaskCacheService.get_task_status(task_id, mock_session)
+        await TaskCacheService.get_task_status(task_id, mock_session)
+
+    assert get_task_status.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_get_task_status_strong_read_bypasses_cache(mock_session: MagicMock) -> None:
+    task_id = uuid.uuid4()
+    stale = TaskStatusResponse(id=task_id, status=TaskStatusEnum.PENDING)
+    fresh = TaskStatusResponse(id=task_id, status=TaskStatusEnum.COMPLETED)
+    TaskCacheService.clear()
+
+    with (
+        patch("services.task_cache.TaskCacheService.is_active", return_value=True),
+        patch("services.task_cache.TaskService.get_task_status", AsyncMock(side_effect=[stale, fresh, fresh])),
+    ):
+        await TaskCacheService.get_task_status(task_id, mock_session)
+        mock_session.info = {"strong": True}
+        strong = await TaskCacheService.get_task_status(task_id, mock_session)
+        mock_session.info = {}
+        eventual = await TaskCacheService.get_task_status(task_id, mock_session)
+
+    assert strong == fresh
+    # строгое чтение из основной базы обновляет кэш для следующих запросов
+    assert eventual == fresh
+
+
+@pytest.mark.asyncio
+async def test_get_task_skips_cache_without_listener(mock_session: MagicMock) -> None:
+    task_model = TaskModel(
+        id=uuid.uuid4(),
+        title="Test Task",
+        description="",
+        priority=TaskPriorityEnum.LOW,
+        status=TaskStatusEnum.NEW,
+        result="",
+        result_size=0,
+        error="",
+        task_type=DEFAULT_TASK_TYPE,
+        attempts=0,
+        max_attempts=3,
+    )
+    TaskCacheService.clear()
+
+    with (
+        patch("services.task_cache.TaskCacheService.is_active", return_value=False),
+        patch("services.task_cache.TaskService.get_task_by_id", AsyncMock(return_value=task_model)) as get_task_by_id,
+    ):
+        await TaskCacheService.get_task(task_model.id, mock_session)
+        task = await TaskCacheService.get_task(task_model.id, mock_session)
+
+    assert task.id == task_model.id
+    assert get_task_by_id.call_count == 2
@@ -0,0 +1,72 @@
+import csv
+import io
+import json
+import uuid
+from collections import namedtuple
+from datetime import datetime, timezone
+from typing import AsyncIterator, Sequence
+
+import pytest
+
+from utils.enums import TaskStatusEnum
+from utils.export import iter_csv, iter_ndjson
+
+TASK_ID = uuid.UUID("123e4567-e89b-12d3-a456-426655440000")
+STARTED_AT = datetime(2025, 6, 9, 18, 48, 15, 59334, tzinfo=timezone.utc)
+
+
+# именованный кортеж повторяет интерфейс sqlalchemy.Row, который используют сериализаторы
+TaskRow = namedtuple("TaskRow", ["id", "status", "started_at", "completed_at"])
+
+
+def make_rows() -> list[TaskRow]:
+    return [TaskRow(TASK_ID, TaskStatusEnum.IN_PROGRESS, STARTED_AT, None)]
+
+
+async def partitions(*chunks: list[TaskRow]) -> AsyncIterator[Sequence[TaskRow]]:
+    for chunk in chunks:
+        yield chunk
+
+
+async def collect(chunks: AsyncIterator[bytes]) -> str:
+    return b"".join([chunk async for chunk in chunks]).decode()
+
+
+@pytest.mark.asyncio
+async def test_iter_ndjson() -> None:
+    rows = make_rows()
+
+    content = await collect(iter_ndjson(partitions(rows, rows)))
+
+    lines = [json.loads(line) for line in content.splitlines()]
+    assert lines == [
+        {
+            "id": str(TASK_ID),
+            "status": "IN_PROGRESS",
+            "started_at": "2025-06-09T18:48:15.059334Z",
+            "completed_at": None,
+        }
+    ] * 2
+
+
+@pytest.mark.asyncio
+async def test_iter_csv() -> None:
+    rows = make_rows()
+
+    content = await collect(iter_csv(partitions(rows), ["id", "status", "started_at", "completed_at"]))
+
+    assert list(csv.DictReader(io.StringIO(content))) == [
+        {
+            "id": str(TASK_ID),
+            "status": "IN_PROGRESS",
+            "started_at": STARTED_AT.isoformat(),
+            "completed_at": "",
+        }
+    ]
+
+
+@pytest.mark.asyncio
+async def test_iter_csv_empty() -> None:
+    content = await collect(iter_csv(partitions(), ["id"]))
+
+    assert content == "id\r\n"
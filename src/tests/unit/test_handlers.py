@@ -0,0 +1,50 @@
+import pytest
+from pydantic import ValidationError
+
+from core.config import settings
+from core.consts import DEFAULT_TASK_TYPE, TASKS_QUEUE
+from handlers import TaskHandlerRegistry, task_registry
+from schemas.task import TaskIn
+from utils.queues import get_retry_queue, get_task_queue
+
+
+def test_registry_registers_handler_with_limits() -> None:
+    registry = TaskHandlerRegistry()
+
+    @registry.register("report", concurrency=2)
+    async def build_report(task: object) -> str:
+        return "ok"
+
+    handler = registry.get("report")
+    assert handler.func is build_report
+    assert handler.concurrency == 2
+    assert handler.prefetch_count == settings.worker.prefetch_count
+    assert registry.task_types == ["report"]
+
+
+def test_registry_rejects_duplicate_and_unknown_types() -> None:
+    registry = TaskHandlerRegistry()
+    registry.register("report")(task_registry.get(DEFAULT_TASK_TYPE).func)
+
+    with pytest.raises(ValueError):
+        registry.register("report")(task_registry.get(DEFAULT_TASK_TYPE).func)
+    with pytest.raises(ValueError):
+        registry.get("unknown")
+
+
+def test_task_in_validates_task_type() -> None:
+    assert TaskIn(title="Test Task").task_type == DEFAULT_TASK_TYPE
+    with pytest.raises(ValidationError):
+        TaskIn(title="Test Task", task_type="unknown")
+
+
+@pytest.mark.parametrize(
+    "task_type, queue, retry_queue",
+    [
+        (DEFAULT_TASK_TYPE, TASKS_QUEUE, f"{TASKS_QUEUE}.retry.1000"),
+        ("report", "tasks_queue.type.report", "tasks_queue.type.report.retry.1000"),
+    ],
+)
+def test_task_queue_names(task_type: str, queue: str, retry_queue: str) -> None:
+    assert get_task_queue(task_type) == queue
+    assert get_retry_queue(task_type, 1000) == retry_queue
@@ -0,0 +1,38 @@
+import httpx
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport
+from prometheus_client import REGISTRY
+
+from infra.metrics import RequestDurationMiddleware
+from web_server import app
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_labels_requests_by_route_template() -> None:
+    async with httpx.AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        await client.get("/api/v1/tasks/not-a-uuid")
+        response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert 'route="/api/v1/tasks/{task_id}",status="422"' in response.text
+    assert "not-a-uuid" not in response.text
+
+
+@pytest.mark.asyncio
+async def test_request_duration_middleware_counts_unhandled_errors_as_500() -> None:
+    failing_app = FastAPI()
+    failing_app.add_middleware(RequestDurationMiddleware)
+
+    @failing_app.get("/boom/{item_id}")
+    async def boom(item_id: int) -> None:
+        raise RuntimeError("boom")
+
+    labels = {"method": "GET", "route": "/boom/{item_id}", "status": "500"}
+    before = REGISTRY.get_sample_value("http_request_duration_seconds_count", labels) or 0
+    transport = ASGITransport(app=failing_app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/boom/1")
+
+    assert response.status_code == 500
+    assert REGISTRY.get_sample_value("http_request_duration_seconds_count", labels) == before + 1
@@ -0,0 +1,31 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import asyncpg
+import pytest
+
+from infra.notify import TaskEventListener
+
+
+@pytest.mark.asyncio
+async def test_listener_reconnects_after_driver_error() -> None:
+    listener = TaskEventListener()
+    reset = MagicMock()
+    listener.subscribe_reset(reset)
+    connection = MagicMock(is_closed=MagicMock(return_value=False))
+    connection.add_listener = AsyncMock(side_effect=asyncpg.InterfaceError("connection is closed"))
+    connect = AsyncMock(side_effect=[asyncpg.InterfaceError("cannot connect"), connection, asyncio.CancelledError()])
+
+    with (
+        patch("infra.notify.asyncpg.connect", connect),
+        patch("infra.notify.asyncio.sleep", AsyncMock()) as sleep,
+        pytest.raises(asyncio.CancelledError),
+    ):
+        await listener.listen()
+
+    assert connect.call_count == 3
+    assert sleep.call_count == 2
+    assert reset.call_count == 2
+    # соединение, на котором подписка не удалась, закрывается перед повтором
+    connection.terminate.assert_called_once()
+    assert listener.connection is None
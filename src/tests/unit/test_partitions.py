@@ -0,0 +1,178 @@
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from core.config import settings
+from partitions import maintain_partitions
+from services.partitions import TaskPartition, TaskPartitionService
+from utils.enums import PartitionIntervalEnum, RetentionModeEnum
+from utils.partitions import partition_start, plan_partitions, retention_cutoff, shift_partition
+
+NOW = datetime(2026, 12, 18, 15, 30, tzinfo=timezone.utc)
+
+
+def utc(year: int, month: int, day: int = 1) -> datetime:
+    return datetime(year, month, day, tzinfo=timezone.utc)
+
+
+def test_monthly_partitions_cross_year_boundary() -> None:
+    start = partition_start(NOW, PartitionIntervalEnum.MONTH)
+    until = shift_partition(start, PartitionIntervalEnum.MONTH, 1)
+
+    partitions = plan_partitions(NOW, until, PartitionIntervalEnum.MONTH)
+
+    assert [name for name, _, _ in partitions] == ["tasks_p20261201", "tasks_p20270101"]
+    assert partitions[-1][2] == utc(2027, 2)
+
+
+@pytest.mark.parametrize(
+    "interval, retention, cutoff",
+    [
+        (PartitionIntervalEnum.MONTH, 12, utc(2026, 1)),
+        (PartitionIntervalEnum.DAY, 1, utc(2026, 12, 18)),
+    ],
+)
+def test_retention_cutoff(interval: PartitionIntervalEnum, retention: int, cutoff: datetime) -> None:
+    assert retention_cutoff(NOW, interval, retention) == cutoff
+
+
+@pytest.mark.asyncio
+async def test_maintain_partitions_creates_missing_and_retires_expired(mock_session: MagicMock) -> None:
+    mock_session.__aenter__.return_value = mock_session
+    partitions = [
+        TaskPartition("tasks_p20241201", utc(2024, 12), utc(2025, 1)),
+        TaskPartition("tasks_p20261201", utc(2026, 12), utc(2027, 1)),
+        TaskPartition("tasks_default", None, None),
+    ]
+    # tasks_p20241101 отсоединена прошлым запуском, tasks_p20241201 ещё присоединена
+    pending = ["tasks_p20241101", "tasks_p20241201"]
+
+    with (
+        patch("partitions.datetime", MagicMock(now=MagicMock(return_value=NOW))),
+        patch("partitions.get_session_context", AsyncMock(return_value=mock_session)),
+        patch("partitions.TaskPartitionService.get_partitions", AsyncMock(return_value=partitions)),
+        patch("partitions.TaskPartitionService.get_pending_retirements", AsyncMock(return_value=pending)),
+        patch("partitions.TaskPartitionService.create_partition", AsyncMock()) as create_partition,
+        patch("partitions.TaskPartitionService.retire_partition", AsyncMock()) as retire_partition,
+        patch("partitions.TaskPartitionService.finish_retirement", AsyncMock()) as finish_retirement,
+        patch("partitions.TaskPartitionService.has_rows", AsyncMock(return_value=False)),
+    ):
+        await maintain_partitions()
+
+    created = [call.args[0] for call in create_partition.call_args_list]
+    assert created == ["tasks_p20270101", "tasks_p20270201", "tasks_p20270301"]
+    # у tasks есть секция по умолчанию, поэтому DETACH без CONCURRENTLY
+    retire_partition.assert_called_once_with(partitions[0], RetentionModeEnum.DROP, False, mock_session)
+    finish_retirement.assert_called_once_with("tasks_p20241101", RetentionModeEnum.DROP, mock_session)
+    # каждая созданная секция фиксируется сразу, до отсоединения устаревших
+    assert mock_session.commit.call_count == 4
+
+
+@pytest.mark.asyncio
+async def test_maintain_partitions_skips_ranges_covered_by_other_interval(mock_session: MagicMock) -> None:
+    mock_session.__aenter__.return_value = mock_session
+    # помесячные секции миграции, в настройках - дневной интервал
+    partitions = [TaskPartition("tasks_p20261201", utc(2026, 12), utc(2027, 1))]
+    config = settings.partition.model_copy(update={"interval": PartitionIntervalEnum.DAY, "premake": 2})
+
+    with (
+        patch("partitions.datetime", MagicMock(now=MagicMock(return_value=utc(2026, 12, 31)))),
+        patch("partitions.settings.partition", config),
+        patch("partitions.get_session_context", AsyncMock(return_value=mock_session)),
+        patch("partitions.TaskPartitionService.get_partitions", AsyncMock(return_value=partitions)),
+        patch("partitions.TaskPartitionService.get_pending_retirements", AsyncMock(return_value=[])),
+        patch("partitions.TaskPartitionService.create_partition", AsyncMock()) as create_partition,
+        patch("partitions.TaskPartitionService.retire_partition", AsyncMock()),
+        patch("partitions.TaskPartitionService.has_rows", AsyncMock(return_value=False)),
+    ):
+        await maintain_partitions()
+
+    created = [call.args[0] for call in create_partition.call_args_list]
+    assert created == ["tasks_p20270101", "tasks_p20270102"]
+
+
+@pytest.mark.asyncio
+async def test_retire_partition_records_retirement_before_detach(mock_session: MagicMock) -> None:
+    steps = MagicMock()
+    mock_session.commit = AsyncMock(side_effect=lambda: steps.commit())
+    partition = TaskPartition("tasks_p20241201", utc(2024, 12), utc(2025, 1))
+
+    with (
+        patch("services.partitions.TaskPartitionService.detach_partition", AsyncMock(side_effect=steps.detach)),
+        patch("services.partitions.TaskPartitionService.finish_retirement", AsyncMock(side_effect=steps.finish)),
+    ):
+        await TaskPartitionService.retire_partition(partition, RetentionModeEnum.DROP, False, mock_session)
+
+    assert "INSERT INTO task_partition_retirements" in str(mock_session.execute.call_args.args[0])
+    assert [name for name, _, _ in steps.mock_calls] == ["commit", "detach", "finish"]
+    steps.finish.assert_called_once_with("tasks_p20241201", RetentionModeEnum.DROP, mock_session)
+
+
+def make_retirement_session(mock_session: MagicMock, cleaned: bool) -> MagicMock:
+    def execute(stmt: object, params: dict | None = None) -> MagicMock:
+        if "to_regclass" in str(stmt):
+            return MagicMock(scalar_one=MagicMock(return_value="tasks_p20241201"))
+        return MagicMock(scalar_one=MagicMock(return_value=cleaned), all=MagicMock(return_value=[]))
+
+    mock_session.execute = AsyncMock(side_effect=execute)
+    return mock_session
+
+
+@pytest.mark.asyncio
+async def test_finish_retirement_forgets_stats_once(mock_session: MagicMock) -> None:
+    forget_partition = AsyncMock()
+
+    with patch("services.partitions.TaskStatsService.forget_partition", forget_partition):
+        await TaskPartitionService.finish_retirement(
+            "tasks_p20241201", RetentionModeEnum.DROP, make_retirement_session(mock_session, cleaned=False)
+        )
+        statements = [str(call.args[0]) for call in mock_session.execute.call_args_list]
+        await TaskPartitionService.finish_retirement(
+            "tasks_p20241201", RetentionModeEnum.DROP, make_retirement_session(mock_session, cleaned=True)
+        )
+
+    forget_partition.assert_called_once_with("tasks_p20241201", mock_session)
+    assert any(statement.startswith("UPDATE task_partition_retirements SET cleaned") for statement in statements)
+    # DROP и удаление записи фиксируются одной транзакцией
+    assert statements[-2] == "DROP TABLE tasks_p20241201"
+    assert statements[-1].startswith("DELETE FROM task_partition_retirements")
+
+
+@pytest.mark.asyncio
+async def test_detach_partition_concurrently_runs_outside_transaction(mock_session: MagicMock) -> None:
+    autocommit = MagicMock(execute=AsyncMock())
+    connection = MagicMock(execution_options=AsyncMock(return_value=autocommit))
+    mock_session.bind = MagicMock()
+    mock_session.bind.connect.return_value.__aenter__.return_value = connection
+
+    await TaskPartitionService.detach_partition(
+        TaskPartition("tasks_p20241201", utc(2024, 12), utc(2025, 1)), True, mock_session
+    )
+    await TaskPartitionService.detach_partition(
+        TaskPartition("tasks_p20250101", utc(2025, 1), utc(2025, 2), detach_pending=True), False, mock_session
+    )
+
+    # открытая транзакция сессии закрывается до DETACH
+    assert mock_session.commit.call_count == 2
+    connection.execution_options.assert_called_with(isolation_level="AUTOCOMMIT")
+    assert [str(call.args[0]) for call in autocommit.execute.call_args_list] == [
+        "ALTER TABLE tasks DETACH PARTITION tasks_p20241201 CONCURRENTLY",
+        "ALTER TABLE tasks DETACH PARTITION tasks_p20250101 FINALIZE",
+    ]
+    mock_session.execute.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_create_partition_moves_rows_from_default_partition(mock_session: MagicMock) -> None:
+    mock_session.execute = AsyncMock(return_value=MagicMock(scalar_one_or_none=MagicMock(return_value="tasks_default")))
+
+    with patch("services.partitions.TaskPartitionService.has_rows", AsyncMock(return_value=True)) as has_rows:
+        await TaskPartitionService.create_partition("tasks_p20270101", utc(2027, 1), utc(2027, 2), mock_session)
+
+    assert "created_at < '2027-02-01T00:00:00+00:00'" in has_rows.call_args.args[2]
+    statements = [str(call.args[0]) for call in mock_session.execute.call_args_list[1:]]
+    assert statements[1] == "ALTER TABLE tasks DETACH PARTITION tasks_default"
+    assert statements[2].startswith("CREATE TABLE tasks_p20270101 PARTITION OF tasks")
+    assert "DELETE FROM tasks_default" in statements[3] and "INSERT INTO tasks_p20270101" in statements[3]
+    assert statements[4] == "ALTER TABLE tasks ATTACH PARTITION tasks_default DEFAULT"
@@ -0,0 +1,38 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from db.postgres import get_read_session
+from utils.enums import ReadConsistencyEnum
+
+
+def make_session_factory(name: str) -> MagicMock:
+    factory = MagicMock()
+    factory.return_value.__aenter__.return_value = MagicMock(info={}, source=name)
+    return factory
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "replicas, consistency, expected",
+    [
+        (True, ReadConsistencyEnum.EVENTUAL, "replica"),
+        (True, ReadConsistencyEnum.STRONG, "primary"),
+        (False, ReadConsistencyEnum.EVENTUAL, "primary"),
+    ],
+)
+async def test_get_read_session_routes_to_replica(
+    replicas: bool, consistency: ReadConsistencyEnum, expected: str
+) -> None:
+    next_replica = MagicMock(return_value=make_session_factory("replica")) if replicas else None
+
+    with (
+        patch("db.postgres.new_session", make_session_factory("primary")),
+        patch("db.postgres.next_replica_session", next_replica),
+    ):
+        sessions = get_read_session(consistency)
+        session = await sessions.__anext__()
+        await sessions.aclose()
+
+    assert session.source == expected
+    assert session.info["strong"] is (consistency == ReadConsistencyEnum.STRONG)
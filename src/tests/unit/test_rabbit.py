@@ -0,0 +1,79 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from infra.rabbit import ChannelPool
+
+
+def make_channel() -> MagicMock:
+    channel = MagicMock()
+    channel.is_closed = False
+    channel.close = AsyncMock()
+    return channel
+
+
+@pytest.mark.asyncio
+async def test_channel_pool_reuses_channels() -> None:
+    rabbit_connection = MagicMock()
+    rabbit_connection.open_channel = AsyncMock(side_effect=lambda: make_channel())
+    pool = ChannelPool(rabbit_connection, max_size=2)
+
+    async with pool.channel() as first:
+        pass
+    async with pool.channel() as second:
+        pass
+
+    assert first is second
+    rabbit_connection.open_channel.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_channel_pool_replaces_closed_channel() -> None:
+    rabbit_connection = MagicMock()
+    rabbit_connection.open_channel = AsyncMock(side_effect=lambda: make_channel())
+    pool = ChannelPool(rabbit_connection, max_size=1)
+
+    async with pool.channel() as first:
+        pass
+    first.is_closed = True
+    async with pool.channel() as second:
+        pass
+
+    assert first is not second
+    assert pool.created == 1
+    assert rabbit_connection.open_channel.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_channel_pool_is_bounded() -> None:
+    rabbit_connection = MagicMock()
+    rabbit_connection.open_channel = AsyncMock(side_effect=lambda: make_channel())
+    pool = ChannelPool(rabbit_connection, max_size=1)
+
+    channel = await pool.acquire()
+    pool.release(channel)
+    channel = await pool.acquire()
+
+    assert pool.created == 1
+    assert pool.channels.empty()
+    rabbit_connection.open_channel.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_channel_pool_close_keeps_checked_out_channels_counted() -> None:
+    rabbit_connection = MagicMock()
+    rabbit_connection.open_channel = AsyncMock(side_effect=lambda: make_channel())
+    pool = ChannelPool(rabbit_connection, max_size=2)
+    idle = await pool.acquire()
+    checked_out = await pool.acquire()
+    pool.release(idle)
+
+    await pool.close()
+    assert pool.created == 1
+    # соединение закрыто, возвращённый канал тоже закрыт и выбрасывается из пула
+    checked_out.is_closed = True
+    pool.release(checked_out)
+
+    idle.close.assert_called_once()
+    assert pool.created == 0
+    assert pool.channels.empty()
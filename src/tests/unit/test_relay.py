@@ -0,0 +1,51 @@
+import uuid
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from core.config import settings
+from models import TaskOutboxModel
+from relay import relay_batch
+from utils.enums import TaskStatusEnum
+
+
+@pytest.mark.asyncio
+async def test_relay_batch_removes_only_published_entries(mock_session: MagicMock) -> None:
+    entries = [TaskOutboxModel(id=uuid.uuid4(), task_id=uuid.uuid4(), priority=5) for _ in range(3)]
+    mock_session.__aenter__.return_value = mock_session
+
+    with (
+        patch("relay.get_session_context", AsyncMock(return_value=mock_session)),
+        patch("relay.OutboxService.lock_batch", AsyncMock(return_value=entries)),
+        patch("relay.OutboxService.delete_entries", AsyncMock()) as delete_entries,
+        patch("relay.TaskPublisher.publish_outbox_entries", AsyncMock(return_value=entries[:2])),
+        patch("relay.TaskService.update_tasks_status", AsyncMock()) as update_tasks_status,
+    ):
+        selected = await relay_batch(MagicMock())
+
+    assert selected == 3
+    delete_entries.assert_called_once_with([entry.id for entry in entries[:2]], mock_session)
+    update_tasks_status.assert_called_once_with(
+        [entry.task_id for entry in entries[:2]],
+        mock_session,
+        TaskStatusEnum.PENDING,
+        from_status=TaskStatusEnum.NEW,
+        lease=timedelta(seconds=settings.sweeper.pending_timeout),
+    )
+    mock_session.commit.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_relay_batch_empty_outbox(mock_session: MagicMock) -> None:
+    mock_session.__aenter__.return_value = mock_session
+
+    with (
+        patch("relay.get_session_context", AsyncMock(return_value=mock_session)),
+        patch("relay.OutboxService.lock_batch", AsyncMock(return_value=[])),
+        patch("relay.TaskPublisher.publish_outbox_entries", AsyncMock()) as publish,
+    ):
+        selected = await relay_batch(MagicMock())
+
+    assert selected == 0
+    publish.assert_not_called()
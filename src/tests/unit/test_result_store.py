@@ -0,0 +1,76 @@
+import gzip
+import uuid
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from core.config import ResultStoreConfig
+from schemas.task import TaskResult
+from services.result_store import TaskResultStore
+from utils.compression import accepts_gzip, iter_chunks, iter_gunzip
+from utils.enums import ResultStorageEnum, TaskStatusEnum
+
+
+async def read_all(chunks: object) -> bytes:
+    return b"".join([chunk async for chunk in chunks])
+
+
+@pytest.mark.asyncio
+async def test_offload_keeps_small_results_inline(mock_session: MagicMock) -> None:
+    store = TaskResultStore(ResultStoreConfig(inline_limit=10))
+    mock_session.execute = AsyncMock()
+    small = TaskResult(id=uuid.uuid4(), status=TaskStatusEnum.COMPLETED, result="ok")
+    large = TaskResult(id=uuid.uuid4(), status=TaskStatusEnum.COMPLETED, result="x" * 100)
+
+    offloaded_small, offloaded_large = await store.offload([small, large], mock_session)
+
+    assert offloaded_small.result == "ok"
+    assert offloaded_small.result_size == 2
+    assert offloaded_small.result_ref is None
+    assert offloaded_large.result == ""
+    assert offloaded_large.result_size == 100
+    assert offloaded_large.result_ref == ResultStorageEnum.DATABASE
+    saved = mock_session.execute.call_args.args[1]
+    assert gzip.decompress(saved[0]["payload"]) == b"x" * 100
+
+
+@pytest.mark.asyncio
+async def test_file_storage_round_trip(tmp_path: Path, mock_session: MagicMock) -> None:
+    store = TaskResultStore(
+        ResultStoreConfig(inline_limit=0, storage=ResultStorageEnum.FILESYSTEM, path=str(tmp_path))
+    )
+    payload = "результат " * 10_000
+    task_result = TaskResult(id=uuid.uuid4(), status=TaskStatusEnum.COMPLETED, result=payload)
+
+    (offloaded,) = await store.offload([task_result], mock_session)
+    chunks = await store.open_compressed(offloaded.result_ref, offloaded.id, mock_session)
+
+    assert offloaded.result_ref.startswith(f"{ResultStorageEnum.FILESYSTEM}:")
+    assert (await read_all(iter_gunzip(chunks))).decode() == payload
+
+
+@pytest.mark.asyncio
+async def test_iter_gunzip_decompresses_chunked_stream() -> None:
+    data = b"0123456789" * 1000
+    compressed = gzip.compress(data)
+
+    assert await read_all(iter_gunzip(iter_chunks(compressed, 7))) == data
+
+
+@pytest.mark.parametrize(
+    ("accept_encoding", "expected"),
+    [
+        ("gzip, deflate, br", True),
+        ("br;q=1.0, GZIP;q=0.5", True),
+        ("x-gzip", True),
+        ("*", True),
+        ("gzip;q=0", False),
+        ("gzip;q=0.0, *", False),
+        ("br, *;q=0", False),
+        ("identity", False),
+        ("", False),
+    ],
+)
+def test_accepts_gzip_respects_quality_values(accept_encoding: str, expected: bool) -> None:
+    assert accepts_gzip(accept_encoding) is expected
@@ -0,0 +1,99 @@
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport
+
+from schemas.task import TaskOut, TaskStatusResponse
+from services.task import TASK_OUT_KEYS
+from utils.enums import TaskPriorityEnum, TaskStatusEnum
+from utils.serialization import FastJSONResponse, row_to_dict
+
+# строка get_task_list: колонки TaskOut и created_at для курсора
+TaskRow = namedtuple("TaskRow", [*TASK_OUT_KEYS, "created_at"])
+
+CREATED_AT = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+
+
+def make_rows() -> list[TaskRow]:
+    return [
+        TaskRow(
+            id=uuid.uuid4(),
+            title='Отчёт "квартал" </script>   \x1f emoji 🚀',
+            description="",
+            priority=TaskPriorityEnum.HIGH,
+            task_type="report",
+            status=TaskStatusEnum.COMPLETED,
+            started_at=CREATED_AT + timedelta(microseconds=59334),
+            completed_at=CREATED_AT + timedelta(seconds=5),
+            result="готово\nстрока 2\t\\",
+            result_size=2 ** 40,
+            error="",
+            attempts=1,
+            max_attempts=3,
+            created_at=CREATED_AT,
+        ),
+        TaskRow(
+            id=uuid.uuid4(),
+            title="new",
+            description="описание",
+            priority=TaskPriorityEnum.LOW,
+            task_type="default",
+            status=TaskStatusEnum.NEW,
+            started_at=None,
+            completed_at=None,
+            result="",
+            result_size=0,
+            error="",
+            attempts=0,
+            max_attempts=3,
+            created_at=CREATED_AT,
+        ),
+    ]
+
+
+def build_app(rows: list[TaskRow]) -> FastAPI:
+    """Одни и те же данные через response_model (как раньше) и через FastJSONResponse."""
+    app = FastAPI()
+
+    @app.get("/validated/list", response_model=list[TaskOut])
+    async def validated_list() -> list[TaskRow]:
+        return [TaskOut.model_validate(row._asdict()) for row in rows]
+
+    @app.get("/fast/list", response_class=FastJSONResponse)
+    async def fast_list() -> FastJSONResponse:
+        return FastJSONResponse([row_to_dict(row, TASK_OUT_KEYS) for row in rows])
+
+    @app.get("/validated/detail", response_model=TaskOut)
+    async def validated_detail() -> dict:
+        return rows[0]._asdict()
+
+    @app.get("/fast/detail", response_class=FastJSONResponse)
+    async def fast_detail() -> FastJSONResponse:
+        return FastJSONResponse(TaskOut.model_validate(rows[0]._asdict()))
+
+    @app.get("/validated/statuses", response_model=list[TaskStatusResponse])
+    async def validated_statuses() -> list[dict]:
+        return [{"id": row.id, "status": row.status} for row in rows]
+
+    @app.get("/fast/statuses", response_class=FastJSONResponse)
+    async def fast_statuses() -> FastJSONResponse:
+        return FastJSONResponse([{"id": row.id, "status": row.status} for row in rows])
+
+    return app
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("endpoint", ["list", "detail", "statuses"])
+async def test_fast_json_response_matches_response_model_output(endpoint: str) -> None:
+    app = build_app(make_rows())
+
+    async with httpx.AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        validated = await client.get(f"/validated/{endpoint}")
+        fast = await client.get(f"/fast/{endpoint}")
+
+    assert fast.content == validated.content
+    assert fast.headers["content-type"] == validated.headers["content-type"]
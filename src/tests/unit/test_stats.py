@@ -0,0 +1,58 @@
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from services.stats import TaskStatsService
+from utils.enums import TaskDurationKindEnum, TaskPriorityEnum, TaskStatusEnum
+from utils.stats import bucket_upper_bound, histogram_percentiles
+
+MINUTE = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+
+
+def make_result(rows: list[MagicMock]) -> MagicMock:
+    result = MagicMock()
+    result.all.return_value = rows
+    return result
+
+
+def test_bucket_upper_bound_doubles_every_octave() -> None:
+    assert bucket_upper_bound(-1) == pytest.approx(0.001)
+    assert bucket_upper_bound(39) == pytest.approx(1.024)
+    assert bucket_upper_bound(43) == pytest.approx(2 * bucket_upper_bound(39))
+
+
+def test_histogram_percentiles() -> None:
+    # 90 быстрых задач, 9 средних и одна медленная
+    histogram = {10: 90, 30: 9, 50: 1}
+
+    percentiles = histogram_percentiles(histogram)
+
+    assert percentiles == {0.5: bucket_upper_bound(10), 0.95: bucket_upper_bound(30), 0.99: bucket_upper_bound(30)}
+
+
+def test_histogram_percentiles_empty() -> None:
+    assert histogram_percentiles({}) == {0.5: None, 0.95: None, 0.99: None}
+
+
+@pytest.mark.asyncio
+async def test_get_stats_aggregates_rollups() -> None:
+    counts = [MagicMock(status=TaskStatusEnum.NEW, priority=TaskPriorityEnum.HIGH, count=3)]
+    durations = [
+        MagicMock(minute=MINUTE, kind=TaskDurationKindEnum.WAIT, bucket=20, count=4),
+        MagicMock(minute=MINUTE, kind=TaskDurationKindEnum.RUN, bucket=40, count=3),
+        MagicMock(minute=MINUTE.replace(minute=1), kind=TaskDurationKindEnum.RUN, bucket=44, count=1),
+    ]
+    session = MagicMock(spec=AsyncSession)
+    session.execute = AsyncMock(side_effect=[make_result(counts), make_result(durations)])
+
+    stats = await TaskStatsService.get_stats(session, window=2)
+
+    assert [(item.status, item.count) for item in stats.counts] == [(TaskStatusEnum.NEW, 3)]
+    assert stats.throughput_per_minute == 2
+    assert [point.finished for point in stats.throughput] == [3, 1]
+    assert stats.wait.count == 4
+    assert stats.wait.p50 == bucket_upper_bound(20)
+    assert stats.run.p50 == bucket_upper_bound(40)
+    assert stats.run.p99 == bucket_upper_bound(44)
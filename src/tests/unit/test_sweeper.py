@@ -0,0 +1,100 @@
+import asyncio
+import uuid
+from collections import namedtuple
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from core.consts import DEFAULT_TASK_TYPE, TASKS_DEAD_LETTER_QUEUE, TASKS_QUEUE
+from services.sweeper import TaskSweeperService
+from services.task_leases import TaskLeaseKeeper
+from sweeper import sweep_batch
+from utils.enums import TaskPriorityEnum, TaskStatusEnum
+from utils.ids import new_task_key
+
+StuckRow = namedtuple("StuckRow", ["id", "priority", "task_type", "status", "attempts", "max_attempts"])
+
+
+@pytest.mark.asyncio
+async def test_redispatch_requeues_tasks_and_fails_exhausted(mock_session: MagicMock) -> None:
+    lost = StuckRow(uuid.uuid4(), TaskPriorityEnum.HIGH, DEFAULT_TASK_TYPE, TaskStatusEnum.PENDING, 1, 3)
+    crashed = StuckRow(uuid.uuid4(), TaskPriorityEnum.LOW, "report", TaskStatusEnum.IN_PROGRESS, 2, 3)
+    exhausted = StuckRow(uuid.uuid4(), TaskPriorityEnum.LOW, "report", TaskStatusEnum.IN_PROGRESS, 3, 3)
+    mock_session.execute = AsyncMock()
+
+    requeued_ids, failed_ids = await TaskSweeperService.redispatch([lost, crashed, exhausted], mock_session)
+
+    assert requeued_ids == [lost.id, crashed.id]
+    assert failed_ids == [exhausted.id]
+    outbox_entries = mock_session.execute.call_args_list[-1].args[1]
+    assert [(entry["task_id"], entry["routing_key"]) for entry in outbox_entries] == [
+        (lost.id, TASKS_QUEUE),
+        (crashed.id, "tasks_queue.type.report"),
+        (exhausted.id, TASKS_DEAD_LETTER_QUEUE),
+    ]
+    mock_session.commit.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_redispatch_filters_by_partition_key(mock_session: MagicMock) -> None:
+    task_id, created_at = new_task_key()
+    lost = StuckRow(task_id, TaskPriorityEnum.HIGH, DEFAULT_TASK_TYPE, TaskStatusEnum.PENDING, 1, 3)
+    mock_session.execute = AsyncMock()
+
+    await TaskSweeperService.redispatch([lost], mock_session)
+
+    stmt = mock_session.execute.call_args_list[0].args[0]
+    assert "tasks.created_at = ANY" in str(stmt.compile(dialect=postgresql.dialect()))
+
+
+@pytest.mark.asyncio
+async def test_sweep_batch_commits_redispatched_tasks(mock_session: MagicMock) -> None:
+    tasks = [StuckRow(uuid.uuid4(), TaskPriorityEnum.MEDIUM, DEFAULT_TASK_TYPE, TaskStatusEnum.PENDING, 0, 3)]
+    mock_session.__aenter__.return_value = mock_session
+
+    with (
+        patch("sweeper.get_session_context", AsyncMock(return_value=mock_session)),
+        patch("sweeper.TaskSweeperService.lock_stuck_tasks", AsyncMock(return_value=tasks)),
+        patch("sweeper.TaskSweeperService.redispatch", AsyncMock(return_value=([tasks[0].id], []))) as redispatch,
+    ):
+        selected = await sweep_batch()
+
+    assert selected == 1
+    redispatch.assert_called_once_with(tasks, mock_session)
+    mock_session.commit.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_lease_keeper_renews_held_tasks_in_one_query() -> None:
+    keeper = TaskLeaseKeeper(interval=0.01)
+    task_ids = [uuid.uuid4(), uuid.uuid4()]
+
+    with patch.object(keeper, "renew", AsyncMock()) as renew:
+        async with keeper.hold(task_ids):
+            await asyncio.sleep(0.05)
+        assert set(renew.call_args.args[0]) == set(task_ids)
+        renew.reset_mock()
+        await asyncio.sleep(0.03)
+        await keeper.close()
+
+    assert not keeper.task_ids
+    renew.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_lease_keeper_reports_lost_leases() -> None:
+    on_lost = MagicMock()
+    keeper = TaskLeaseKeeper(interval=1, on_lost=on_lost)
+    renewed_id, cancelled_id = uuid.uuid4(), uuid.uuid4()
+    keeper.task_ids.update([renewed_id, cancelled_id])
+    mock_session = MagicMock()
+    mock_session.__aenter__.return_value = mock_session
+
+    with (
+        patch("services.task_leases.get_session_context", AsyncMock(return_value=mock_session)),
+        patch("services.task_leases.TaskService.renew_leases", AsyncMock(return_value=[renewed_id])),
+    ):
+        await keeper.renew([renewed_id, cancelled_id])
+
+    on_lost.assert_called_once_with([cancelled_id])
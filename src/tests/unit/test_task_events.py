@@ -0,0 +1,60 @@
+import asyncio
+import uuid
+from collections import namedtuple
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from schemas.task import TaskStatusResponse
+from services.task_events import TaskEventHub, TaskEventService, task_event_hub
+from utils.enums import TaskStatusEnum
+
+StatusRow = namedtuple("StatusRow", ["id", "status"])
+
+
+def test_hub_delivers_events_to_matching_watchers() -> None:
+    hub = TaskEventHub()
+    task_id, other_id = uuid.uuid4(), uuid.uuid4()
+
+    with hub.watch([task_id]) as task_events, hub.watch() as all_events:
+        hub.publish(TaskStatusResponse(id=task_id, status=TaskStatusEnum.IN_PROGRESS))
+        hub.publish(TaskStatusResponse(id=other_id, status=TaskStatusEnum.COMPLETED))
+
+        assert task_events.qsize() == 1
+        assert all_events.qsize() == 2
+
+    assert not hub.watchers
+
+
+@pytest.mark.asyncio
+async def test_wait_for_task_returns_on_terminal_event(mock_session: MagicMock) -> None:
+    task_id = uuid.uuid4()
+
+    async def complete_task() -> None:
+        await asyncio.sleep(0.01)
+        task_event_hub.publish(TaskStatusResponse(id=task_id, status=TaskStatusEnum.IN_PROGRESS))
+        task_event_hub.publish(TaskStatusResponse(id=task_id, status=TaskStatusEnum.COMPLETED))
+
+    with patch(
+        "services.task_events.TaskService.get_task_status",
+        AsyncMock(return_value=StatusRow(task_id, TaskStatusEnum.PENDING)),
+    ):
+        asyncio.create_task(complete_task())
+        task_status = await TaskEventService.wait_for_task(task_id, mock_session, timeout=1)
+
+    assert task_status.status == TaskStatusEnum.COMPLETED
+    mock_session.close.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_wait_for_task_rereads_status_on_timeout(mock_session: MagicMock) -> None:
+    task_id = uuid.uuid4()
+    get_task_status = AsyncMock(
+        side_effect=[StatusRow(task_id, TaskStatusEnum.PENDING), StatusRow(task_id, TaskStatusEnum.IN_PROGRESS)]
+    )
+
+    with patch("services.task_events.TaskService.get_task_status", get_task_status):
+        task_status = await TaskEventService.wait_for_task(task_id, mock_session, timeout=0.01)
+
+    assert task_status.status == TaskStatusEnum.IN_PROGRESS
+    assert get_task_status.call_count == 2
@@ -1,15 +1,21 @@
-from unittest.mock import AsyncMock, MagicMock
+import hashlib
+import uuid
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from fastapi import HTTPException
 from pydantic import ValidationError
-from starlette.status import HTTP_404_NOT_FOUND
+from starlette.status import HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND, HTTP_422_UNPROCESSABLE_ENTITY
 
+from core.consts import PRIORITY_MAP
 from models import TaskModel
-from schemas.task import TaskIn, TaskListParams
-from services.task import TaskService
+from schemas.task import TaskIn, TaskListParams, TaskResult
+from services.task import FINISH_LEGACY_TASKS_SQL, FINISH_TASKS_SQL, TaskService
 from tests.unit.conftest import make_mock_session
 from utils.enums import ClientErrorMessage, TaskStatusEnum
+from utils.ids import new_task_key, uuid7, uuid7_time
+from utils.pagination import encode_cursor
 
 
 @pytest.mark.asyncio
@@ -20,10 +26,70 @@ async def test_create_task(mock_session: MagicMock, task_data: TaskIn) -> None:
     assert task.description == task_data.description
     assert task.priority == task_data.priority
 
-    mock_session.add.assert_called_once_with(task)
+    mock_session.add_all.assert_called_once()
+    task_added, outbox_entry = mock_session.add_all.call_args.args[0]
+    assert task_added is task
+    assert outbox_entry.task_id == task.id
+    assert outbox_entry.priority == PRIORITY_MAP[task.priority]
     mock_session.commit.assert_called_once()
 
 
+@pytest.mark.asyncio
+async def test_create_task_idempotent_creates_task_once(mock_session: MagicMock, task_data: TaskIn) -> None:
+    claimed = MagicMock()
+    claimed.scalar_one_or_none.return_value = uuid.uuid4()
+    mock_session.execute = AsyncMock(return_value=claimed)
+
+    task, created = await TaskService.create_task_idempotent(task_data, "key-1", mock_session)
+
+    assert created is True
+    insert_stmt = mock_session.execute.call_args.args[0]
+    assert "ON CONFLICT (key) DO NOTHING" in str(insert_stmt)
+    params = insert_stmt.compile().params
+    assert (task.id, task.created_at) == (params["id"], params["created_at"])
+    assert uuid7_time(task.id) == task.created_at
+    task_added, outbox_entry = mock_session.add_all.call_args.args[0]
+    assert task_added is task
+    assert outbox_entry.task_id == task.id
+    mock_session.commit.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_create_task_idempotent_returns_existing_task(
+    mock_session: MagicMock, task_data: TaskIn, task_model: TaskModel
+) -> None:
+    request_hash = hashlib.sha256(task_data.model_dump_json().encode()).hexdigest()
+    existing_key = MagicMock(id=task_model.id, created_at=datetime.now(timezone.utc), request_hash=request_hash)
+    conflict, key_result, task_result = MagicMock(), MagicMock(), MagicMock()
+    conflict.scalar_one_or_none.return_value = None
+    key_result.scalar_one.return_value = existing_key
+    task_result.scalar_one_or_none.return_value = task_model
+    mock_session.execute = AsyncMock(side_effect=[conflict, key_result, task_result])
+
+    task, created = await TaskService.create_task_idempotent(task_data, "key-1", mock_session)
+
+    assert created is False
+    assert task is task_model
+    mock_session.add_all.assert_not_called()
+    mock_session.commit.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_create_task_idempotent_rejects_key_reuse(mock_session: MagicMock, task_data: TaskIn) -> None:
+    existing_key = MagicMock(id=uuid.uuid4(), created_at=datetime.now(timezone.utc), request_hash="other")
+    conflict, key_result = MagicMock(), MagicMock()
+    conflict.scalar_one_or_none.return_value = None
+    key_result.scalar_one.return_value = existing_key
+    mock_session.execute = AsyncMock(side_effect=[conflict, key_result])
+
+    with pytest.raises(HTTPException) as exc_info:
+        await TaskService.create_task_idempotent(task_data, "key-1", mock_session)
+
+    assert exc_info.value.status_code == HTTP_422_UNPROCESSABLE_ENTITY
+    assert exc_info.value.detail == ClientErrorMessage.IDEMPOTENCY_KEY_REUSED_ERROR
+    mock_session.add_all.assert_not_called()
+
+
 @pytest.mark.asyncio
 async def test_create_task_invalid_priority(mock_session: MagicMock) -> None:
     invalid_data = {"title": "", "description": "This is a test task.", "priority": "HARD"}
@@ -44,16 +110,35 @@ async def test_create_task_no_title(mock_session: MagicMock) -> None:
     assert "title" in str(exc_info.value)
 
 
+@pytest.mark.asyncio
+async def test_create_tasks(task_data: TaskIn) -> None:
+    task_list = [TaskModel(id=uuid.uuid4(), **task_data.model_dump()) for _ in range(2)]
+    mock_session = make_mock_session(scalars_all=task_list)
+
+    result = await TaskService.create_tasks([task_data, task_data], mock_session)
+
+    assert result == task_list
+    assert mock_session.execute.call_count == 2
+    rows = mock_session.execute.call_args_list[0].args[1]
+    assert [{key: row[key] for key in task_data.model_dump()} for row in rows] == [task_data.model_dump()] * 2
+    assert all(uuid7_time(row["id"]) == row["created_at"] for row in rows)
+    assert [entry["task_id"] for entry in mock_session.execute.call_args_list[1].args[1]] == [
+        task.id for task in task_list
+    ]
+    mock_session.commit.assert_called_once()
+
+
 @pytest.mark.asyncio
 async def test_get_task_list(task_list_params: TaskListParams) -> None:
     task_list = [
         TaskModel(title="Test Task", description="This is a test task.", priority="MEDIUM"),
     ]
-    mock_session = make_mock_session(scalars_all=task_list)
+    mock_session = make_mock_session(rows_all=task_list)
     result = await TaskService.get_task_list(mock_session, task_list_params)
 
     assert result == task_list
     mock_session.execute.assert_called_once()
+    assert "tasks.created_at" in str(mock_session.execute.call_args.args[0])
 
 
 @pytest.mark.asyncio
@@ -61,7 +146,7 @@ async def test_get_task_list_filtered(task_list_params: TaskListParams) -> None:
     task_2 = TaskModel(title="filtered", description="This is a test task.", priority="HIGH")
     task_list = [task_2]
 
-    mock_session = make_mock_session(scalars_all=task_list)
+    mock_session = make_mock_session(rows_all=task_list)
     params = task_list_params.model_copy()
     params.title = "filtered"
     result = await TaskService.get_task_list(mock_session, params)
@@ -74,7 +159,7 @@ async def test_get_task_list_filtered(task_list_params: TaskListParams) -> None:
 @pytest.mark.asyncio
 async def test_get_task_list_empty(task_list_params: TaskListParams) -> None:
     task_list = []
-    mock_session = make_mock_session(scalars_all=task_list)
+    mock_session = make_mock_session(rows_all=task_list)
 
     result = await TaskService.get_task_list(mock_session, task_list_params)
 
@@ -82,6 +167,32 @@ async def test_get_task_list_empty(task_list_params: TaskListParams) -> None:
     mock_session.execute.assert_called_once()
 
 
+@pytest.mark.asyncio
+async def test_get_task_list_by_cursor(task_list_params: TaskListParams, task_model: TaskModel) -> None:
+    mock_session = make_mock_session(rows_all=[task_model])
+    params = task_list_params.model_copy(deep=True)
+    params.pagination.cursor = encode_cursor(datetime.now(timezone.utc), uuid.uuid4())
+
+    await TaskService.get_task_list(mock_session, params)
+
+    stmt = str(mock_session.execute.call_args.args[0])
+    assert "(tasks.created_at, tasks.id) >" in stmt
+    assert "OFFSET" not in stmt
+
+
+@pytest.mark.asyncio
+async def test_get_task_list_invalid_cursor(task_list_params: TaskListParams) -> None:
+    mock_session = make_mock_session(rows_all=[])
+    params = task_list_params.model_copy(deep=True)
+    params.pagination.cursor = "invalid"
+
+    with pytest.raises(HTTPException) as exc_info:
+        await TaskService.get_task_list(mock_session, params)
+
+    assert exc_info.value.status_code == HTTP_400_BAD_REQUEST
+    mock_session.execute.assert_not_called()
+
+
 @pytest.mark.asyncio
 async def test_get_task_by_id(task_model: TaskModel) -> None:
     mock_session = make_mock_session(scalars_first=task_model)
@@ -92,6 +203,30 @@ async def test_get_task_by_id(task_model: TaskModel) -> None:
     mock_session.execute.assert_called_once()
 
 
+def test_new_task_key_encodes_created_at_in_id() -> None:
+    task_id, created_at = new_task_key()
+
+    assert task_id.version == 7
+    assert uuid7_time(task_id) == created_at
+    assert uuid7_time(str(task_id)) == created_at
+    assert uuid7_time(uuid.uuid4()) is None
+    assert uuid7(created_at) != task_id
+    # метка времени после 9999 года не переводится в datetime
+    assert uuid7_time("ffffffff-ffff-7fff-bfff-ffffffffffff") is None
+
+
+@pytest.mark.asyncio
+async def test_get_task_by_id_filters_partition_by_id_time(task_model: TaskModel) -> None:
+    mock_session = make_mock_session(scalars_first=task_model)
+    task_id, created_at = new_task_key()
+
+    await TaskService.get_task_by_id(task_id, mock_session)
+
+    stmt = mock_session.execute.call_args.args[0]
+    assert "tasks.created_at =" in str(stmt)
+    assert created_at in stmt.compile().params.values()
+
+
 @pytest.mark.asyncio
 async def test_get_task_by_id_not_found(empty_mock_session: AsyncMock) -> None:
     with pytest.raises(HTTPException) as exc_info:
@@ -103,11 +238,153 @@ async def test_get_task_by_id_not_found(empty_mock_session: AsyncMock) -> None:
 
 
 @pytest.mark.asyncio
-async def test_update_task_status(task_model: TaskModel) -> None:
-    mock_session = make_mock_session(scalars_first=task_model)
+async def test_get_task_status(mock_session: MagicMock, task_model: TaskModel) -> None:
+    row = (task_model.id, TaskStatusEnum.PENDING)
+    mock_session.execute = AsyncMock(return_value=MagicMock(first=MagicMock(return_value=row)))
+
+    result = await TaskService.get_task_status(task_model.id, mock_session)
+
+    assert result == row
+    stmt = mock_session.execute.call_args.args[0]
+    assert [column.key for column in stmt.selected_columns] == ["id", "status"]
+
+
+@pytest.mark.asyncio
+async def test_get_task_status_not_found(mock_session: MagicMock, task_model: TaskModel) -> None:
+    mock_session.execute = AsyncMock(return_value=MagicMock(first=MagicMock(return_value=None)))
+
+    with pytest.raises(HTTPException) as exc_info:
+        await TaskService.get_task_status(task_model.id, mock_session)
+
+    assert exc_info.value.status_code == HTTP_404_NOT_FOUND
 
-    updated_task = await TaskService.update_task_status(task_model.id, mock_session, TaskStatusEnum.COMPLETED.value)
 
-    assert updated_task.status == TaskStatusEnum.COMPLETED
+@pytest.mark.asyncio
+async def test_get_task_statuses(mock_session: MagicMock, task_model: TaskModel) -> None:
+    rows = [(task_model.id, TaskStatusEnum.NEW)]
+    mock_session.execute = AsyncMock(return_value=MagicMock(all=MagicMock(return_value=rows)))
+
+    result = await TaskService.get_task_statuses([task_model.id, uuid.uuid4()], mock_session)
+
+    assert result == rows
+    assert "= ANY" in str(mock_session.execute.call_args.args[0])
     mock_session.execute.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_update_tasks_status(task_model: TaskModel) -> None:
+    mock_session = make_mock_session(scalars_all=[task_model.id])
+
+    updated_ids = await TaskService.update_tasks_status([task_model.id], mock_session, TaskStatusEnum.PENDING)
+
+    assert updated_ids == [task_model.id]
+    mock_session.execute.assert_called_once()
+    assert "pg_notify" in str(mock_session.execute.call_args.args[0])
     mock_session.commit.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_update_tasks_status_nothing_updated(task_model: TaskModel) -> None:
+    mock_session = make_mock_session(scalars_all=[])
+
+    updated_ids = await TaskService.update_tasks_status([task_model.id], mock_session, TaskStatusEnum.PENDING)
+
+    assert updated_ids == []
+    mock_session.execute.assert_called_once()
+    mock_session.commit.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_update_tasks_status_from_status(task_model: TaskModel) -> None:
+    mock_session = make_mock_session(scalars_all=[])
+
+    await TaskService.update_tasks_status(
+        [task_model.id], mock_session, TaskStatusEnum.PENDING, from_status=TaskStatusEnum.NEW
+    )
+
+    stmt = mock_session.execute.call_args_list[0].args[0]
+    assert "tasks.status = :status_1" in str(stmt)
+
+
+@pytest.mark.asyncio
+async def test_update_tasks_status_empty(mock_session: MagicMock) -> None:
+    await TaskService.update_tasks_status([], mock_session, TaskStatusEnum.PENDING)
+
+    mock_session.execute.assert_not_called()
+    mock_session.commit.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_claim_task(mock_session: MagicMock, task_model: TaskModel) -> None:
+    row = (task_model.id, TaskStatusEnum.IN_PROGRESS)
+    mock_session.execute = AsyncMock(return_value=MagicMock(first=MagicMock(return_value=row)))
+
+    result = await TaskService.claim_task(task_model.id, mock_session)
+
+    assert result == row
+    stmt = str(mock_session.execute.call_args.args[0])
+    assert "tasks.status IN" in stmt
+    assert "pg_notify" in stmt
+    mock_session.execute.assert_called_once()
+    mock_session.commit.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_claim_task_not_available(mock_session: MagicMock, task_model: TaskModel) -> None:
+    mock_session.execute = AsyncMock(return_value=MagicMock(first=MagicMock(return_value=None)))
+
+    result = await TaskService.claim_task(task_model.id, mock_session)
+
+    assert result is None
+
+
+@pytest.mark.asyncio
+async def test_finish_tasks() -> None:
+    results = [
+        TaskResult(id=uuid.uuid4(), status=TaskStatusEnum.COMPLETED, result="ok"),
+        TaskResult(id=uuid.uuid4(), status=TaskStatusEnum.FAILED, error="boom"),
+    ]
+    mock_session = make_mock_session(scalars_all=[results[0].id])
+
+    finished_ids = await TaskService.finish_tasks(results, mock_session)
+
+    assert finished_ids == [results[0].id]
+    params = mock_session.execute.call_args.args[1]
+    assert params["ids"] == [result.id for result in results]
+    assert params["statuses"] == ["COMPLETED", "FAILED"]
+    assert params["errors"] == ["", "boom"]
+    # старые id (UUIDv4) не несут created_at: обновление идёт по всем секциям
+    assert mock_session.execute.call_args.args[0] is FINISH_LEGACY_TASKS_SQL
+    mock_session.execute.assert_called_once()
+    mock_session.commit.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_finish_tasks_deletes_offloaded_results_of_skipped_tasks() -> None:
+    results = [
+        TaskResult(id=uuid.uuid4(), status=TaskStatusEnum.COMPLETED, result_ref="database:finished"),
+        TaskResult(id=uuid.uuid4(), status=TaskStatusEnum.COMPLETED, result_ref="database:cancelled"),
+        TaskResult(id=uuid.uuid4(), status=TaskStatusEnum.FAILED, error="boom"),
+    ]
+    mock_session = make_mock_session(scalars_all=[results[0].id])
+
+    with (
+        patch("services.task.result_store.offload", AsyncMock(return_value=results)),
+        patch("services.task.result_store.delete", AsyncMock()) as delete,
+    ):
+        await TaskService.finish_tasks(results, mock_session)
+
+    delete.assert_called_once_with({results[1].id: "database:cancelled"}, mock_session)
+    mock_session.commit.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_finish_tasks_filters_partitions_by_id_time() -> None:
+    keys = [new_task_key(), new_task_key()]
+    results = [TaskResult(id=task_id, status=TaskStatusEnum.COMPLETED, result="ok") for task_id, _ in keys]
+    mock_session = make_mock_session(scalars_all=[])
+
+    await TaskService.finish_tasks(results, mock_session)
+
+    assert mock_session.execute.call_args.args[0] is FINISH_TASKS_SQL
+    assert mock_session.execute.call_args.args[1]["created_at"] == sorted({created_at for _, created_at in keys})
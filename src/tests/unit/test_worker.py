@@ -0,0 +1,366 @@
+import asyncio
+import json
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from prometheus_client import REGISTRY
+from pydantic import ValidationError
+
+from core.config import RetryConfig
+from core.consts import DEFAULT_TASK_TYPE
+from infra.executor import CpuExecutor
+from messaging.publisher import TaskPublisher
+from schemas.task import TaskResult, TaskStatusResponse
+from services.running_tasks import RunningTaskRegistry
+from services.task_results import TaskResultWriter
+from utils.enums import TaskStatusEnum
+from worker import (
+    BatchTaskConsumer,
+    TaskConsumer,
+    execute_task,
+    process_batch,
+    process_task,
+    publish_followups,
+    running_tasks,
+)
+
+CREATED_AT = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+STARTED_AT = CREATED_AT + timedelta(seconds=3)
+
+
+@pytest.mark.asyncio
+async def test_consumer_limits_concurrency() -> None:
+    running = 0
+    max_running = 0
+
+    async def fake_process_task(message: MagicMock) -> None:
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    consumer = TaskConsumer(concurrency=2)
+    with patch("worker.process_task", fake_process_task):
+        await asyncio.gather(*(consumer.on_message(MagicMock()) for _ in range(6)))
+
+    assert max_running == 2
+    assert not consumer.in_flight
+
+
+@pytest.mark.asyncio
+async def test_consumer_drain_waits_for_in_flight() -> None:
+    finished = asyncio.Event()
+
+    async def fake_process_task(message: MagicMock) -> None:
+        await asyncio.sleep(0.01)
+        finished.set()
+
+    consumer = TaskConsumer(concurrency=1)
+    with patch("worker.process_task", fake_process_task):
+        asyncio.create_task(consumer.on_message(MagicMock()))
+        await asyncio.sleep(0)
+        await consumer.drain(timeout=1)
+
+    assert finished.is_set()
+
+
+@pytest.mark.asyncio
+async def test_cpu_executor_runs_off_loop() -> None:
+    executor = CpuExecutor()
+
+    result = await executor.run(sum, [1, 2, 3])
+
+    assert result == 6
+
+
+@pytest.mark.asyncio
+async def test_cpu_executor_runs_in_spawned_process() -> None:
+    executor = CpuExecutor()
+    executor.start(max_workers=1)
+    try:
+        pid = await executor.run(os.getpid)
+    finally:
+        executor.shutdown()
+
+    assert pid != os.getpid()
+
+
+@pytest.mark.asyncio
+async def test_result_writer_batches_concurrent_results(mock_session: MagicMock) -> None:
+    mock_session.__aenter__.return_value = mock_session
+    writer = TaskResultWriter(batch_size=10, flush_interval=0.01)
+    results = [TaskResult(id=uuid.uuid4(), status=TaskStatusEnum.COMPLETED) for _ in range(3)]
+
+    with (
+        patch("services.task_results.get_session_context", AsyncMock(return_value=mock_session)),
+        patch("services.task_results.TaskService.finish_tasks", AsyncMock()) as finish_tasks,
+    ):
+        await asyncio.gather(*(writer.write(result) for result in results))
+
+    finish_tasks.assert_called_once_with(results, mock_session)
+
+
+@pytest.mark.asyncio
+async def test_result_writer_propagates_errors(mock_session: MagicMock) -> None:
+    mock_session.__aenter__.return_value = mock_session
+    writer = TaskResultWriter(batch_size=1, flush_interval=0.01)
+
+    with (
+        patch("services.task_results.get_session_context", AsyncMock(return_value=mock_session)),
+        patch("services.task_results.TaskService.finish_tasks", AsyncMock(side_effect=RuntimeError("db is down"))),
+    ):
+        with pytest.raises(RuntimeError):
+            await writer.write(TaskResult(id=uuid.uuid4(), status=TaskStatusEnum.COMPLETED))
+
+
+@pytest.mark.asyncio
+async def test_process_task_skips_unavailable_task(mock_session: MagicMock) -> None:
+    mock_session.__aenter__.return_value = mock_session
+    message = MagicMock(body=json.dumps({"task_id": str(uuid.uuid4())}).encode(), ack=AsyncMock())
+
+    with (
+        patch("worker.get_session_context", AsyncMock(return_value=mock_session)),
+        patch("worker.TaskService.claim_task", AsyncMock(return_value=None)),
+        patch("worker.result_writer.write", AsyncMock()) as write,
+    ):
+        await process_task(message)
+
+    message.ack.assert_called_once()
+    write.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_process_task_writes_result_and_acks(mock_session: MagicMock) -> None:
+    mock_session.__aenter__.return_value = mock_session
+    task_id = uuid.uuid4()
+    message = MagicMock(body=json.dumps({"task_id": str(task_id)}).encode(), ack=AsyncMock())
+    task = MagicMock(id=task_id, task_type=DEFAULT_TASK_TYPE, created_at=CREATED_AT, started_at=STARTED_AT)
+
+    with (
+        patch("worker.get_session_context", AsyncMock(return_value=mock_session)),
+        patch("worker.TaskService.claim_task", AsyncMock(return_value=task)),
+        patch("worker.asyncio.sleep", AsyncMock()),
+        patch("worker.result_writer.write", AsyncMock()) as write,
+        patch("worker.publish_followups", AsyncMock(return_value=[])),
+    ):
+        await process_task(message)
+
+    task_result = write.call_args.args[0]
+    assert task_result.id == task_id
+    assert task_result.status == TaskStatusEnum.COMPLETED
+    message.ack.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_process_task_requeues_when_retry_is_not_published(mock_session: MagicMock) -> None:
+    mock_session.__aenter__.return_value = mock_session
+    task_id = uuid.uuid4()
+    message = make_message(task_id)
+    task = MagicMock(id=task_id, task_type=DEFAULT_TASK_TYPE, created_at=CREATED_AT, started_at=STARTED_AT)
+
+    with (
+        patch("worker.get_session_context", AsyncMock(return_value=mock_session)),
+        patch("worker.TaskService.claim_task", AsyncMock(return_value=task)),
+        patch("worker.asyncio.sleep", AsyncMock()),
+        patch("worker.result_writer.write", AsyncMock()),
+        patch("worker.publish_followups", AsyncMock(return_value=[task_id])),
+    ):
+        await process_task(message)
+
+    message.nack.assert_called_once_with(requeue=True)
+    message.ack.assert_not_called()
+
+
+
+@pytest.mark.asyncio
+async def test_process_task_stops_on_cancel_signal(mock_session: MagicMock) -> None:
+    mock_session.__aenter__.return_value = mock_session
+    task_id = uuid.uuid4()
+    message = MagicMock(body=json.dumps({"task_id": str(task_id)}).encode(), ack=AsyncMock())
+    task = MagicMock(id=task_id, task_type=DEFAULT_TASK_TYPE)
+    started = asyncio.Event()
+
+    async def execute_forever(claimed_task: MagicMock) -> TaskResult:
+        started.set()
+        await asyncio.Event().wait()
+
+    with (
+        patch("worker.get_session_context", AsyncMock(return_value=mock_session)),
+        patch("worker.TaskService.claim_task", AsyncMock(return_value=task)),
+        patch("worker.execute_task", execute_forever),
+        patch("worker.result_writer.write", AsyncMock()) as write,
+    ):
+        processing = asyncio.create_task(process_task(message))
+        await started.wait()
+        running_tasks.on_task_event(TaskStatusResponse(id=task_id, status=TaskStatusEnum.CANCELLED))
+        await asyncio.wait_for(processing, timeout=1)
+
+    write.assert_not_called()
+    message.ack.assert_called_once()
+    assert task_id not in running_tasks.executions
+
+
+@pytest.mark.asyncio
+async def test_running_task_registry_propagates_worker_shutdown() -> None:
+    registry = RunningTaskRegistry()
+    task_id = uuid.uuid4()
+
+    handler = asyncio.create_task(registry.run(task_id, asyncio.Event().wait()))
+    await asyncio.sleep(0)
+    handler.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await handler
+    assert not registry.executions
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "attempts, expected_status",
+    [(1, TaskStatusEnum.PENDING), (3, TaskStatusEnum.FAILED)],
+)
+async def test_execute_task_failure_respects_max_attempts(attempts: int, expected_status: TaskStatusEnum) -> None:
+    task = MagicMock(
+        id=uuid.uuid4(),
+        task_type=DEFAULT_TASK_TYPE,
+        attempts=attempts,
+        max_attempts=3,
+        created_at=CREATED_AT,
+        started_at=STARTED_AT,
+    )
+    labels = {"task_type": DEFAULT_TASK_TYPE}
+    failures = REGISTRY.get_sample_value("task_failures_total", labels) or 0
+    waits = REGISTRY.get_sample_value("task_queue_wait_seconds_count", labels) or 0
+
+    with patch("worker.asyncio.sleep", AsyncMock(side_effect=RuntimeError("boom"))):
+        task_result = await execute_task(task)
+
+    assert task_result.status == expected_status
+    assert task_result.error == "boom"
+    assert REGISTRY.get_sample_value("task_failures_total", labels) == failures + 1
+    assert REGISTRY.get_sample_value("task_queue_wait_seconds_count", labels) == waits + 1
+    assert REGISTRY.get_sample_value("tasks_in_flight", labels) == 0
+
+
+@pytest.mark.asyncio
+async def test_publish_followups_routes_failures() -> None:
+    retry_task = MagicMock(id=uuid.uuid4())
+    dead_task = MagicMock(id=uuid.uuid4())
+    executed = [
+        (MagicMock(), TaskResult(id=uuid.uuid4(), status=TaskStatusEnum.COMPLETED)),
+        (retry_task, TaskResult(id=retry_task.id, status=TaskStatusEnum.PENDING, error="boom")),
+        (dead_task, TaskResult(id=dead_task.id, status=TaskStatusEnum.FAILED, error="boom")),
+    ]
+    channel_pool = MagicMock()
+    channel_pool.channel.return_value.__aenter__.return_value = channel = MagicMock()
+
+    with (
+        patch("worker.rabbitmq.channel_pool", channel_pool),
+        patch("worker.TaskPublisher.publish_retry", AsyncMock()) as publish_retry,
+        patch("worker.TaskPublisher.publish_dead_letter", AsyncMock()) as publish_dead_letter,
+    ):
+        unpublished = await publish_followups(executed)
+
+    publish_retry.assert_called_once_with(retry_task, channel)
+    publish_dead_letter.assert_called_once_with(dead_task, "boom", channel)
+    assert unpublished == []
+
+
+@pytest.mark.asyncio
+async def test_publish_followups_returns_unpublished_retries() -> None:
+    retry_task = MagicMock(id=uuid.uuid4())
+    other_retry_task = MagicMock(id=uuid.uuid4())
+    dead_task = MagicMock(id=uuid.uuid4())
+    executed = [
+        (retry_task, TaskResult(id=retry_task.id, status=TaskStatusEnum.PENDING, error="boom")),
+        (other_retry_task, TaskResult(id=other_retry_task.id, status=TaskStatusEnum.PENDING, error="boom")),
+        (dead_task, TaskResult(id=dead_task.id, status=TaskStatusEnum.FAILED, error="boom")),
+    ]
+    channel_pool = MagicMock()
+
+    with (
+        patch("worker.rabbitmq.channel_pool", channel_pool),
+        patch("worker.TaskPublisher.publish_retry", AsyncMock(side_effect=[ConnectionError(), None])),
+        patch("worker.TaskPublisher.publish_dead_letter", AsyncMock(side_effect=ConnectionError())),
+    ):
+        assert await publish_followups(executed) == [retry_task.id]
+
+    channel_pool.channel.side_effect = ConnectionError()
+    with patch("worker.rabbitmq.channel_pool", channel_pool):
+        assert await publish_followups(executed) == [retry_task.id, other_retry_task.id]
+
+
+def make_message(task_id: uuid.UUID) -> MagicMock:
+    message = MagicMock(body=json.dumps({"task_id": str(task_id)}).encode(), processed=False)
+
+    async def settle(*args: object, **kwargs: object) -> None:
+        message.processed = True
+
+    message.ack = AsyncMock(side_effect=settle)
+    message.nack = AsyncMock(side_effect=settle)
+    return message
+
+
+@pytest.mark.asyncio
+async def test_process_batch_claims_and_finishes_in_one_query(mock_session: MagicMock) -> None:
+    mock_session.__aenter__.return_value = mock_session
+    task_ids = [uuid.uuid4(), uuid.uuid4()]
+    messages = [make_message(task_id) for task_id in task_ids]
+    results = [
+        TaskResult(id=task_ids[0], status=TaskStatusEnum.COMPLETED),
+        TaskResult(id=task_ids[1], status=TaskStatusEnum.FAILED, error="boom"),
+    ]
+
+    with (
+        patch("worker.get_session_context", AsyncMock(return_value=mock_session)),
+        patch("worker.TaskService.claim_tasks", AsyncMock(return_value=results)) as claim_tasks,
+        patch("worker.execute_task", AsyncMock(side_effect=results)),
+        patch("worker.TaskService.finish_tasks", AsyncMock()) as finish_tasks,
+        patch("worker.publish_followups", AsyncMock(return_value=[task_ids[1]])) as publish_followups_mock,
+    ):
+        await process_batch(messages)
+
+    claim_tasks.assert_called_once_with([str(task_id) for task_id in task_ids], mock_session)
+    finish_tasks.assert_called_once_with(results, mock_session)
+    publish_followups_mock.assert_called_once_with(list(zip(results, results)))
+    messages[0].nack.assert_not_called()
+    messages[1].nack.assert_called_once_with(requeue=True)
+
+
+@pytest.mark.asyncio
+async def test_batch_consumer_acks_batch_with_single_frame() -> None:
+    messages = [make_message(uuid.uuid4()) for _ in range(3)]
+    consumer = BatchTaskConsumer(concurrency=10, batch_size=3, batch_timeout=1)
+
+    with patch("worker.process_batch", AsyncMock()) as process_batch_mock:
+        for message in messages:
+            await consumer.on_message(message)
+        await consumer.drain(timeout=1)
+
+    process_batch_mock.assert_called_once_with(messages)
+    messages[-1].ack.assert_called_once_with(multiple=True)
+    messages[0].ack.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_batch_consumer_flushes_on_timeout() -> None:
+    message = make_message(uuid.uuid4())
+    consumer = BatchTaskConsumer(concurrency=10, batch_size=100, batch_timeout=0.01)
+
+    with patch("worker.process_batch", AsyncMock()) as process_batch_mock:
+        await consumer.on_message(message)
+        await asyncio.sleep(0.05)
+        await consumer.drain(timeout=1)
+
+    process_batch_mock.assert_called_once_with([message])
+    message.ack.assert_called_once_with(multiple=True)
+
+
+def test_retry_delay_uses_last_delay_for_later_attempts() -> None:
+    with patch("messaging.publisher.settings.retry", RetryConfig(delays=[100, 500])):
+        assert [TaskPublisher.get_retry_delay(attempts) for attempts in (1, 2, 5)] == [100, 500, 500]
+    with pytest.raises(ValidationError):
+        RetryConfig(delays=[])
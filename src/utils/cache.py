@@ -0,0 +1,60 @@
+import time
+from collections import OrderedDict
+from typing import Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """LRU-кэш с ограничением времени жизни записей, рассчитан на один event loop."""
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.items: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        # поколения ключей, которые сейчас читаются из базы: ключ -> (поколение, срок)
+        # инвалидация ключа отбрасывает только его чтения, а не все заполнения кэша
+        self.reads: OrderedDict[K, tuple[int, float]] = OrderedDict()
+
+    def get(self, key: K) -> V | None:
+        item = self.items.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self.items[key]
+            return None
+        self.items.move_to_end(key)
+        return value
+
+    def generation(self, key: K) -> int:
+        """Отмечает начало чтения key из базы; результат передаётся в set."""
+        now = time.monotonic()
+        # чтения старше ttl забываются: их set будет отброшен, а размер словаря ограничен
+        while self.reads and next(iter(self.reads.values()))[1] < now:
+            self.reads.popitem(last=False)
+        generation = self.reads[key][0] if key in self.reads else 0
+        self.reads[key] = (generation, now + self.ttl)
+        self.reads.move_to_end(key)
+        return generation
+
+    def set(self, key: K, value: V, generation: int | None = None) -> None:
+        if generation is not None:
+            read = self.reads.get(key)
+            if read is None or read[0] != generation:
+                return
+        self.items[key] = (time.monotonic() + self.ttl, value)
+        self.items.move_to_end(key)
+        while len(self.items) > self.maxsize:
+            self.items.popitem(last=False)
+
+    def invalidate(self, key: K) -> None:
+        self.items.pop(key, None)
+        if key in self.reads:
+            generation, deadline = self.reads[key]
+            self.reads[key] = (generation + 1, deadline)
+
+    def clear(self) -> None:
+        self.items.clear()
+        self.reads.clear()
@@ -0,0 +1,47 @@
+import gzip
+import zlib
+from typing import AsyncIterator
+
+
+def gzip_compress(data: bytes, level: int) -> bytes:
+    # mtime=0: одинаковые данные дают одинаковые байты
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Разбирает Accept-Encoding с учётом q-значений: gzip;q=0 - отказ, * действует, если gzip не указан явно."""
+    qualities: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, *params = (part.strip() for part in item.split(";"))
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.lower()] = quality
+    for coding in ("gzip", "x-gzip", "*"):
+        if coding in qualities:
+            return qualities[coding] > 0
+    return False
+
+
+async def iter_chunks(data: bytes, chunk_size: int) -> AsyncIterator[bytes]:
+    for start in range(0, len(data), chunk_size):
+        yield data[start : start + chunk_size]
+
+
+async def iter_gunzip(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Распаковывает gzip потоком, не собирая весь результат в памяти."""
+    decompressor = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        data = decompressor.decompress(chunk)
+        if data:
+            yield data
+    tail = decompressor.flush()
+    if tail:
+        yield tail
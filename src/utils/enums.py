@@ -16,6 +16,39 @@ class TaskStatusEnum(enum.StrEnum):
     CANCELLED = "CANCELLED"
 
 
+class ExportFormatEnum(enum.StrEnum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+class ResultStorageEnum(enum.StrEnum):
+    DATABASE = "database"
+    FILESYSTEM = "filesystem"
+
+
+class PartitionIntervalEnum(enum.StrEnum):
+    DAY = "day"
+    MONTH = "month"
+
+
+class RetentionModeEnum(enum.StrEnum):
+    DETACH = "detach"
+    DROP = "drop"
+
+
+class TaskDurationKindEnum(enum.StrEnum):
+    WAIT = "wait"
+    RUN = "run"
+
+
+class ReadConsistencyEnum(enum.StrEnum):
+    EVENTUAL = "eventual"
+    STRONG = "strong"
+
+
 class ClientErrorMessage(enum.StrEnum):
     NOT_FOUND_TASK_ERROR = "Задача не найдена"
+    NOT_FOUND_TASK_RESULT_ERROR = "Результат задачи не найден"
     CANNOT_CANCEL_TASK_ERROR = "Задача не может быть отменена"
+    INVALID_CURSOR_ERROR = "Некорректный курсор пагинации"
+    IDEMPOTENCY_KEY_REUSED_ERROR = "Ключ идемпотентности уже использован для задачи с другими параметрами"
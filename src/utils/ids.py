@@ -0,0 +1,42 @@
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+# 48-битная метка UUIDv7 допускает даты после 9999 года, которые не помещаются в datetime
+MAX_UUID7_MILLISECONDS = (datetime.max.replace(tzinfo=timezone.utc) - EPOCH) // timedelta(milliseconds=1)
+
+
+def new_task_key() -> tuple[uuid.UUID, datetime]:
+    """
+    Id и created_at новой задачи. Id - UUIDv7 с меткой времени created_at в миллисекундах,
+    поэтому по одному id вычисляется ключ секционирования и поиск по id читает одну секцию.
+    """
+    now = datetime.now(timezone.utc)
+    created_at = now.replace(microsecond=now.microsecond // 1000 * 1000)
+    return uuid7(created_at), created_at
+
+
+def uuid7(moment: datetime) -> uuid.UUID:
+    # 48 бит миллисекунд, 4 бита версии, 12 + 62 случайных бита и 2 бита варианта RFC 9562
+    milliseconds = (moment - EPOCH) // timedelta(milliseconds=1)
+    value = (milliseconds << 80) | int.from_bytes(os.urandom(10), "big")
+    value = (value & ~(0xF << 76)) | (7 << 76)
+    value = (value & ~(0x3 << 62)) | (0x2 << 62)
+    return uuid.UUID(int=value)
+
+
+def uuid7_time(task_id: uuid.UUID | str) -> datetime | None:
+    """created_at задачи из UUIDv7; None для id других версий (задачи, созданные до перехода на UUIDv7)."""
+    if not isinstance(task_id, uuid.UUID):
+        try:
+            task_id = uuid.UUID(task_id)
+        except ValueError:
+            return None
+    if task_id.version != 7:
+        return None
+    milliseconds = task_id.int >> 80
+    if milliseconds > MAX_UUID7_MILLISECONDS:
+        # такой id не выдаётся сервисом: ищем его без created_at, как старые id
+        return None
+    return EPOCH + timedelta(milliseconds=milliseconds)
@@ -0,0 +1,17 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+
+
+def encode_cursor(created_at: datetime, task_id: uuid.UUID) -> str:
+    raw = json.dumps([created_at.isoformat(), str(task_id)])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        created_at, task_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), uuid.UUID(task_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Некорректный курсор") from e
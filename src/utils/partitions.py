@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta, timezone
+
+from utils.enums import PartitionIntervalEnum
+
+PARTITION_NAME_TEMPLATE = "tasks_p{start:%Y%m%d}"
+
+
+def partition_start(moment: datetime, interval: PartitionIntervalEnum) -> datetime:
+    """Начало секции, в которую попадает moment. Границы секций считаются в UTC."""
+    moment = moment.astimezone(timezone.utc)
+    start = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if interval == PartitionIntervalEnum.MONTH:
+        start = start.replace(day=1)
+    return start
+
+
+def shift_partition(start: datetime, interval: PartitionIntervalEnum, count: int = 1) -> datetime:
+    if interval == PartitionIntervalEnum.DAY:
+        return start + timedelta(days=count)
+    months = start.year * 12 + start.month - 1 + count
+    return start.replace(year=months // 12, month=months % 12 + 1)
+
+
+def partition_name(start: datetime) -> str:
+    return PARTITION_NAME_TEMPLATE.format(start=start)
+
+
+def plan_partitions(
+    since: datetime, until: datetime, interval: PartitionIntervalEnum
+) -> list[tuple[str, datetime, datetime]]:
+    """Секции (имя, начало, конец), покрывающие промежуток от since до until включительно."""
+    partitions = []
+    start = partition_start(since, interval)
+    while start <= until:
+        end = shift_partition(start, interval)
+        partitions.append((partition_name(start), start, end))
+        start = end
+    return partitions
+
+
+def retention_cutoff(now: datetime, interval: PartitionIntervalEnum, retention: int) -> datetime:
+    """Секции, которые заканчиваются не позже результата, устарели: хранится retention секций, включая текущую."""
+    return shift_partition(partition_start(now, interval), interval, 1 - retention)
@@ -0,0 +1,12 @@
+from core.consts import DEFAULT_TASK_TYPE, TASKS_QUEUE, TASKS_RETRY_QUEUE_TEMPLATE, TASKS_TYPE_QUEUE_TEMPLATE
+
+
+def get_task_queue(task_type: str) -> str:
+    # тип по умолчанию остаётся в исходной очереди, уже опубликованные сообщения не нужно переносить
+    if task_type == DEFAULT_TASK_TYPE:
+        return TASKS_QUEUE
+    return TASKS_TYPE_QUEUE_TEMPLATE.format(task_type=task_type)
+
+
+def get_retry_queue(task_type: str, delay: int) -> str:
+    return TASKS_RETRY_QUEUE_TEMPLATE.format(queue=get_task_queue(task_type), delay=delay)
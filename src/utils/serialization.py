@@ -0,0 +1,30 @@
+from typing import Any, Sequence
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import Row
+
+# OPT_UTC_Z: время в UTC выводится как "...Z", тот же формат, что отдаёт pydantic
+JSON_OPTIONS: int = orjson.OPT_UTC_Z
+
+
+def dumps_json(value: Any) -> bytes:  # noqa: ANN401
+    return orjson.dumps(value, option=JSON_OPTIONS)
+
+
+def row_to_dict(row: Row, keys: Sequence[str]) -> dict[str, Any]:
+    values = row._asdict()
+    return {key: values[key] for key in keys}
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Ответ, минующий повторную валидацию через response_model: словари из Core-строк сериализует orjson,
+    pydantic-модели - pydantic-core. Вывод совпадает с тем, что FastAPI строит по response_model.
+    """
+
+    def render(self, content: Any) -> bytes:  # noqa: ANN401
+        if isinstance(content, BaseModel):
+            return content.model_dump_json().encode()
+        return dumps_json(content)
@@ -0,0 +1,26 @@
+from core.consts import DURATION_BUCKETS_PER_OCTAVE
+
+STATS_PERCENTILES: tuple[float, ...] = (0.5, 0.95, 0.99)
+
+
+def bucket_upper_bound(bucket: int) -> float:
+    """Верхняя граница корзины в секундах: корзина b покрывает [2^(b/k), 2^((b+1)/k)) миллисекунд."""
+    return 2 ** ((bucket + 1) / DURATION_BUCKETS_PER_OCTAVE) / 1000
+
+
+def histogram_percentiles(histogram: dict[int, int]) -> dict[float, float | None]:
+    """Перцентили по гистограмме {корзина: количество}; точность ограничена шириной корзины (~19%)."""
+    total = sum(histogram.values())
+    if total <= 0:
+        return {q: None for q in STATS_PERCENTILES}
+    percentiles = {}
+    buckets = sorted(histogram.items())
+    for q in STATS_PERCENTILES:
+        threshold = q * total
+        seen = 0
+        for bucket, count in buckets:
+            seen += count
+            if seen >= threshold:
+                percentiles[q] = bucket_upper_bound(bucket)
+                break
+    return percentiles
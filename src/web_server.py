@@ -1,22 +1,48 @@
 import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
 
 import uvicorn
-from fastapi import APIRouter, FastAPI
+from fastapi import APIRouter, FastAPI, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 from api.tasks import router as tasks_router
 from core.config import settings
 from core.logger import logger
+from handlers import task_registry
+from infra.metrics import RequestDurationMiddleware, get_metrics_registry
+from infra.notify import task_event_listener
 from infra.rabbit import rabbitmq
+from services.task_cache import TaskCacheService
+from services.task_events import task_event_hub
 
 combined_router = APIRouter(prefix="/api/v1")
 combined_router.include_router(tasks_router)
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    task_event_listener.subscribe(TaskCacheService.on_task_event)
+    task_event_listener.subscribe(task_event_hub.publish)
+    task_event_listener.subscribe_reset(TaskCacheService.clear)
+    task_event_listener.start()
+    yield
+    await task_event_listener.stop()
+    await rabbitmq.close()
+
+
+app = FastAPI(lifespan=lifespan)
 app.include_router(combined_router)
+app.add_middleware(RequestDurationMiddleware)
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics() -> Response:
+    return Response(generate_latest(get_metrics_registry()), media_type=CONTENT_TYPE_LATEST)
 
 
 if __name__ == "__main__":
     logger.info("Запуск сервиса управления задачами...")
-    asyncio.run(rabbitmq.declare_queues())
+    asyncio.run(rabbitmq.declare_queues(task_registry.task_types))
     uvicorn.run("web_server:app", host=settings.run.host, port=settings.run.port, reload=True)
     logger.info("Остановка сервиса управления задачами...")
@@ -1,17 +1,113 @@
+import argparse
 import asyncio
-import datetime
 import json
+import multiprocessing
+import os
+import signal
+import time
+from multiprocessing.connection import wait
+from multiprocessing.process import BaseProcess
+from types import FrameType
+from uuid import UUID
 
 import aio_pika
 from aio_pika import IncomingMessage
+from aio_pika.abc import AbstractConnection, AbstractQueue
+from sqlalchemy import Row
 
 from core.config import settings
-from core.consts import TASKS_QUEUE
+from core.consts import ERROR_MAX_LENGTH, TASK_CANCEL_CHANNEL
 from core.logger import logger
 from db.postgres import get_session_context
+from handlers import TaskHandler, task_registry
+from infra.executor import cpu_executor
+from infra.metrics import (
+    TASK_FAILURES,
+    TASK_MESSAGES_ACKED,
+    TASK_MESSAGES_NACKED,
+    TASK_QUEUE_WAIT,
+    TASK_RUN_DURATION,
+    TASKS_IN_FLIGHT,
+    mark_process_dead,
+    start_metrics_server,
+)
+from infra.notify import TaskEventListener
+from infra.rabbit import declare_task_queues, rabbitmq
+from messaging.publisher import TaskPublisher
+from schemas.task import TaskResult
+from services.running_tasks import RunningTaskRegistry
 from services.task import TaskService
+from services.task_leases import TaskLeaseKeeper
+from services.task_results import TaskResultWriter
 from utils.enums import TaskStatusEnum
 
+result_writer = TaskResultWriter(settings.worker.result_batch_size, settings.worker.result_flush_interval)
+running_tasks = RunningTaskRegistry()
+# пропущенный сигнал отмены (например, при переподключении LISTEN) обнаружится при продлении аренды
+lease_keeper = TaskLeaseKeeper(settings.worker.heartbeat_interval, on_lost=running_tasks.cancel)
+cancel_listener = TaskEventListener(TASK_CANCEL_CHANNEL)
+
+
+async def run_handler(task: Row) -> TaskResult:
+    try:
+        handler = task_registry.get(task.task_type)
+        result = await handler.func(task)
+        return TaskResult(id=task.id, status=TaskStatusEnum.COMPLETED, result=result)
+    except Exception as e:
+        logger.exception(f"Ошибка обработки задачи {task.id}")
+        TASK_FAILURES.labels(task.task_type).inc()
+        # полный traceback остаётся в логах, в строке задачи хранится только начало сообщения
+        error = str(e)[:ERROR_MAX_LENGTH]
+        if task.attempts < task.max_attempts:
+            # задача ждёт повторной попытки в отложенной очереди
+            return TaskResult(id=task.id, status=TaskStatusEnum.PENDING, error=error, completed_at=None)
+        return TaskResult(id=task.id, status=TaskStatusEnum.FAILED, error=error)
+
+
+async def execute_task(task: Row) -> TaskResult:
+    if task.started_at is not None:
+        TASK_QUEUE_WAIT.labels(task.task_type).observe((task.started_at - task.created_at).total_seconds())
+    started = time.perf_counter()
+    with TASKS_IN_FLIGHT.labels(task.task_type).track_inprogress():
+        task_result = await run_handler(task)
+    TASK_RUN_DURATION.labels(task.task_type, task_result.status).observe(time.perf_counter() - started)
+    return task_result
+
+
+async def publish_followups(executed: list[tuple[Row, TaskResult]]) -> list[UUID]:
+    """
+    Отправляет неудачные задачи в очередь повторов или, если попытки исчерпаны, в dead-letter очередь.
+    Ошибки публикации обрабатываются по каждой задаче: возвращает id задач, которые не удалось отправить на повтор.
+    """
+    failed = [(task, task_result) for task, task_result in executed if task_result.status != TaskStatusEnum.COMPLETED]
+    if not failed:
+        return []
+    try:
+        async with rabbitmq.channel_pool.channel() as channel:
+            published = await asyncio.gather(
+                *(
+                    TaskPublisher.publish_retry(task, channel)
+                    if task_result.status == TaskStatusEnum.PENDING
+                    else TaskPublisher.publish_dead_letter(task, task_result.error, channel)
+                    for task, task_result in failed
+                ),
+                return_exceptions=True,
+            )
+    except Exception as e:
+        published = [e] * len(failed)
+
+    unpublished: list[UUID] = []
+    for (task, task_result), error in zip(failed, published):
+        if not isinstance(error, Exception):
+            continue
+        if task_result.status == TaskStatusEnum.PENDING:
+            logger.error(f"Не удалось отправить задачу {task.id} в очередь повторов: {error!r}")
+            unpublished.append(task.id)
+        else:
+            # статус FAILED уже записан, теряется только сообщение для разбора вручную
+            logger.error(f"Не удалось отправить задачу {task.id} в dead-letter очередь: {error!r}")
+    return unpublished
+
 
 async def process_task(message: IncomingMessage) -> None:
     try:
@@ -19,58 +115,284 @@ async def process_task(message: IncomingMessage) -> None:
         task_id = message_data["task_id"]
         logger.info(f"Получена задача: {task_id}")
 
+        # один условный UPDATE вместо SELECT + проверки отмены + UPDATE
         async with await get_session_context() as session:
-            task = await TaskService.get_task_by_id(task_id, session)
-            if not task:
-                logger.warning(f"Задача {task_id} не найдена")
-                await message.ack()
-                return
-            if task.status == TaskStatusEnum.CANCELLED:
-                logger.info(f"Задача {task_id} отменена")
-                await message.ack()
-                return
-
-            try:
-                task.status = TaskStatusEnum.IN_PROGRESS
-                task.started_at = datetime.datetime.now(datetime.timezone.utc)
-                await session.commit()
-
-                await asyncio.sleep(2)
-
-                task.status = TaskStatusEnum.COMPLETED
-                task.result = "Задача успешно выполнена"
-                task.completed_at = datetime.datetime.now(datetime.timezone.utc)
-                await session.commit()
-
-                await message.ack()
-                logger.info(f"Задача {task_id} завершена")
-
-            except Exception as e:
-                task.status = TaskStatusEnum.FAILED
-                task.error = str(e)
-                await session.commit()
-                await message.nack(requeue=False)
-                logger.exception("Ошибка обработки задачи")
+            task = await TaskService.claim_task(task_id, session)
+        if not task:
+            logger.info(f"Задача {task_id} не найдена, отменена или уже обрабатывается")
+            await message.ack()
+            TASK_MESSAGES_ACKED.inc()
+            return
+
+        async with lease_keeper.hold([task.id]):
+            task_result = await running_tasks.run(task.id, execute_task(task))
+        if task_result is None:
+            # статус CANCELLED уже записан при отмене, слот освобождается сразу
+            await message.ack()
+            TASK_MESSAGES_ACKED.inc()
+            return
+        await result_writer.write(task_result)
+        if await publish_followups([(task, task_result)]):
+            # статус PENDING уже записан: сообщение возвращается в очередь и задача повторяется без задержки
+            await message.nack(requeue=True)
+            TASK_MESSAGES_NACKED.inc()
+            return
+        await message.ack()
+        TASK_MESSAGES_ACKED.inc()
+        if task_result.status == TaskStatusEnum.COMPLETED:
+            logger.info(f"Задача {task_id} завершена")
 
     except Exception:
         logger.exception("Ошибка на этапе получения задачи")
         await message.nack(requeue=False)
+        TASK_MESSAGES_NACKED.inc()
+
+
+async def process_batch(messages: list[IncomingMessage]) -> None:
+    """Обрабатывает пачку сообщений: один UPDATE на захват, один на результаты, одно подтверждение multiple=True."""
+    messages_by_task: dict[str, IncomingMessage] = {}
+    for message in messages:
+        try:
+            messages_by_task[str(UUID(json.loads(message.body.decode())["task_id"]))] = message
+        except (ValueError, KeyError):
+            logger.exception("Некорректное сообщение в пачке")
+            await message.nack(requeue=False)
+            TASK_MESSAGES_NACKED.inc()
+    if not messages_by_task:
+        return
+
+    async with await get_session_context() as session:
+        tasks = await TaskService.claim_tasks(list(messages_by_task), session)
+    logger.info(f"Получена пачка задач: {len(tasks)} из {len(messages)} сообщений")
+
+    async with lease_keeper.hold([task.id for task in tasks]):
+        task_results = await asyncio.gather(*(running_tasks.run(task.id, execute_task(task)) for task in tasks))
+    # отменённые задачи не записываются и не повторяются
+    executed = [(task, task_result) for task, task_result in zip(tasks, task_results) if task_result is not None]
+    async with await get_session_context() as session:
+        await TaskService.finish_tasks([task_result for _, task_result in executed], session)
+    # сообщения задач, не попавших в очередь повторов, возвращаются до подтверждения остальной пачки
+    for task_id in await publish_followups(executed):
+        await messages_by_task[str(task_id)].nack(requeue=True)
+        TASK_MESSAGES_NACKED.inc()
+
+
+class TaskConsumer:
+    """Ограничивает число одновременно обрабатываемых сообщений и дожидается их завершения при остановке."""
+
+    def __init__(self, concurrency: int) -> None:
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.in_flight: set[asyncio.Task] = set()
+
+    async def on_message(self, message: IncomingMessage) -> None:
+        # aiormq запускает отдельную корутину на каждое сообщение, отслеживаем её для корректной остановки
+        current = asyncio.current_task()
+        self.in_flight.add(current)
+        try:
+            async with self.semaphore:
+                await process_task(message)
+        finally:
+            self.in_flight.discard(current)
+
+    async def drain(self, timeout: float) -> None:
+        if not self.in_flight:
+            return
+        logger.info(f"Ожидание завершения задач в обработке: {len(self.in_flight)}")
+        _, pending = await asyncio.wait(set(self.in_flight), timeout=timeout)
+        if pending:
+            logger.warning(f"Не дождались завершения {len(pending)} задач, сообщения вернутся в очередь")
+
+
+class BatchTaskConsumer(TaskConsumer):
+    """Собирает до batch_size сообщений или ждёт batch_timeout секунд и обрабатывает их пачкой."""
+
+    def __init__(self, concurrency: int, batch_size: int, batch_timeout: float) -> None:
+        super().__init__(max(1, concurrency // batch_size))
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.messages: list[IncomingMessage] = []
+        self.batch_timer: asyncio.TimerHandle | None = None
+        # ack(multiple=True) подтверждает все предыдущие доставки канала, поэтому пачки подтверждаются по порядку
+        self.previous_ack: asyncio.Future | None = None
+
+    async def on_message(self, message: IncomingMessage) -> None:
+        self.messages.append(message)
+        if len(self.messages) >= self.batch_size:
+            self.start_batch()
+        elif self.batch_timer is None:
+            self.batch_timer = asyncio.get_running_loop().call_later(self.batch_timeout, self.start_batch)
+
+    def start_batch(self) -> None:
+        if self.batch_timer is not None:
+            self.batch_timer.cancel()
+            self.batch_timer = None
+        if not self.messages:
+            return
+        batch, self.messages = self.messages, []
+        previous_ack, self.previous_ack = self.previous_ack, asyncio.get_running_loop().create_future()
+        task = asyncio.create_task(self.run_batch(batch, previous_ack, self.previous_ack))
+        self.in_flight.add(task)
+        task.add_done_callback(self.in_flight.discard)
+
+    async def run_batch(
+        self, batch: list[IncomingMessage], previous_ack: asyncio.Future | None, ack: asyncio.Future
+    ) -> None:
+        try:
+            async with self.semaphore:
+                try:
+                    await process_batch(batch)
+                except Exception:
+                    logger.exception("Ошибка обработки пачки задач")
+                    for message in batch:
+                        if not message.processed:
+                            await message.nack(requeue=False)
+                            TASK_MESSAGES_NACKED.inc()
+            if previous_ack is not None:
+                await previous_ack
+            # nack уже отправлены по отдельности, остальные сообщения пачки подтверждаются одним фреймом
+            unprocessed = [message for message in batch if not message.processed]
+            if unprocessed:
+                await unprocessed[-1].ack(multiple=True)
+                TASK_MESSAGES_ACKED.inc(len(unprocessed))
+        finally:
+            ack.set_result(None)
+
+    async def drain(self, timeout: float) -> None:
+        self.start_batch()
+        await super().drain(timeout)
 
 
-async def consume() -> None:
+def build_consumer(handler: TaskHandler) -> TaskConsumer:
+    if settings.worker.batch_size > 0:
+        if handler.prefetch_count < settings.worker.batch_size:
+            logger.warning(
+                f"prefetch_count типа {handler.task_type} меньше batch_size: пачки будут собираться только по таймауту"
+            )
+        return BatchTaskConsumer(handler.concurrency, settings.worker.batch_size, settings.worker.batch_timeout)
+    return TaskConsumer(handler.concurrency)
+
+
+Subscription = tuple[AbstractQueue, str, TaskConsumer]
+
+
+async def subscribe(connection: AbstractConnection, handlers: list[TaskHandler]) -> list[Subscription]:
+    subscriptions = []
+    for handler in handlers:
+        # отдельный канал на тип: prefetch задаётся на канал, а медленный тип не должен занимать слоты быстрого
+        channel = await connection.channel()
+        await channel.set_qos(prefetch_count=handler.prefetch_count)
+        tasks_queue = await declare_task_queues(channel, handler.task_type)
+        consumer = build_consumer(handler)
+        consumer_tag = await tasks_queue.consume(consumer.on_message, no_ack=False)
+        subscriptions.append((tasks_queue, consumer_tag, consumer))
+    return subscriptions
+
+
+async def unsubscribe(subscriptions: list[Subscription]) -> None:
+    # перестаём получать новые сообщения и дожидаемся уже полученных
+    for tasks_queue, consumer_tag, _ in subscriptions:
+        await tasks_queue.cancel(consumer_tag)
+    await asyncio.gather(*(consumer.drain(settings.worker.shutdown_timeout) for _, _, consumer in subscriptions))
+
+
+async def consume(task_types: list[str]) -> None:
     connection = await aio_pika.connect_robust(
         host=settings.rabbit.host,
         login=settings.rabbit.login,
         password=settings.rabbit.password,
     )
+    handlers = [task_registry.get(task_type) for task_type in task_types]
+    cpu_executor.start(settings.worker.cpu_pool_size)
+    cancel_listener.subscribe(running_tasks.on_task_event)
+    cancel_listener.start()
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop_event.set)
 
     async with connection:
-        channel = await connection.channel()
-        tasks_queue = await channel.declare_queue(TASKS_QUEUE, durable=True)
-        await tasks_queue.consume(process_task, no_ack=False)
-        await asyncio.Future()
+        subscriptions = await subscribe(connection, handlers)
+        logger.info(f"Воркер подписан на типы задач: {', '.join(task_types)}")
+
+        await stop_event.wait()
+        logger.info("Получен сигнал остановки воркера")
+        await unsubscribe(subscriptions)
+        await cancel_listener.stop()
+        await lease_keeper.close()
+        await result_writer.close()
+        await rabbitmq.close()
+
+    cpu_executor.shutdown()
+
+
+def run_consumer(task_types: list[str]) -> None:
+    asyncio.run(consume(task_types))
+
+
+def supervise(processes: int, task_types: list[str]) -> None:
+    """Запускает processes процессов-потребителей и перезапускает упавшие до получения сигнала остановки."""
+    context = multiprocessing.get_context("spawn")
+    children: dict[int, BaseProcess] = {}
+    stopping = False
+
+    def start_child(slot: int) -> None:
+        process = context.Process(target=run_consumer, args=(task_types,), name=f"tasks-worker-{slot}")
+        process.start()
+        children[slot] = process
+        logger.info(f"Запущен процесс воркера {process.name} (pid {process.pid})")
+
+    def stop(signum: int, frame: FrameType | None) -> None:
+        nonlocal stopping
+        stopping = True
+        for process in children.values():
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for slot in range(processes):
+        start_child(slot)
+
+    while not stopping:
+        wait([process.sentinel for process in children.values()], timeout=1)
+        for slot, process in list(children.items()):
+            if stopping or process.is_alive():
+                continue
+            logger.warning(f"Процесс воркера {process.name} завершился с кодом {process.exitcode}, перезапуск")
+            mark_process_dead(process.pid)
+            time.sleep(settings.worker.restart_delay)
+            start_child(slot)
+
+    for process in children.values():
+        process.join(settings.worker.shutdown_timeout)
+        if process.is_alive():
+            logger.warning(f"Процесс воркера {process.name} не завершился вовремя, принудительная остановка")
+            process.kill()
+        mark_process_dead(process.pid)
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Воркер сервиса задач")
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=settings.worker.processes or os.cpu_count() or 1,
+        help="Количество процессов-потребителей",
+    )
+    parser.add_argument(
+        "--task-types",
+        type=lambda value: value.split(","),
+        default=settings.worker.task_types or task_registry.task_types,
+        help="Типы задач через запятую, по умолчанию - все зарегистрированные",
+    )
+    args = parser.parse_args()
+
     logger.info("Запуск воркера сервиса задач...")
-    asyncio.run(consume())
+    # в режиме нескольких процессов сервер метрик работает в супервизоре и собирает метрики всех потребителей
+    start_metrics_server(settings.worker.metrics_port)
+    if args.processes > 1:
+        supervise(args.processes, args.task_types)
+    else:
+        run_consumer(args.task_types)